@@ -0,0 +1,306 @@
+"""
+Tokens de acceso firmados y principal del request.
+
+`POST /users/login` emite un JWT HS256 (firmado con AUTH_SECRET_KEY) con el id del
+usuario (`sub`), su rol, `iat`, `exp` y un id único (`jti`). Los endpoints que actúan
+en nombre de alguien lo reciben en `Authorization: Bearer <token>` y lo verifican en
+el proceso, sin consultar la base:
+
+- `PrincipalCache`: token -> `Principal(id, role)` ya verificado, por
+  AUTH_PRINCIPAL_CACHE_SECONDS (nunca más allá de `exp`), así los requests siguientes
+  del mismo cliente no repiten HMAC ni el parseo del JSON.
+- `RevocationList`: `jti` revocados (tabla `revoked_tokens`, p.ej. por
+  `POST /users/logout`). Cada worker guarda el conjunto en memoria y lo recarga en un
+  thread aparte cada AUTH_REVOCATION_REFRESH_SECONDS; la revocación rige al instante
+  en el worker que la hizo y en los demás tras la próxima recarga. Se consulta en cada
+  request, también con el principal en caché.
+
+El rol viaja en el token: si cambia, rige desde el próximo login (o tras revocar).
+
+Las operaciones de la plataforma (importación masiva, exportes contables) no dependen
+del rol, que cualquiera elige al registrarse, sino de listas de ids de usuario por
+grupo (`STAFF_GROUPS`: AUTH_ADMIN_USER_IDS, AUTH_PARTNER_USER_IDS,
+AUTH_FINANCE_USER_IDS, separados por coma); `staff_principal(...)` las exige.
+
+AUTH_SECRET_KEY es obligatoria, como DATABASE_URL: sin ella la app no arranca. Debe ser
+la misma en todos los workers y máquinas, y cambiarla invalida los tokens emitidos.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.sql import text
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY")
+if not AUTH_SECRET_KEY:
+    raise ValueError(
+        "No se encontró la variable de entorno AUTH_SECRET_KEY (clave para firmar los tokens de acceso). "
+        "Defínela en el archivo .env o en las variables del servicio, p.ej. con: "
+        "python -c \"import secrets; print(secrets.token_urlsafe(48))\""
+    )
+AUTH_TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS") or 12 * 3600)
+AUTH_PRINCIPAL_CACHE_SECONDS = int(os.getenv("AUTH_PRINCIPAL_CACHE_SECONDS") or 300)
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE") or 10000)
+AUTH_REVOCATION_REFRESH_SECONDS = int(os.getenv("AUTH_REVOCATION_REFRESH_SECONDS") or 30)
+# Tolerancia para relojes desfasados entre workers / máquinas
+AUTH_LEEWAY_SECONDS = 30
+
+
+def _id_set(name: str) -> frozenset:
+    return frozenset(int(value) for value in (os.getenv(name) or "").split(",") if value.strip())
+
+
+# Grupo -> ids de usuario que lo integran (ver staff_principal)
+STAFF_GROUPS = {
+    "admin": _id_set("AUTH_ADMIN_USER_IDS"),
+    "partner": _id_set("AUTH_PARTNER_USER_IDS"),
+    "finance": _id_set("AUTH_FINANCE_USER_IDS"),
+}
+
+_SECRET = AUTH_SECRET_KEY.encode()
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class TokenError(Exception):
+    """Token mal formado, con firma inválida, vencido o revocado."""
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+    token_id: str
+    expires_at: int  # epoch en segundos
+
+
+# ==========================
+# JWT (HS256)
+# ==========================
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _sign(signing_input: bytes) -> bytes:
+    return hmac.new(_SECRET, signing_input, hashlib.sha256).digest()
+
+
+def issue_token(user_id: int, role: str, ttl_seconds: int = None) -> dict:
+    """Token firmado para el usuario; devuelve access_token, token_type y expires_in."""
+    ttl_seconds = ttl_seconds or AUTH_TOKEN_TTL_SECONDS
+    now = int(time.time())
+    claims = {"sub": str(user_id), "role": role, "iat": now, "exp": now + ttl_seconds, "jti": secrets.token_urlsafe(16)}
+    signing_input = ".".join(
+        _b64encode(json.dumps(part, separators=(",", ":")).encode()) for part in (_HEADER, claims)
+    ).encode()
+    token = signing_input.decode() + "." + _b64encode(_sign(signing_input))
+    return {"access_token": token, "token_type": "bearer", "expires_in": ttl_seconds}
+
+
+def decode_token(token: str) -> Principal:
+    """Verifica firma y vencimiento; no mira la lista de revocados."""
+    try:
+        header_b64, claims_b64, signature_b64 = token.split(".")
+        signature = _b64decode(signature_b64)
+    except ValueError:
+        raise TokenError("Token mal formado")
+    if not hmac.compare_digest(signature, _sign(f"{header_b64}.{claims_b64}".encode())):
+        raise TokenError("Firma inválida")
+    try:
+        header = json.loads(_b64decode(header_b64))
+        claims = json.loads(_b64decode(claims_b64))
+        principal = Principal(
+            id=int(claims["sub"]), role=str(claims["role"]), token_id=str(claims["jti"]), expires_at=int(claims["exp"])
+        )
+    except (ValueError, KeyError, TypeError):
+        raise TokenError("Token mal formado")
+    if header.get("alg") != "HS256":
+        raise TokenError("Algoritmo no soportado")
+    if principal.expires_at + AUTH_LEEWAY_SECONDS < time.time():
+        raise TokenError("Token vencido")
+    return principal
+
+
+# ==========================
+# Caché de principales
+# ==========================
+class PrincipalCache:
+    """LRU token -> (Principal, vence_en) con TTL; segura entre threads."""
+
+    def __init__(self, ttl_seconds: int = AUTH_PRINCIPAL_CACHE_SECONDS, max_size: int = AUTH_PRINCIPAL_CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            principal, valid_until = entry
+            if valid_until < time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return principal
+
+    def put(self, token: str, principal: Principal):
+        valid_until = min(time.time() + self.ttl_seconds, principal.expires_at + AUTH_LEEWAY_SECONDS)
+        with self._lock:
+            self._entries[token] = (principal, valid_until)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# ==========================
+# Revocados
+# ==========================
+class RevocationList:
+    def __init__(self, refresh_seconds: int = AUTH_REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._revoked = frozenset()
+        self._local = {}  # jti -> exp, revocados en este worker (por si la recarga corrió antes del commit)
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def load(self, db=None):
+        """Carga los `jti` revocados que aún no vencieron."""
+        from .database import SessionLocal
+
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            rows = db.execute(text("SELECT jti FROM revoked_tokens WHERE expires_at > NOW()")).scalars().all()
+        finally:
+            if own_session:
+                db.close()
+        now = time.time()
+        with self._lock:
+            self._local = {jti: exp for jti, exp in self._local.items() if exp + AUTH_LEEWAY_SECONDS > now}
+            self._revoked = frozenset(rows) | frozenset(self._local)
+            self._loaded_at = time.monotonic()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.load()
+            except Exception:
+                logger.exception("No se pudo recargar la lista de tokens revocados")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="revocation-refresh", daemon=True).start()
+
+    def is_revoked(self, token_id: str) -> bool:
+        if self._loaded_at is None:
+            try:
+                self.load()
+            except Exception:
+                # Sin tabla o sin base: se reintenta en segundo plano tras refresh_seconds
+                logger.exception("No se pudo cargar la lista de tokens revocados")
+                self._loaded_at = time.monotonic()
+        elif time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._refresh_in_background()
+        return token_id in self._revoked
+
+    def add_local(self, principal: Principal):
+        with self._lock:
+            self._local[principal.token_id] = principal.expires_at
+            self._revoked = self._revoked | {principal.token_id}
+
+
+principals = PrincipalCache()
+revocations = RevocationList()
+
+
+def verify(token: str) -> Principal:
+    """Principal del token (caché o verificación local); TokenError si no vale."""
+    principal = principals.get(token)
+    if principal is None:
+        principal = decode_token(token)
+        principals.put(token, principal)
+    if revocations.is_revoked(principal.token_id):
+        raise TokenError("Token revocado")
+    return principal
+
+
+def revoke(db, principal: Principal):
+    """Revoca el token (logout). Hace commit."""
+    db.execute(text("""
+        INSERT INTO revoked_tokens (jti, user_id, expires_at)
+        VALUES (:jti, :user_id, :expires_at)
+        ON CONFLICT (jti) DO NOTHING
+    """), {
+        "jti": principal.token_id,
+        "user_id": principal.id,
+        "expires_at": datetime.fromtimestamp(principal.expires_at + AUTH_LEEWAY_SECONDS, tz=timezone.utc),
+    })
+    # Los vencidos ya no hace falta recordarlos
+    db.execute(text("DELETE FROM revoked_tokens WHERE expires_at < NOW()"))
+    db.commit()
+    revocations.add_local(principal)
+
+
+# ==========================
+# Dependencias de FastAPI
+# ==========================
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def current_principal(authorization: Optional[str] = Header(None)) -> Principal:
+    """Principal del header `Authorization: Bearer <token>`; 401 si falta o no vale."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _unauthorized("Falta el token de acceso")
+    try:
+        return verify(token.strip())
+    except TokenError as exc:
+        raise _unauthorized(str(exc))
+
+
+def staff_principal(*groups: str):
+    """Dependencia: el principal del token, que además debe estar en alguno de `groups`; 403 si no."""
+    allowed = frozenset().union(*(STAFF_GROUPS[group] for group in groups))
+
+    def dependency(principal: Principal = Depends(current_principal)) -> Principal:
+        if principal.id not in allowed:
+            raise HTTPException(status_code=403, detail="No autorizado para esta operación")
+        return principal
+
+    return dependency
+
+
+def is_staff(principal: Principal, group: str) -> bool:
+    return principal.id in STAFF_GROUPS[group]
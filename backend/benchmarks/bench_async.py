@@ -0,0 +1,92 @@
+"""
+Benchmark engine síncrono vs asíncrono a alta concurrencia.
+
+Monta una app mínima con la misma consulta de búsqueda servida de dos formas:
+`def` + Session (threadpool de Starlette) y `async def` + AsyncSession (asyncpg),
+y reporta req/s y latencias p50/p95/p99 de cada una con N clientes concurrentes.
+Usa los datos que ya existan en la base.
+
+    python -m backend.benchmarks.bench_async --concurrency 50 200 --duration 10
+
+Requiere `httpx` (solo para benchmarks).
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..database import get_db, get_async_db
+from .. import search
+from .common import summarize, print_table
+
+
+def build_app():
+    app = FastAPI()
+
+    @app.get("/sync/search")
+    def sync_search(query: str = "", db: Session = Depends(get_db)):
+        return len(search.search_services(db, query=query).items)
+
+    @app.get("/async/search")
+    async def async_search(query: str = "", db: AsyncSession = Depends(get_async_db)):
+        return len((await search.search_services_async(db, query=query)).items)
+
+    return app
+
+
+async def drive(client, path, concurrency, duration):
+    samples, errors = [], 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                failed = response.status_code != 200
+            except Exception:
+                failed = True
+            if failed:
+                errors += 1
+            else:
+                samples.append((time.perf_counter() - start) * 1000.0)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, errors
+
+
+async def run(args):
+    import httpx
+
+    app = build_app()
+    transport = httpx.ASGITransport(app=app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for concurrency in args.concurrency:
+            for variant in ("sync", "async"):
+                path = f"/{variant}/search?query={args.query}"
+                await drive(client, path, min(concurrency, 8), 1.0)  # calentamiento
+                samples, errors = await drive(client, path, concurrency, args.duration)
+                stats = summarize(samples)
+                rows.append([
+                    concurrency, variant, f"{stats['n'] / args.duration:.1f}",
+                    f"{stats['p50']:.1f}", f"{stats['p95']:.1f}", f"{stats['p99']:.1f}", errors,
+                ])
+    print_table(["concurrencia", "engine", "req/s", "p50 ms", "p95 ms", "p99 ms", "errores"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--query", default="")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark de carga masiva de servicios: filas por segundo.
+
+Compara `crud.create_service` fila por fila (lo que hace POST /services/) contra
+`bulk_import.Importer` con NDJSON y CSV. Crea un vendedor y una skill propios y los
+borra al final junto con todos los servicios cargados.
+
+    python -m backend.benchmarks.bench_import --rows 1000 10000 --legacy-rows 500
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+from sqlalchemy.sql import text
+
+from ..database import SessionLocal
+from .. import bulk_import, crud, schemas
+from .common import print_table
+
+
+def make_services(count, vendor_id, skill_id):
+    return [
+        {
+            "title": f"bench-import {i}",
+            "description": f"Servicio sintético número {i} para medir la carga masiva",
+            "price": 10 + i % 500,
+            "vendor_id": vendor_id,
+            "skill_id": skill_id,
+        }
+        for i in range(count)
+    ]
+
+
+def as_ndjson(rows):
+    return [json.dumps(row) + "\n" for row in rows]
+
+
+def as_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().splitlines(keepends=True)
+
+
+def run_legacy(db, rows):
+    start = time.perf_counter()
+    for row in rows:
+        crud.create_service(db, schemas.ServiceCreate(**row))
+    return time.perf_counter() - start
+
+
+def run_import(db, lines, fmt):
+    start = time.perf_counter()
+    importer = bulk_import.Importer(db, "services", fmt)
+    importer.feed_lines(lines)
+    result = importer.finish()
+    elapsed = time.perf_counter() - start
+    if result.error_count:
+        raise SystemExit(f"La importación rechazó filas: {result.errors[:3]}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--legacy-rows", type=int, default=500, help="filas para el camino fila por fila")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    vendor_id = db.execute(text("""
+        INSERT INTO users (name, email, password_hash, role)
+        VALUES ('bench', 'bench-import@example.com', 'x', 'vendedor') RETURNING id
+    """)).scalar()
+    skill_id = db.execute(text("INSERT INTO skills (name) VALUES ('bench-import') RETURNING id")).scalar()
+    db.commit()
+
+    table = []
+    try:
+        legacy_rows = make_services(args.legacy_rows, vendor_id, skill_id)
+        elapsed = run_legacy(db, legacy_rows)
+        table.append(["crud.create_service", len(legacy_rows), f"{elapsed:.2f}", f"{len(legacy_rows) / elapsed:,.0f}"])
+
+        for count in args.rows:
+            rows = make_services(count, vendor_id, skill_id)
+            for fmt, lines in (("ndjson", as_ndjson(rows)), ("csv", as_csv(rows))):
+                elapsed = run_import(db, lines, fmt)
+                table.append([f"import {fmt}", count, f"{elapsed:.2f}", f"{count / elapsed:,.0f}"])
+    finally:
+        db.rollback()
+        # services.vendor_id es ON DELETE CASCADE
+        db.execute(text("DELETE FROM users WHERE id = :id"), {"id": vendor_id})
+        db.execute(text("DELETE FROM skills WHERE id = :id"), {"id": skill_id})
+        db.commit()
+        db.close()
+
+    print_table(["camino", "filas", "segundos", "filas/s"], table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark del costo de `instrumentation.InstrumentationMiddleware`.
+
+Arma dos apps FastAPI idénticas (una ruta que ejecuta unas sentencias en un SQLite en
+memoria y devuelve una lista de dicts), una con el middleware, los listeners de SQL y
+`InstrumentedRoute`, y otra sin nada, y las llama directo por ASGI (sin red ni
+servidor). Imprime la latencia de cada una y el sobrecosto relativo; el objetivo es
+quedar por debajo de 5 %. No toca la base de la app.
+
+    python -m backend.benchmarks.bench_instrumentation --statements 1 5 20
+"""
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from .. import instrumentation
+from .common import measure, summarize, print_table
+
+ROWS = [{"id": i, "title": f"Servicio {i}", "price": 100.5 + i} for i in range(50)]
+
+
+def build_app(engine, statements, instrumented):
+    app = FastAPI()
+    if instrumented:
+        app.router.route_class = instrumentation.InstrumentedRoute
+
+    @app.get("/items/{item_id}")
+    def get_items(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(statements):
+                conn.execute(text("SELECT 1")).scalar()
+        return ROWS
+
+    if instrumented:
+        app.add_middleware(instrumentation.InstrumentationMiddleware)
+    return app
+
+
+def call(app, loop):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/items/1", "raw_path": b"/items/1", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    loop.run_until_complete(app(scope, receive, send))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--statements", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    table = []
+    for statements in args.statements:
+        plain_engine = create_engine("sqlite://")
+        instrumented_engine = create_engine("sqlite://")
+        instrumentation.install(instrumented_engine)
+        plain = build_app(plain_engine, statements, instrumented=False)
+        instrumented = build_app(instrumented_engine, statements, instrumented=True)
+
+        results = {}
+        for name, app in (("sin instrumentar", plain), ("instrumentado", instrumented)):
+            results[name] = summarize(measure(lambda: call(app, loop), args.iterations, warmup=50))
+        base = results["sin instrumentar"]["p50"]
+        for name, stats in results.items():
+            overhead = (stats["p50"] - base) / base * 100.0
+            table.append([statements, name, f"{stats['p50']:.3f}", f"{stats['p95']:.3f}", f"{overhead:+.1f} %"])
+    loop.close()
+
+    print_table(["sentencias", "app", "p50 ms", "p95 ms", "sobrecosto (p50)"], table)
+
+
+if __name__ == "__main__":
+    main()
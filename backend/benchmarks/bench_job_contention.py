@@ -0,0 +1,129 @@
+"""
+Prueba de contención de la máquina de estados de trabajos (`job_states.py`).
+
+Por cada ronda crea un trabajo y lo ataca desde muchos threads a la vez (cada uno con
+su propia sesión, liberados juntos por una barrera):
+
+1. todos intentan `accept` como vendedor: exactamente uno debe lograrlo;
+2. todos intentan `complete`, la mitad como contratador y la mitad como vendedor: el
+   trabajo debe terminar `completado` con ambas confirmaciones.
+
+Mide latencias; las mismas aserciones corren en CI en backend/tests/test_job_contention.py.
+Falla (código 1) si alguna ronda termina en un estado inconsistente. Los usuarios,
+el servicio y los trabajos se borran al final.
+
+    python -m backend.benchmarks.bench_job_contention --threads 32 --rounds 20
+"""
+import argparse
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.sql import text
+
+from .. import job_states
+from ..database import SessionLocal, engine
+from .common import summarize, print_table
+
+
+def _setup():
+    tag = uuid.uuid4().hex[:8]
+    with engine.begin() as conn:
+        def user(role):
+            return conn.execute(text("""
+                INSERT INTO users (name, email, password_hash, role)
+                VALUES (:name, :email, 'x', :role) RETURNING id
+            """), {"name": f"contention {role}", "email": f"contention-{role}-{tag}@example.invalid", "role": role}).scalar_one()
+
+        vendor_id, contractor_id = user("vendedor"), user("contratador")
+        service_id = conn.execute(text("""
+            INSERT INTO services (vendor_id, title, price, is_active) VALUES (:vendor_id, 'contention', 10, TRUE)
+            RETURNING id
+        """), {"vendor_id": vendor_id}).scalar_one()
+    return vendor_id, contractor_id, service_id
+
+
+def _new_job(vendor_id, contractor_id, service_id):
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            INSERT INTO jobs (contractor_id, vendor_id, service_id, status, total_amount)
+            VALUES (:contractor_id, :vendor_id, :service_id, 'pendiente', 10)
+            RETURNING id
+        """), {"contractor_id": contractor_id, "vendor_id": vendor_id, "service_id": service_id}).scalar_one()
+
+
+def _hammer(pool, threads, name, job_id, user_ids):
+    """Lanza `threads` intentos simultáneos; devuelve (aplicados, rechazos, latencias ms)."""
+    barrier = threading.Barrier(threads)
+
+    def attempt(i):
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            start = time.perf_counter()
+            try:
+                job_states.apply(db, name, job_id, user_ids[i % len(user_ids)])
+                applied = True
+            except job_states.JobTransitionError:
+                applied = False
+            return applied, (time.perf_counter() - start) * 1000.0
+        finally:
+            db.close()
+
+    results = list(pool.map(attempt, range(threads)))
+    applied = sum(1 for ok, _ in results if ok)
+    return applied, len(results) - applied, [ms for _, ms in results]
+
+
+def run(threads, rounds):
+    vendor_id, contractor_id, service_id = _setup()
+    failures, accept_ms, complete_ms = [], [], []
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for round_no in range(1, rounds + 1):
+                job_id = _new_job(vendor_id, contractor_id, service_id)
+
+                applied, _, samples = _hammer(pool, threads, "accept", job_id, [vendor_id])
+                accept_ms += samples
+                if applied != 1:
+                    failures.append(f"ronda {round_no}: accept aplicado {applied} veces (esperado 1)")
+
+                _, _, samples = _hammer(pool, threads, "complete", job_id, [contractor_id, vendor_id])
+                complete_ms += samples
+                with engine.connect() as conn:
+                    final = conn.execute(text("""
+                        SELECT status, client_confirmed, vendor_confirmed FROM jobs WHERE id = :id
+                    """), {"id": job_id}).one()
+                if tuple(final) != ("completado", True, True):
+                    failures.append(f"ronda {round_no}: estado final {tuple(final)}")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM jobs WHERE service_id = :id"), {"id": service_id})
+            conn.execute(text("DELETE FROM users WHERE id IN (:v, :c)"), {"v": vendor_id, "c": contractor_id})
+
+    rows = []
+    for label, samples in (("accept", accept_ms), ("complete", complete_ms)):
+        stats = summarize(samples)
+        rows.append([label, stats["n"], f"{stats['p50']:.1f}", f"{stats['p95']:.1f}", f"{stats['p99']:.1f}"])
+    print_table(["transición", "intentos", "p50 ms", "p95 ms", "p99 ms"], rows)
+
+    if failures:
+        print("\nEstados inconsistentes:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print(f"\n{rounds} rondas con {threads} threads: estado final consistente en todas")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    raise SystemExit(run(args.threads, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
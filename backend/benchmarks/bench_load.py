@@ -0,0 +1,314 @@
+"""
+Prueba de carga con tráfico mixto sobre los datos de `seed.py`.
+
+N clientes concurrentes eligen escenarios al azar según un peso (semilla fija, así dos
+corridas piden lo mismo) durante --duration segundos:
+
+- search: /services/search con palabras del catálogo sembrado
+- service_detail: /services/{id} y sus reseñas
+- vendor_dashboard: resumen, servicios, trabajos y calificación de un vendedor
+- job_lifecycle: crear trabajo -> aceptar -> confirmar (contratador) -> confirmar (vendedor)
+- login: /users/login de un usuario sembrado
+
+Reporta n, req/s y p50/p95/p99 por endpoint (plantilla de ruta). Con --save guarda el
+resultado como JSON (ordenado, para que los cambios se vean en un diff) y con --compare
+lo contrasta con una corrida guardada: marca regresión si p95 sube o req/s baja más de
+--tolerance % y sale con código 1.
+
+    python -m backend.benchmarks.seed seed
+    python -m backend.benchmarks.bench_load --concurrency 32 --duration 30 --save backend/benchmarks/baselines/local.json
+    python -m backend.benchmarks.bench_load --compare backend/benchmarks/baselines/local.json
+
+Por defecto corre la app en proceso (httpx + ASGI); con --base-url ataca un servidor
+real que use la misma base y la misma AUTH_SECRET_KEY (los tokens de job_lifecycle se
+firman aquí, sin pasar por /users/login; ese servidor debería correr con
+RATE_LIMIT_ENABLED=0, porque todo el tráfico sale de una IP). Requiere `httpx` (solo para benchmarks).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy.sql import text
+
+from .. import auth
+from ..database import engine
+from .bench_search import WORDS
+from .common import summarize, print_table
+from .seed import BENCH_DOMAIN, BENCH_PASSWORD
+
+SCENARIO_WEIGHTS = {
+    "search": 40,
+    "service_detail": 25,
+    "vendor_dashboard": 15,
+    "job_lifecycle": 10,
+    "login": 10,
+}
+
+# Cuántos ids de cada tipo se cargan de la base para elegir al azar
+SAMPLE_SIZE = 2000
+
+
+class Fixtures:
+    """Ids de los datos sembrados."""
+
+    def __init__(self):
+        with engine.connect() as conn:
+            def sample(sql):
+                return [row[0] for row in conn.execute(text(sql), {"email": f"%@{BENCH_DOMAIN}", "n": SAMPLE_SIZE})]
+
+            self.vendors = sample("""
+                SELECT id FROM users WHERE email LIKE :email AND role = 'vendedor' ORDER BY random() LIMIT :n
+            """)
+            self.contractor_emails = sample("""
+                SELECT email FROM users WHERE email LIKE :email AND role = 'contratador' ORDER BY random() LIMIT :n
+            """)
+            self.contractors = sample("""
+                SELECT id FROM users WHERE email LIKE :email AND role = 'contratador' ORDER BY random() LIMIT :n
+            """)
+            self.services = [tuple(row) for row in conn.execute(text("""
+                SELECT s.id, s.vendor_id FROM services s
+                JOIN users u ON u.id = s.vendor_id
+                WHERE u.email LIKE :email AND s.is_active
+                ORDER BY random() LIMIT :n
+            """), {"email": f"%@{BENCH_DOMAIN}", "n": SAMPLE_SIZE})]
+        if not (self.vendors and self.contractors and self.services):
+            raise SystemExit("No hay datos sembrados; corre antes `python -m backend.benchmarks.seed seed`")
+        # Ids y emails se ordenan para que la semilla elija lo mismo en cada corrida
+        self.vendors.sort()
+        self.contractors.sort()
+        self.contractor_emails.sort()
+        self.services.sort()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    async def call(self, client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if response.status_code >= 400:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        self.samples.setdefault(name, []).append(elapsed)
+        return response
+
+
+# --- Escenarios ---
+async def search(client, rec, fx, rng):
+    query = " ".join(rng.sample(WORDS, rng.choice((1, 2))))
+    await rec.call(client, "GET /services/search", "GET", "/services/search", params={"query": query})
+
+
+async def service_detail(client, rec, fx, rng):
+    service_id, _ = rng.choice(fx.services)
+    await rec.call(client, "GET /services/{service_id}", "GET", f"/services/{service_id}")
+    await rec.call(client, "GET /reviews/service/{service_id}", "GET", f"/reviews/service/{service_id}")
+
+
+async def vendor_dashboard(client, rec, fx, rng):
+    vendor_id = rng.choice(fx.vendors)
+    await rec.call(client, "GET /users/{user_id}/dashboard", "GET", f"/users/{vendor_id}/dashboard")
+    await rec.call(client, "GET /services/vendor/{vendor_id}", "GET", f"/services/vendor/{vendor_id}")
+    await rec.call(client, "GET /jobs/vendor/{vendor_id}", "GET", f"/jobs/vendor/{vendor_id}")
+    await rec.call(client, "GET /users/{user_id}/rating", "GET", f"/users/{vendor_id}/rating")
+
+
+def _bearer(user_id, role):
+    return {"Authorization": f"Bearer {auth.issue_token(user_id, role)['access_token']}"}
+
+
+async def job_lifecycle(client, rec, fx, rng):
+    service_id, vendor_id = rng.choice(fx.services)
+    contractor_id = rng.choice(fx.contractors)
+    headers = {contractor_id: _bearer(contractor_id, "contratador"), vendor_id: _bearer(vendor_id, "vendedor")}
+    created = await rec.call(client, "POST /jobs/", "POST", "/jobs/", headers=headers[contractor_id], json={
+        "contractor_id": contractor_id,
+        "vendor_id": vendor_id,
+        "service_id": service_id,
+        "start_date": date.today().isoformat(),
+    })
+    if created is None:
+        return
+    job_id = created.json()["id"]
+    if await rec.call(client, "PUT /jobs/{job_id}/accept", "PUT", f"/jobs/{job_id}/accept",
+                      headers=headers[vendor_id]) is None:
+        return
+    for user_id in (contractor_id, vendor_id):
+        await rec.call(client, "PUT /jobs/{job_id}/complete", "PUT", f"/jobs/{job_id}/complete",
+                       headers=headers[user_id])
+
+
+async def login(client, rec, fx, rng):
+    email = rng.choice(fx.contractor_emails)
+    await rec.call(client, "POST /users/login", "POST", "/users/login",
+                   json={"email": email, "password": BENCH_PASSWORD})
+
+
+SCENARIOS = {
+    "search": search,
+    "service_detail": service_detail,
+    "vendor_dashboard": vendor_dashboard,
+    "job_lifecycle": job_lifecycle,
+    "login": login,
+}
+
+
+async def drive(client, fixtures, concurrency, duration, seed, weights):
+    rec = Recorder()
+    names = list(weights)
+    stop_at = time.perf_counter() + duration
+
+    async def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < stop_at:
+            scenario = rng.choices(names, weights=[weights[n] for n in names])[0]
+            await SCENARIOS[scenario](client, rec, fixtures, rng)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return rec
+
+
+# --- Resultados ---
+def build_result(rec, args):
+    endpoints = {}
+    for name in sorted(set(rec.samples) | set(rec.errors)):
+        stats = summarize(rec.samples.get(name, []))
+        endpoints[name] = {
+            "n": stats["n"],
+            "rps": round(stats["n"] / args.duration, 2),
+            "p50": round(stats["p50"], 2),
+            "p95": round(stats["p95"], 2),
+            "p99": round(stats["p99"], 2),
+            "errors": rec.errors.get(name, 0),
+        }
+    return {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+            "weights": SCENARIO_WEIGHTS,
+            "target": args.base_url or "in-process",
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "recorded_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "endpoints": endpoints,
+    }
+
+
+def print_result(result):
+    rows = [
+        [name, e["n"], f"{e['rps']:.1f}", f"{e['p50']:.1f}", f"{e['p95']:.1f}", f"{e['p99']:.1f}", e["errors"]]
+        for name, e in result["endpoints"].items()
+    ]
+    total = sum(e["n"] for e in result["endpoints"].values())
+    print_table(["endpoint", "n", "req/s", "p50 ms", "p95 ms", "p99 ms", "errores"], rows)
+    print(f"\nTotal: {total} requests, {total / result['config']['duration']:.1f} req/s")
+
+
+def _delta(current, previous):
+    if not previous:
+        return 0.0
+    return (current - previous) / previous * 100.0
+
+
+def compare(result, baseline, tolerance):
+    """Imprime la comparación contra una corrida guardada; devuelve la lista de regresiones."""
+    rows, regressions = [], []
+    for name in sorted(set(result["endpoints"]) | set(baseline["endpoints"])):
+        now, before = result["endpoints"].get(name), baseline["endpoints"].get(name)
+        if now is None or before is None:
+            rows.append([name, "-", "-", "-", "solo en " + ("la base" if now is None else "esta corrida")])
+            continue
+        p95_delta = _delta(now["p95"], before["p95"])
+        rps_delta = _delta(now["rps"], before["rps"])
+        flags = []
+        if p95_delta > tolerance:
+            flags.append("p95")
+        if -rps_delta > tolerance:
+            flags.append("req/s")
+        if now["errors"] > before["errors"]:
+            flags.append("errores")
+        if flags:
+            regressions.append(name)
+        rows.append([
+            name,
+            f"{before['p95']:.1f} -> {now['p95']:.1f} ({p95_delta:+.0f} %)",
+            f"{before['rps']:.1f} -> {now['rps']:.1f} ({rps_delta:+.0f} %)",
+            f"{before['errors']} -> {now['errors']}",
+            "REGRESIÓN: " + ", ".join(flags) if flags else "ok",
+        ])
+    print()
+    print_table(["endpoint", "p95 ms", "req/s", "errores", "resultado"], rows)
+    return regressions
+
+
+async def run(args):
+    import httpx
+
+    fixtures = Fixtures()
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from ..main import app
+        from .. import ratelimit
+
+        # Todo el tráfico sale de una IP: sin --rate-limits se mide la app, no los límites
+        ratelimit.RATE_LIMIT_ENABLED = args.rate_limits
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    async with client:
+        # Calentamiento: pools, cachés y catálogo de skills
+        await drive(client, fixtures, min(args.concurrency, 4), args.warmup, args.seed + 1, SCENARIO_WEIGHTS)
+        rec = await drive(client, fixtures, args.concurrency, args.duration, args.seed, SCENARIO_WEIGHTS)
+    return build_result(rec, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Servidor a medir; por defecto la app en proceso")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos de medición")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Segundos de calentamiento (no se miden)")
+    parser.add_argument("--seed", type=int, default=1, help="Semilla del generador de tráfico")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="En proceso, aplicar los límites por cliente de ratelimit.py (por defecto apagados)")
+    parser.add_argument("--save", default=None, help="Guardar el resultado como JSON en esta ruta")
+    parser.add_argument("--compare", default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Margen en %% antes de marcar regresión")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_result(result)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nGuardado en {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark de tráfico mixto: logins (argon2) + navegación.
+
+Mide la latencia de endpoints de lectura con y sin una ráfaga concurrente de logins,
+para comprobar que el hashing no deja sin threads al resto de la API. Por defecto
+corre la app en proceso (httpx + ASGI); con --base-url ataca un servidor real.
+
+    python -m backend.benchmarks.bench_login --logins 32 --browsers 16 --duration 10
+
+Requiere `httpx` (solo para benchmarks).
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from .common import summarize, print_table
+
+BROWSE_PATHS = ["/skills/", "/services/search?query=clases", "/services/"]
+
+
+async def _worker(client, stop_at, samples, errors, make_request):
+    while time.perf_counter() < stop_at:
+        name, request = make_request()
+        start = time.perf_counter()
+        try:
+            response = await request(client)
+            ok = response.status_code < 500
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if ok:
+            samples.setdefault(name, []).append(elapsed)
+        else:
+            errors[name] = errors.get(name, 0) + 1
+
+
+async def _phase(client, duration, logins, browsers, email, password):
+    samples, errors = {}, {}
+    stop_at = time.perf_counter() + duration
+    counter = iter(range(10 ** 9))
+
+    def browse():
+        path = BROWSE_PATHS[next(counter) % len(BROWSE_PATHS)]
+        return "browse", lambda c: c.get(path)
+
+    def login():
+        return "login", lambda c: c.post("/users/login", json={"email": email, "password": password})
+
+    tasks = [_worker(client, stop_at, samples, errors, browse) for _ in range(browsers)]
+    tasks += [_worker(client, stop_at, samples, errors, login) for _ in range(logins)]
+    await asyncio.gather(*tasks)
+    return samples, errors
+
+
+async def run(args):
+    import httpx
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from ..main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    email = f"bench-login-{uuid.uuid4().hex[:8]}@example.com"
+    password = "bench-password"
+    async with client:
+        created = await client.post("/users/", json={
+            "name": "bench", "email": email, "password": password, "role": "contratador",
+        })
+        created.raise_for_status()
+
+        rows = []
+        for label, logins in (("solo navegación", 0), ("navegación + logins", args.logins)):
+            samples, errors = await _phase(client, args.duration, logins, args.browsers, email, password)
+            for name in sorted(set(samples) | set(errors)):
+                stats = summarize(samples.get(name, []))
+                rows.append([
+                    label, name, stats["n"], f"{stats['n'] / args.duration:.1f}",
+                    f"{stats['p50']:.1f}", f"{stats['p95']:.1f}", f"{stats['p99']:.1f}",
+                    errors.get(name, 0),
+                ])
+
+    print_table(["fase", "endpoint", "n", "req/s", "p50 ms", "p95 ms", "p99 ms", "5xx"], rows)
+    print(f"\nUsuario de prueba creado: {email} (bórralo si no usas una base desechable)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Servidor a medir; por defecto la app en proceso")
+    parser.add_argument("--logins", type=int, default=32, help="Clientes haciendo login en bucle")
+    parser.add_argument("--browsers", type=int, default=16, help="Clientes navegando en bucle")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por fase")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de /services/search: latencia vs tamaño del catálogo.
+
+Compara la consulta anterior (to_tsvector calculado por fila) contra la ruta que usa
+`services.search_vector` y su índice GIN. Todos los datos se insertan dentro de una
+transacción que se revierte al final, así que la base queda intacta.
+
+    python -m backend.benchmarks.bench_search --sizes 1000 10000 50000
+"""
+import argparse
+
+from sqlalchemy.sql import text
+
+from ..database import engine
+from .. import search
+from .common import measure, summarize, print_table
+
+LEGACY_VECTOR = "to_tsvector('spanish', COALESCE(s.title,'') || ' ' || COALESCE(s.description,''))"
+
+WORDS = [
+    "plomería", "tuberías", "electricidad", "cableado", "pintura", "jardinería",
+    "limpieza", "carpintería", "mudanza", "reparación", "instalación", "diseño",
+    "clases", "matemáticas", "fotografía", "eventos", "cocina", "mecánica",
+]
+
+QUERIES = ["reparación de tuberías", "clases de matemáticas", "pintura", "mecánica eventos"]
+
+
+def seed_services(conn, vendor_id, skill_id, start, count):
+    """Inserta `count` servicios sintéticos (el trigger rellena search_vector)."""
+    conn.execute(text("""
+        INSERT INTO services (vendor_id, skill_id, title, description, price, is_active, created_at)
+        SELECT
+            :vendor_id,
+            :skill_id,
+            (:words)[1 + (g % :n_words)] || ' ' || (:words)[1 + ((g / 7) % :n_words)] || ' #' || g,
+            'Servicio de ' || (:words)[1 + ((g / 3) % :n_words)] || ' y '
+                || (:words)[1 + ((g / 11) % :n_words)] || ' con experiencia',
+            10 + (g % 500),
+            TRUE,
+            NOW() - (g || ' minutes')::interval
+        FROM generate_series(:start, :stop) AS g
+    """), {
+        "vendor_id": vendor_id,
+        "skill_id": skill_id,
+        "words": WORDS,
+        "n_words": len(WORDS),
+        "start": start,
+        "stop": start + count - 1,
+    })
+
+
+def run(sizes, iterations):
+    rows = []
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            vendor_id = conn.execute(text("""
+                INSERT INTO users (name, email, password_hash, role)
+                VALUES ('bench', 'bench-search@example.invalid', 'x', 'vendedor')
+                RETURNING id
+            """)).scalar_one()
+            skill_id = conn.execute(text("""
+                INSERT INTO skills (name) VALUES ('bench-search') RETURNING id
+            """)).scalar_one()
+
+            seeded = 0
+            for size in sorted(sizes):
+                seed_services(conn, vendor_id, skill_id, seeded, size - seeded)
+                seeded = size
+                conn.execute(text("ANALYZE services"))
+
+                for label, sort_by in (("texto", "relevance"), ("vacío", "relevance"), ("texto+precio", "price_asc")):
+                    query = "" if label == "vacío" else None
+                    for variant in ("legacy", "indexed"):
+                        def call(i=[0]):
+                            q = query if query is not None else QUERIES[i[0] % len(QUERIES)]
+                            i[0] += 1
+                            sql, params, _ = search.build_search_sql(query=q, sort_by=sort_by)
+                            if variant == "legacy":
+                                sql = sql.replace("s.search_vector", LEGACY_VECTOR)
+                            conn.execute(text(sql), params).fetchall()
+
+                        stats = summarize(measure(call, iterations))
+                        rows.append([
+                            size, label, variant,
+                            f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['p99']:.2f}",
+                        ])
+        finally:
+            trans.rollback()
+
+    print_table(["servicios", "consulta", "ruta", "p50 ms", "p95 ms", "p99 ms"], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+    run(args.sizes, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
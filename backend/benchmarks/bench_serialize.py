@@ -0,0 +1,127 @@
+"""
+Benchmark de serialización de listas de servicios.
+
+Compara, sobre filas sintéticas con la forma de `service_rows.SERVICE_COLUMNS`:
+
+- "pydantic": el camino anterior (dict por fila + validación de list[ServiceOut] +
+  dump_json), que es lo que hacía FastAPI con el response_model.
+- "service_rows": `service_rows.dump_services`, directo de las filas a bytes.
+
+Verifica que ambos produzcan el mismo JSON antes de medir. No toca la base.
+
+    python -m backend.benchmarks.bench_serialize --rows 100 1000 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+
+from .. import schemas, service_rows
+from ..skill_registry import SkillSnapshot, registry
+from .common import measure, summarize, print_table
+
+SKILL_COUNT = 20
+
+
+def install_skills():
+    """Foto sintética del catálogo para no depender de la base."""
+    skills = tuple(
+        schemas.SkillOut(id=i, name=f"Skill {i}", description=f"Descripción {i}") for i in range(1, SKILL_COUNT + 1)
+    )
+    registry._snapshot = SkillSnapshot(
+        skills=skills, by_id={s.id: s for s in skills}, version=1, loaded_at=time.monotonic()
+    )
+
+
+def make_rows(count):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(1, count + 1):
+        vendor_id = i % 500 + 1
+        rows.append({
+            "id": i,
+            "vendor_id": vendor_id,
+            "skill_id": i % SKILL_COUNT + 1,
+            "title": f"Servicio {i}",
+            "description": "Reparación e instalación a domicilio " * 3,
+            "price": Decimal(f"{100 + i % 900}.50"),
+            "is_active": True,
+            "created_at": base + timedelta(minutes=i),
+            "image_url": None,
+            "avg_rating_calc": Decimal("4.25"),
+            "review_count": i % 40,
+            "vendor_id_sel": vendor_id,
+            "vendor_name": f"Vendedor {vendor_id}",
+            "vendor_email": f"vendedor{vendor_id}@example.com",
+            "vendor_phone": "5555-0000",
+            "vendor_role": "vendor",
+            "vendor_profile_picture_url": None,
+            "vendor_location": "Guatemala",
+            "vendor_bio": None,
+            "vendor_created_at": base,
+            "vendor_updated_at": base,
+            "vendor_latitude": 14.6349,
+            "vendor_longitude": -90.5069,
+        })
+    return rows
+
+
+ADAPTER = TypeAdapter(list[schemas.ServiceOut])
+
+
+def legacy_dump(rows):
+    services = []
+    for row in rows:
+        services.append({
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "price": float(row["price"]),
+            "is_active": row["is_active"],
+            "created_at": row["created_at"],
+            "image_url": row["image_url"],
+            "avg_rating": float(row["avg_rating_calc"]),
+            "review_count": row["review_count"],
+            "vendor": {
+                "id": row["vendor_id_sel"],
+                "name": row["vendor_name"],
+                "email": row["vendor_email"],
+                "phone": row["vendor_phone"],
+                "role": row["vendor_role"],
+                "profile_picture_url": row["vendor_profile_picture_url"],
+                "location": row["vendor_location"],
+                "bio": row["vendor_bio"],
+                "created_at": row["vendor_created_at"],
+                "updated_at": row["vendor_updated_at"],
+            },
+            "skill": registry.resolve(row["skill_id"]),
+        })
+    return ADAPTER.dump_json(ADAPTER.validate_python(services, from_attributes=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    install_skills()
+    table = []
+    for count in args.rows:
+        rows = make_rows(count)
+        legacy, fast = legacy_dump(rows), service_rows.dump_services(rows)
+        if json.loads(legacy) != json.loads(fast):
+            raise SystemExit(f"El JSON de service_rows difiere del de Pydantic con {count} filas")
+
+        for name, fn in (("pydantic", legacy_dump), ("service_rows", service_rows.dump_services)):
+            stats = summarize(measure(lambda: fn(rows), args.iterations))
+            table.append([count, name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{count / stats['p50'] * 1000:,.0f}"])
+
+    print_table(["filas", "serializador", "p50 ms", "p95 ms", "filas/s (p50)"], table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Los benchmarks se ejecutan como módulos desde la raíz del repo, p.ej.:
+
+    python -m backend.benchmarks.bench_search --sizes 1000 10000 50000
+"""
+import statistics
+import time
+
+
+def percentile(samples, pct):
+    """Percentil por rango más cercano sobre una lista de muestras."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(fn, iterations, warmup=3):
+    """Ejecuta `fn` varias veces y devuelve las latencias en milisegundos."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def summarize(samples):
+    """Resumen p50/p95/p99/media (ms) de una lista de latencias."""
+    return {
+        "n": len(samples),
+        "mean": statistics.fmean(samples) if samples else 0.0,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+    }
+
+
+def print_table(headers, rows):
+    """Imprime una tabla de texto simple alineada por columnas."""
+    widths = [len(h) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+    line = "  ".join(h.ljust(widths[i]) for i, h in enumerate(headers))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(cell).ljust(widths[i]) for i, cell in enumerate(row)))
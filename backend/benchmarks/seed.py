@@ -0,0 +1,196 @@
+"""
+Datos sintéticos para los benchmarks de carga (ver bench_load.py).
+
+Inserta usuarios (vendedores y contratadores), skills, servicios, trabajos, pagos y
+reseñas con la forma de `models.py`, todo con SQL set-based (generate_series), y
+reconstruye los resúmenes de calificaciones. Todo lo sembrado queda marcado: emails en
+`@bench.invalid` y skills con prefijo `bench-`, así `clear` lo borra sin tocar el resto.
+Usar una base local o desechable.
+
+    python -m backend.benchmarks.seed seed --vendors 500 --contractors 2000 --services 20000 --jobs 50000
+    python -m backend.benchmarks.seed clear
+
+Todos los usuarios sembrados tienen la contraseña BENCH_PASSWORD.
+"""
+import argparse
+import time
+
+from sqlalchemy.sql import text
+
+from .. import hashing, ratings
+from ..database import SessionLocal
+from .bench_search import WORDS
+
+BENCH_DOMAIN = "bench.invalid"
+BENCH_SKILL_PREFIX = "bench-"
+BENCH_PASSWORD = "bench-password"
+
+# Reparto de estados de los trabajos sembrados, sobre g % 10
+_JOB_STATUS = """
+    CASE
+        WHEN g % 10 < 6 THEN 'completado'
+        WHEN g % 10 < 8 THEN 'en_progreso'
+        WHEN g % 10 < 9 THEN 'pendiente'
+        ELSE 'cancelado'
+    END
+"""
+
+
+def _ids(db, sql, params):
+    return [row[0] for row in db.execute(text(sql), params)]
+
+
+def seed(db, vendors, contractors, skills, services, jobs, reviews):
+    """Inserta los datos y devuelve cuántas filas se crearon por tabla. Hace commit."""
+    password_hash = hashing.hash_password(BENCH_PASSWORD)
+    batch = int(time.time())  # permite sembrar varias veces sin chocar emails/nombres únicos
+
+    def users(role, count):
+        return _ids(db, f"""
+            INSERT INTO users (name, email, password_hash, role, location, created_at, updated_at)
+            SELECT
+                '{role} ' || g,
+                '{role}-{batch}-' || g || '@{BENCH_DOMAIN}',
+                :password_hash,
+                '{role}',
+                (ARRAY['Guatemala', 'Mixco', 'Antigua', 'Quetzaltenango'])[1 + g % 4],
+                NOW() - (g || ' minutes')::interval,
+                NOW()
+            FROM generate_series(1, :count) AS g
+            RETURNING id
+        """, {"password_hash": password_hash, "count": count})
+
+    vendor_ids = users("vendedor", vendors)
+    contractor_ids = users("contratador", contractors)
+
+    skill_ids = _ids(db, f"""
+        INSERT INTO skills (name, description)
+        SELECT '{BENCH_SKILL_PREFIX}{batch}-' || g, 'Skill sintética ' || g
+        FROM generate_series(1, :count) AS g
+        RETURNING id
+    """, {"count": skills})
+    db.execute(text("""
+        INSERT INTO user_skills (user_id, skill_id)
+        SELECT v.id, (:skill_ids)[1 + (v.id % :n_skills)]
+        FROM unnest(CAST(:vendor_ids AS int[])) AS v(id)
+        ON CONFLICT DO NOTHING
+    """), {"vendor_ids": vendor_ids, "skill_ids": skill_ids, "n_skills": len(skill_ids)})
+
+    # El trigger de services rellena search_vector
+    service_ids = _ids(db, """
+        INSERT INTO services (vendor_id, skill_id, title, description, price, is_active, created_at)
+        SELECT
+            (:vendor_ids)[1 + g % :n_vendors],
+            (:skill_ids)[1 + g % :n_skills],
+            (:words)[1 + (g % :n_words)] || ' ' || (:words)[1 + ((g / 7) % :n_words)] || ' #' || g,
+            'Servicio de ' || (:words)[1 + ((g / 3) % :n_words)] || ' y '
+                || (:words)[1 + ((g / 11) % :n_words)] || ' con experiencia',
+            10 + (g % 500),
+            g % 20 <> 0,
+            NOW() - (g || ' minutes')::interval
+        FROM generate_series(1, :count) AS g
+        RETURNING id
+    """, {
+        "vendor_ids": vendor_ids, "n_vendors": len(vendor_ids),
+        "skill_ids": skill_ids, "n_skills": len(skill_ids),
+        "words": WORDS, "n_words": len(WORDS), "count": services,
+    })
+
+    job_ids = _ids(db, f"""
+        INSERT INTO jobs (contractor_id, vendor_id, service_id, status, start_date, end_date,
+                          total_amount, client_confirmed, vendor_confirmed, created_at)
+        SELECT
+            (:contractor_ids)[1 + g % :n_contractors],
+            s.vendor_id,
+            s.id,
+            t.status,
+            CURRENT_DATE - (g % 365),
+            CURRENT_DATE - (g % 365) + 7,
+            s.price,
+            t.status = 'completado',
+            t.status = 'completado',
+            NOW() - (g || ' minutes')::interval
+        FROM generate_series(1, :count) AS g
+        JOIN services s ON s.id = (:service_ids)[1 + (g * 7) % :n_services]
+        CROSS JOIN LATERAL (SELECT {_JOB_STATUS} AS status) t
+        RETURNING id
+    """, {
+        "contractor_ids": contractor_ids, "n_contractors": len(contractor_ids),
+        "service_ids": service_ids, "n_services": len(service_ids), "count": jobs,
+    })
+
+    payments = db.execute(text("""
+        INSERT INTO payments (job_id, amount, method, status, created_at)
+        SELECT j.id, j.total_amount, (ARRAY['tarjeta', 'transferencia', 'efectivo'])[1 + j.id % 3],
+               CASE WHEN j.status = 'completado' THEN 'pagado' ELSE 'pendiente' END, j.created_at
+        FROM jobs j
+        WHERE j.id = ANY(:job_ids) AND j.status IN ('completado', 'en_progreso')
+    """), {"job_ids": job_ids}).rowcount
+
+    review_count = db.execute(text("""
+        INSERT INTO reviews (job_id, rating, comment, created_at)
+        SELECT j.id, 1 + (j.id * 31) % 5, 'Reseña sintética del trabajo ' || j.id, j.created_at + interval '8 days'
+        FROM jobs j
+        WHERE j.id = ANY(:job_ids) AND j.status = 'completado'
+        ORDER BY j.id
+        LIMIT :count
+    """), {"job_ids": job_ids, "count": reviews}).rowcount
+
+    db.commit()
+    ratings.rebuild(db)
+    for table in ("users", "skills", "user_skills", "services", "jobs", "payments", "reviews"):
+        db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+    return {
+        "users": len(vendor_ids) + len(contractor_ids),
+        "skills": len(skill_ids),
+        "services": len(service_ids),
+        "jobs": len(job_ids),
+        "payments": payments,
+        "reviews": review_count,
+    }
+
+
+def clear(db):
+    """Borra todo lo sembrado (y lo que crearon los benchmarks con esos usuarios). Hace commit."""
+    params = {"email": f"%@{BENCH_DOMAIN}", "skill": f"{BENCH_SKILL_PREFIX}%"}
+    bench_users = "SELECT id FROM users WHERE email LIKE :email"
+    # Trabajos primero: jobs.service_id no tiene ON DELETE CASCADE
+    jobs = db.execute(text(f"""
+        DELETE FROM jobs WHERE contractor_id IN ({bench_users}) OR vendor_id IN ({bench_users})
+    """), params).rowcount
+    users = db.execute(text("DELETE FROM users WHERE email LIKE :email"), params).rowcount
+    skills = db.execute(text("DELETE FROM skills WHERE name LIKE :skill"), params).rowcount
+    db.commit()
+    ratings.rebuild(db)
+    return {"users": users, "skills": skills, "jobs": jobs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["seed", "clear"])
+    parser.add_argument("--vendors", type=int, default=200)
+    parser.add_argument("--contractors", type=int, default=1000)
+    parser.add_argument("--skills", type=int, default=30)
+    parser.add_argument("--services", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--reviews", type=int, default=10000, help="Máximo; solo trabajos completados")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        if args.command == "seed":
+            counts = seed(db, args.vendors, args.contractors, args.skills, args.services, args.jobs, args.reviews)
+        else:
+            counts = clear(db)
+        for table, count in counts.items():
+            print(f"{table}: {count} filas")
+        print(f"({time.perf_counter() - start:.1f} s)")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
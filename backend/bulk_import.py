@@ -0,0 +1,450 @@
+"""
+Carga masiva de servicios, usuarios y trabajos desde NDJSON o CSV.
+
+Cada fila se valida con el schema de creación de siempre (`ServiceCreate`,
+`UserCreate`, `JobCreate`). Las válidas se juntan en lotes de IMPORT_CHUNK_SIZE y
+cada lote, en su propia transacción y dentro de un SAVEPOINT:
+
+1. se copia a una tabla temporal con COPY (psycopg2) o con executemany en otro driver,
+2. se rechazan las filas que la base no aceptaría (FK inexistente, email repetido,
+   largo de columna, estado inválido), cada una con su número de línea,
+3. se insertan las demás con un solo INSERT ... SELECT.
+
+Si la base rechaza el lote de todos modos (p.ej. un vendedor borrado entre el chequeo
+y el INSERT, o un valor que el chequeo no contempla), se vuelve al SAVEPOINT y el lote
+se carga fila por fila, cada una en su SAVEPOINT, para perder solo las que fallan.
+
+Un error en una fila no aborta el resto: la respuesta trae cuántas filas se
+insertaron y la lista de errores por línea (hasta IMPORT_MAX_ERRORS). Toda fila que
+no se insertó tiene su error con número de línea.
+"""
+import csv
+import io
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from . import cache, hashing, schemas, suggest
+
+load_dotenv()
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE") or 1000)
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS") or 1000)
+
+STAGING = "_import_staging"
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    schema: type
+    # (columna, tipo) de la tabla temporal, sin line_no
+    columns: Tuple[Tuple[str, str], ...]
+    # SELECT line_no, motivo FROM _import_staging ... de las filas que no entran;
+    # recibe :trusted (importa un administrador, ver Importer)
+    rejects_sql: str
+    insert_sql: str
+    to_row: Callable[[BaseModel], tuple]
+    # Namespaces de cache.py a invalidar si se insertó algo
+    invalidates: Tuple[str, ...] = ()
+    # Preparación por lote (p.ej. hash de contraseñas), sobre los modelos validados
+    prepare: Optional[Callable[[list], list]] = None
+    # Si insert_sql descarta filas en silencio (ON CONFLICT DO NOTHING), devuelve con
+    # RETURNING esta columna de la tabla temporal para saber qué líneas se perdieron
+    returning_key: Optional[str] = None
+    lost_error: str = "La fila no se insertó"
+
+
+def _too_long(column: str, size: int, label: str) -> str:
+    return f"SELECT line_no, '{label} supera {size} caracteres' FROM {STAGING} WHERE length({column}) > {size}"
+
+
+SERVICES = ImportSpec(
+    schema=schemas.ServiceCreate,
+    columns=(
+        ("vendor_id", "int"), ("skill_id", "int"), ("title", "text"), ("description", "text"),
+        ("price", "numeric"), ("is_active", "boolean"), ("image_url", "text"),
+    ),
+    rejects_sql=f"""
+        SELECT line_no, 'El vendedor no existe' FROM {STAGING} st
+        WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = st.vendor_id)
+        UNION ALL
+        SELECT line_no, 'La skill no existe' FROM {STAGING} st
+        WHERE NOT EXISTS (SELECT 1 FROM skills sk WHERE sk.id = st.skill_id)
+        UNION ALL
+        {_too_long("title", 100, "El título")}
+        UNION ALL
+        SELECT line_no, 'Precio fuera de rango' FROM {STAGING} WHERE abs(price) >= 1e8
+    """,
+    insert_sql=f"""
+        INSERT INTO services (vendor_id, skill_id, title, description, price, is_active, image_url, created_at)
+        SELECT vendor_id, skill_id, title, description, price, COALESCE(is_active, TRUE), image_url,
+               NOW() AT TIME ZONE 'utc'
+        FROM {STAGING}
+        ORDER BY line_no
+    """,
+    to_row=lambda s: (s.vendor_id, s.skill_id, s.title, s.description, s.price, s.is_active, s.image_url),
+    invalidates=("services",),
+)
+
+
+def _hash_passwords(users: list) -> list:
+    hashes = hashing.executor.map_waiting(hashing.hash_password, [u.password for u in users])
+    return list(zip(users, hashes))
+
+
+USERS = ImportSpec(
+    schema=schemas.UserCreate,
+    columns=(
+        ("name", "text"), ("email", "text"), ("password_hash", "text"), ("phone", "text"), ("role", "text"),
+        ("profile_picture_url", "text"), ("location", "text"), ("bio", "text"),
+    ),
+    rejects_sql=f"""
+        SELECT line_no, 'El email ya está registrado' FROM {STAGING} st
+        WHERE EXISTS (SELECT 1 FROM users u WHERE u.email = st.email)
+        UNION ALL
+        SELECT line_no, 'Email repetido en el archivo' FROM (
+            SELECT line_no, row_number() OVER (PARTITION BY email ORDER BY line_no) AS n FROM {STAGING}
+        ) dup WHERE n > 1
+        UNION ALL
+        SELECT line_no, 'Rol inválido: debe ser vendedor o contratador' FROM {STAGING}
+        WHERE role NOT IN ('vendedor', 'contratador')
+        UNION ALL
+        {_too_long("name", 100, "El nombre")}
+        UNION ALL
+        {_too_long("email", 100, "El email")}
+        UNION ALL
+        {_too_long("phone", 20, "El teléfono")}
+        UNION ALL
+        {_too_long("location", 200, "La ubicación")}
+    """,
+    insert_sql=f"""
+        INSERT INTO users (name, email, password_hash, phone, role, profile_picture_url, location, bio,
+                           created_at, updated_at)
+        SELECT name, email, password_hash, phone, role, profile_picture_url, location, bio,
+               NOW() AT TIME ZONE 'utc', NOW() AT TIME ZONE 'utc'
+        FROM {STAGING}
+        ORDER BY line_no
+        ON CONFLICT (email) DO NOTHING
+        RETURNING email
+    """,
+    to_row=lambda pair: (
+        pair[0].name, pair[0].email, pair[1], pair[0].phone, pair[0].role,
+        pair[0].profile_picture_url, pair[0].location, pair[0].bio,
+    ),
+    prepare=_hash_passwords,
+    # El mismo email insertado en paralelo entre el chequeo y el INSERT
+    returning_key="email",
+    lost_error="El email ya está registrado",
+)
+
+JOBS = ImportSpec(
+    schema=schemas.JobCreate,
+    columns=(
+        ("contractor_id", "int"), ("vendor_id", "int"), ("service_id", "int"), ("status", "text"),
+        ("start_date", "date"), ("end_date", "date"), ("total_amount", "numeric"),
+    ),
+    rejects_sql=f"""
+        SELECT line_no, 'El contratador no existe' FROM {STAGING} st
+        WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = st.contractor_id)
+        UNION ALL
+        SELECT line_no, 'El contratador no tiene rol de contratador' FROM {STAGING} st
+        JOIN users u ON u.id = st.contractor_id WHERE u.role <> 'contratador'
+        UNION ALL
+        SELECT line_no, 'El vendedor no existe' FROM {STAGING} st
+        WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = st.vendor_id)
+        UNION ALL
+        SELECT line_no, 'Servicio no encontrado' FROM {STAGING} st
+        WHERE NOT EXISTS (SELECT 1 FROM services s WHERE s.id = st.service_id)
+        UNION ALL
+        -- Igual que POST /jobs/
+        SELECT line_no, 'El vendedor no corresponde al servicio' FROM {STAGING} st
+        JOIN services s ON s.id = st.service_id WHERE s.vendor_id IS DISTINCT FROM st.vendor_id
+        UNION ALL
+        SELECT line_no, 'Estado inválido' FROM {STAGING}
+        WHERE status NOT IN ('pendiente', 'en_progreso', 'completado', 'cancelado')
+        UNION ALL
+        -- Los demás estados salen de las transiciones (job_states.py); solo un
+        -- administrador puede cargar historia ya avanzada
+        SELECT line_no, 'Solo un administrador puede importar trabajos que no estén pendientes' FROM {STAGING}
+        WHERE NOT :trusted AND COALESCE(status, 'pendiente') <> 'pendiente'
+        UNION ALL
+        SELECT line_no, 'Monto fuera de rango' FROM {STAGING} WHERE abs(total_amount) >= 1e8
+    """,
+    # Igual que POST /jobs/: sin monto se usa el precio del servicio
+    insert_sql=f"""
+        INSERT INTO jobs (contractor_id, vendor_id, service_id, status, start_date, end_date, total_amount)
+        SELECT st.contractor_id, st.vendor_id, st.service_id, COALESCE(st.status, 'pendiente'),
+               st.start_date, st.end_date, COALESCE(st.total_amount, s.price)
+        FROM {STAGING} st
+        JOIN services s ON s.id = st.service_id
+        ORDER BY st.line_no
+    """,
+    to_row=lambda j: (
+        j.contractor_id, j.vendor_id, j.service_id, j.status, j.start_date, j.end_date, j.total_amount,
+    ),
+)
+
+SPECS = {"services": SERVICES, "users": USERS, "jobs": JOBS}
+
+
+# ==========================
+# Resultado
+# ==========================
+@dataclass
+class ImportResult:
+    kind: str
+    received: int = 0
+    inserted: int = 0
+    errors: List[dict] = field(default_factory=list)
+    error_count: int = 0
+    elapsed_seconds: float = 0.0
+
+    def add_error(self, line: int, error: str):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "received": self.received,
+            "inserted": self.inserted,
+            "rejected": self.error_count,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+            "errors_truncated": self.error_count > len(self.errors),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'fila'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+# ==========================
+# Carga de un lote
+# ==========================
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _stage(db: Session, spec: ImportSpec, rows: list):
+    """Copia (line_no, ...) a la tabla temporal; COPY si el driver lo permite."""
+    names = ["line_no"] + [name for name, _ in spec.columns]
+    dbapi = db.connection().connection.dbapi_connection
+    if type(dbapi).__module__.startswith("psycopg2"):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(v) for v in row])
+        buffer.seek(0)
+        copy_sql = f"COPY {STAGING} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        dbapi_error = db.get_bind().dialect.dbapi.Error
+        try:
+            with dbapi.cursor() as cursor:
+                cursor.copy_expert(copy_sql, buffer)
+        except dbapi_error as exc:
+            # Mismo tipo que los errores de db.execute, para que load_chunk los trate igual
+            raise DBAPIError.instance(copy_sql, None, exc, dbapi_error) from exc
+    else:
+        binds = ", ".join(f":{name}" for name in names)
+        db.execute(
+            text(f"INSERT INTO {STAGING} ({', '.join(names)}) VALUES ({binds})"),
+            [dict(zip(names, row)) for row in rows],
+        )
+
+
+def _db_error_message(exc: Exception) -> str:
+    detail = str(getattr(exc, "orig", None) or exc).strip().splitlines()
+    return detail[0] if detail else type(exc).__name__
+
+
+def _load_rows(db: Session, spec: ImportSpec, rows: list, trusted: bool) -> Tuple[dict, int]:
+    """Carga `rows` vía la tabla temporal; devuelve ({línea: motivo} de las que no entraron, insertadas)."""
+    columns = ", ".join(f"{name} {sqltype}" for name, sqltype in spec.columns)
+    db.execute(text(f"CREATE TEMP TABLE {STAGING} (line_no int PRIMARY KEY, {columns}) ON COMMIT DROP"))
+    _stage(db, spec, rows)
+
+    rejected = {}
+    for line, reason in db.execute(text(spec.rejects_sql), {"trusted": trusted}).all():
+        rejected.setdefault(line, reason)
+    if rejected:
+        db.execute(
+            text(f"DELETE FROM {STAGING} WHERE line_no = ANY(CAST(:lines AS int[]))"),
+            {"lines": list(rejected)},
+        )
+    if spec.returning_key:
+        returned = [key for (key,) in db.execute(text(spec.insert_sql)).all()]
+        lost = db.execute(
+            text(f"SELECT line_no FROM {STAGING} WHERE {spec.returning_key} <> ALL(:keys)"),
+            {"keys": returned},
+        ).scalars().all()
+        for line in lost:
+            rejected[line] = spec.lost_error
+        inserted = len(returned)
+    else:
+        inserted = db.execute(text(spec.insert_sql)).rowcount
+    # Libre para el próximo intento dentro de la misma transacción
+    db.execute(text(f"DROP TABLE {STAGING}"))
+    return rejected, inserted
+
+
+def load_chunk(db: Session, spec: ImportSpec, chunk: list, result: ImportResult, trusted: bool = False):
+    """Carga un lote de (line_no, modelo validado) en una transacción.
+
+    No lanza por errores de la base: las filas que no entran quedan en `result.errors`.
+    """
+    items = [model for _, model in chunk]
+    if spec.prepare:
+        items = spec.prepare(items)
+    rows = [(line, *spec.to_row(item)) for (line, _), item in zip(chunk, items)]
+
+    try:
+        try:
+            with db.begin_nested():
+                rejected, inserted = _load_rows(db, spec, rows, trusted)
+        except SQLAlchemyError:
+            # El SAVEPOINT deshizo el lote: fila por fila para aislar las que fallan
+            rejected, inserted = {}, 0
+            for row in rows:
+                try:
+                    with db.begin_nested():
+                        row_rejected, row_inserted = _load_rows(db, spec, [row], trusted)
+                except SQLAlchemyError as exc:
+                    rejected[row[0]] = f"La base rechazó la fila: {_db_error_message(exc)}"
+                    continue
+                rejected.update(row_rejected)
+                inserted += row_inserted
+        db.commit()
+    except SQLAlchemyError as exc:
+        # No se pudo confirmar (p.ej. se cayó la conexión): se pierde el lote entero
+        db.rollback()
+        message = f"No se pudo guardar el lote: {_db_error_message(exc)}"
+        rejected, inserted = {row[0]: message for row in rows}, 0
+
+    for line, reason in rejected.items():
+        result.add_error(line, reason)
+    result.inserted += inserted
+
+
+# ==========================
+# Lectura del stream
+# ==========================
+def parse_ndjson_line(line: str) -> dict:
+    value = json.loads(line)
+    if not isinstance(value, dict):
+        raise ValueError("cada línea debe ser un objeto JSON")
+    return value
+
+
+class CsvRecords:
+    """Arma registros CSV a partir de líneas sueltas (admite saltos de línea entre comillas)."""
+
+    def __init__(self):
+        self.header = None
+        self._pending = ""
+
+    def feed(self, line: str):
+        """Devuelve el registro como dict cuando está completo; None si falta texto o es el encabezado."""
+        self._pending += line
+        if self._pending.count('"') % 2:
+            return None
+        record, self._pending = self._pending, ""
+        values = next(csv.reader([record]), [])
+        if self.header is None:
+            self.header = [h.strip() for h in values]
+            return None
+        if not any(v.strip() for v in values):
+            return None
+        if len(values) != len(self.header):
+            raise ValueError(f"se esperaban {len(self.header)} columnas y llegaron {len(values)}")
+        # Celdas vacías = campo ausente (se aplica el valor por defecto del schema)
+        return {k: v for k, v in zip(self.header, values) if v != ""}
+
+
+class Importer:
+    """
+    Acumula filas de un stream y las carga por lotes.
+
+        importer = Importer(db, "services", "ndjson")
+        for line in lines:
+            importer.feed_line(line)
+        result = importer.finish()
+    """
+
+    def __init__(self, db: Session, kind: str, fmt: str = "ndjson", chunk_size: int = None, trusted: bool = False):
+        self.db = db
+        # Importa un administrador: admite trabajos en cualquier estado
+        self.trusted = trusted
+        self.spec = SPECS[kind]
+        self.fmt = fmt
+        self.chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+        self.result = ImportResult(kind=kind)
+        self._csv = CsvRecords() if fmt == "csv" else None
+        self._chunk = []
+        self._line = 0
+        self._started = time.perf_counter()
+
+    def feed_line(self, line: str) -> bool:
+        """Procesa una línea; devuelve True si el lote está lleno y hay que llamar a flush()."""
+        self._line += 1
+        if self._csv is not None:
+            try:
+                data = self._csv.feed(line)
+            except ValueError as exc:
+                self.result.received += 1
+                self.result.add_error(self._line, str(exc))
+                return False
+        else:
+            if not line.strip():
+                return False
+            try:
+                data = parse_ndjson_line(line)
+            except ValueError as exc:
+                self.result.received += 1
+                self.result.add_error(self._line, f"JSON inválido: {exc}")
+                return False
+        if data is None:
+            return False
+
+        self.result.received += 1
+        try:
+            model = self.spec.schema.model_validate(data)
+        except ValidationError as exc:
+            self.result.add_error(self._line, _validation_message(exc))
+            return False
+        self._chunk.append((self._line, model))
+        return len(self._chunk) >= self.chunk_size
+
+    def feed_lines(self, lines):
+        """Procesa un bloque de líneas cargando los lotes que se completen."""
+        for line in lines:
+            if self.feed_line(line):
+                self.flush()
+
+    def flush(self):
+        if self._chunk:
+            chunk, self._chunk = self._chunk, []
+            load_chunk(self.db, self.spec, chunk, self.result, self.trusted)
+
+    def finish(self) -> ImportResult:
+        self.flush()
+        if self.result.inserted and self.spec.invalidates:
+            cache.invalidate(*self.spec.invalidates)
+            if "services" in self.spec.invalidates:
+                suggest.index.bump()  # el autocompletado se rearma completo
+        self.result.elapsed_seconds = time.perf_counter() - self._started
+        return self.result
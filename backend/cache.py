@@ -0,0 +1,275 @@
+"""
+Cache de respuestas para las lecturas del catálogo.
+
+Las respuestas se guardan ya serializadas (bytes JSON + cabeceras relevantes) bajo
+una clave derivada de la ruta y sus parámetros. Cada clave incluye la "generación"
+de su namespace (`services`, `skills`); invalidar un namespace solo incrementa su
+generación, así que las claves viejas dejan de leerse y expiran solas por TTL.
+
+Backends (CACHE_BACKEND):
+
+- "memory" (por defecto): LRU en proceso con TTL. Solo para un único worker (desarrollo,
+  `uvicorn --reload`, WEB_CONCURRENCY=1): cada worker tendría el suyo y una invalidación
+  solo se vería en el worker que la hizo, así que los demás servirían páginas y ETag
+  viejos hasta CACHE_TTL. `serve.py` no arranca varios workers con este backend.
+- "redis": compartido entre workers (REDIS_URL). Requiere el paquete `redis`. El
+  cliente es síncrono: desde los endpoints async se llama en el threadpool, nunca en
+  el event loop.
+- "fakeredis": la misma implementación sobre `fakeredis`, para desarrollo local.
+- "none": sin cache (las respuestas igual llevan ETag).
+
+Todas las respuestas llevan ETag y `Cache-Control: no-cache`; con `If-None-Match`
+igual al ETag se responde 304 sin cuerpo.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.getenv("CACHE_TTL") or 60)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES") or 1024)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Cabeceras de la respuesta original que se guardan junto al cuerpo
+CACHED_HEADERS = ("X-Next-Cursor",)
+
+
+# ==========================
+# Backends
+# ==========================
+class MemoryBackend:
+    """LRU en proceso con TTL por entrada."""
+
+    # Sin E/S: se puede llamar desde el event loop
+    blocking = False
+    shared = False
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisBackend:
+    """Backend sobre cualquier cliente compatible con Redis (redis-py, fakeredis)."""
+
+    # Cada llamada es un round trip a Redis
+    blocking = True
+
+    def __init__(self, client, prefix: str = "respcache:", shared: bool = True):
+        self.client = client
+        self.prefix = prefix
+        # fakeredis vive en el proceso: no se comparte entre workers
+        self.shared = shared
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def get_counter(self, name):
+        value = self.client.get(self.prefix + "gen:" + name)
+        return int(value) if value is not None else 0
+
+    def incr(self, name):
+        return self.client.incr(self.prefix + "gen:" + name)
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class NullBackend:
+    blocking = False
+    shared = True  # nada que invalidar
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def get_counter(self, name):
+        return 0
+
+    def incr(self, name):
+        return 0
+
+    def clear(self):
+        pass
+
+
+def make_backend(kind: str = CACHE_BACKEND):
+    if kind == "none":
+        return NullBackend()
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requiere el paquete 'redis'")
+        return RedisBackend(redis.Redis.from_url(REDIS_URL))
+    if kind == "fakeredis":
+        try:
+            import fakeredis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=fakeredis requiere el paquete 'fakeredis'")
+        return RedisBackend(fakeredis.FakeRedis(), shared=False)
+    return MemoryBackend()
+
+
+backend = make_backend()
+
+
+def is_shared() -> bool:
+    """True si las entradas e invalidaciones se ven en todos los workers."""
+    return backend.shared
+
+
+# ==========================
+# Claves e invalidación
+# ==========================
+def cache_key(request: Request, namespace: str) -> str:
+    generation = backend.get_counter(namespace)
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{namespace}:{generation}:{request.url.path}?{params}"
+
+
+def invalidate(*namespaces: str):
+    """Invalida todas las respuestas de los namespaces dados (llamar tras el commit)."""
+    for namespace in namespaces:
+        backend.incr(namespace)
+
+
+# ==========================
+# Respuestas
+# ==========================
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _pack(body: bytes, headers: dict) -> bytes:
+    return json.dumps(headers).encode() + b"\n" + body
+
+
+def _unpack(value: bytes):
+    head, _, body = value.partition(b"\n")
+    return body, json.loads(head)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _respond(request: Request, body: bytes, headers: dict, status: str) -> Response:
+    etag = _etag(body)
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache", "X-Cache": status}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class CachedView:
+    """
+    Cachea la respuesta de un endpoint de lectura.
+
+        SERVICE_DETAIL = cache.CachedView("services", schemas.ServiceOut)
+
+        @router.get("/{service_id}")
+        async def get_service(service_id: int, request: Request, ...):
+            return await SERVICE_DETAIL.serve_async(request, lambda: build(...))
+
+    `build` devuelve los datos (o `(datos, cabeceras)`), que se validan contra el
+    schema y se serializan una sola vez; si los datos ya son bytes JSON se guardan tal
+    cual. Las HTTPException no se cachean.
+    """
+
+    def __init__(self, namespace: str, schema, ttl: int = CACHE_TTL):
+        self.namespace = namespace
+        self.adapter = TypeAdapter(schema)
+        self.ttl = ttl
+
+    def _lookup(self, request: Request):
+        key = cache_key(request, self.namespace)
+        value = backend.get(key)
+        if value is None:
+            return key, None
+        body, headers = _unpack(value)
+        return key, _respond(request, body, headers, "HIT")
+
+    def _store(self, request: Request, key: str, result) -> Response:
+        data, headers = result if isinstance(result, tuple) else (result, {})
+        headers = {k: v for k, v in headers.items() if k in CACHED_HEADERS and v}
+        if isinstance(data, bytes):
+            body = data
+        else:
+            body = self.adapter.dump_json(self.adapter.validate_python(data, from_attributes=True))
+        backend.set(key, _pack(body, headers), self.ttl)
+        return _respond(request, body, headers, "MISS")
+
+    def serve(self, request: Request, build) -> Response:
+        key, hit = self._lookup(request)
+        if hit is not None:
+            return hit
+        return self._store(request, key, build())
+
+    async def serve_async(self, request: Request, build) -> Response:
+        if not backend.blocking:
+            key, hit = self._lookup(request)
+            if hit is not None:
+                return hit
+            return self._store(request, key, await build())
+        # Cliente de Redis síncrono: fuera del event loop
+        key, hit = await run_in_threadpool(self._lookup, request)
+        if hit is not None:
+            return hit
+        result = await build()
+        return await run_in_threadpool(self._store, request, key, result)
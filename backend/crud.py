@@ -1,39 +1,39 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, text
-from sqlalchemy import func
-from . import models, schemas
+from sqlalchemy import text
+from . import models, schemas, ratings, pagination, cache, suggest, geo
+from .pagination import PageParams
 from datetime import datetime
-from passlib.context import CryptContext
+from . import hashing
+from .skill_registry import registry
 
-# Inicializa el hasher de contraseñas
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# El hasher (passlib + argon2) y su configuración viven en hashing.py
+pwd_context = hashing.pwd_context
 
 def hash_password(password: str) -> str:
     """
-    Hashea la contraseña usando passlib + argon2.
+    Hashea la contraseña usando passlib + argon2 (síncrono; los endpoints usan
+    hashing.hash_password_async para no bloquear el threadpool).
     """
-    if not isinstance(password, str):
-        raise ValueError("Password must be a string")
-    return pwd_context.hash(password)
+    return hashing.hash_password(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifica que la contraseña en texto plano coincida con el hash usando argon2.
     """
-    if not isinstance(plain_password, str):
-        raise ValueError("Password must be a string")
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verify_password(plain_password, hashed_password)
 
 # ==========================
 # Usuarios
 # ==========================
-def create_user(db: Session, user: schemas.UserCreate):
+def create_user(db: Session, user: schemas.UserCreate, password_hash: str = None):
+    """Crea el usuario; `password_hash` permite pasar el hash ya calculado fuera del request."""
     db_user = models.User(
         name=user.name,
         email=user.email,
         phone=user.phone,
         role=user.role,
-        password_hash=hash_password(user.password),
+        location=user.location,  # el trigger users_geocode completa latitude/longitude
+        password_hash=password_hash or hash_password(user.password),
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow()
     )
@@ -42,13 +42,53 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
-def get_users(db: Session):
-    return db.query(models.User).all()
+def get_users(db: Session, page: PageParams = None):
+    return pagination.paginate_query(
+        db.query(models.User), page or PageParams(), pagination.created_desc(models.User), tag="users"
+    )
+
+# Vendedores cerca de un punto, del más cercano al más lejano
+def nearby_vendors_sql(area: geo.Area, page: PageParams, skill_id: int = None):
+    """(sql, params, keyset) de vendedores dentro de `area` (con centro), por distancia."""
+    params = {}
+    distance = area.distance_sql(params, "u")
+    keyset = pagination.Keyset([pagination.Key(distance, attr="distance_km"), pagination.Key("u.id")], page,
+                               tag=area.cursor_tag("vendors:distance"))
+    keyset_sql, keyset_params = keyset.where()
+    params.update(keyset_params)
+    filters = ["u.role = 'vendedor'", area.where(params, "u"), keyset_sql]
+    if skill_id is not None:
+        filters.append("EXISTS (SELECT 1 FROM user_skills us WHERE us.user_id = u.id AND us.skill_id = :skill_id)")
+        params["skill_id"] = skill_id
+    sql = f"""
+        SELECT u.id, u.name, u.email, u.phone, u.role, u.profile_picture_url, u.location, u.bio,
+               u.created_at, u.updated_at, u.latitude, u.longitude,
+               {distance} AS distance_km
+        FROM users u
+        WHERE {" AND ".join(filters)}
+        ORDER BY {keyset.order_by()}
+        LIMIT {keyset.fetch_limit}
+    """
+    return sql, params, keyset
+
+def get_nearby_vendors(db: Session, area: geo.Area, page: PageParams = None, skill_id: int = None):
+    sql, params, keyset = nearby_vendors_sql(area, page or PageParams(), skill_id)
+    return keyset.page(db.execute(text(sql), params).mappings().all())
 
 # Obtener un usuario por id
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
+def get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+def update_password_hash(db: Session, db_user: models.User, password_hash: str):
+    """Reemplaza el hash guardado (rehash transparente en el login)."""
+    db_user.password_hash = password_hash
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
 
 def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
     """Actualizar información del usuario"""
@@ -71,6 +111,8 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
     db_user.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_user)
+    # Los servicios embeben los datos del vendedor
+    cache.invalidate("services")
     return db_user
 
 
@@ -90,66 +132,23 @@ def create_service(db: Session, service: schemas.ServiceCreate):
     db.add(db_service)
     db.commit()
     db.refresh(db_service)
+    cache.invalidate("services")
+    suggest.index.upsert_service(db_service.id, db_service.title, db_service.is_active)
     return db_service
 
-def get_services(db: Session):
-    # Incluye la relación con skill para que ServiceOut pueda mostrarla
-    return db.query(models.Service).join(models.Skill).all()
-
-def search_services(
-    db: Session,
-    query: str = "",
-    skill_ids: list[int] = None,
-    min_price: float = None,
-    max_price: float = None,
-    min_rating: float = None,
-    sort_by: str = "relevance"
-):
-    q = db.query(models.Service).join(models.Skill, isouter=True)
-
-    # 🔹 Full Text Search (PostgreSQL)
-    if query:
-        ts_query = func.plainto_tsquery('spanish', query)
-        q = q.filter(
-            func.to_tsvector('spanish', models.Service.title + ' ' + models.Service.description)
-            .op('@@')(ts_query)
-        )
-
-    # 🔹 Filtrar por skills
-    if skill_ids:
-        q = q.filter(models.Service.skill_id.in_(skill_ids))
-
-    # 🔹 Filtros de precio
-    if min_price is not None:
-        q = q.filter(models.Service.price >= min_price)
-    if max_price is not None:
-        q = q.filter(models.Service.price <= max_price)
-
-    # 🔹 Filtro por rating promedio
-    if min_rating is not None:
-        q = q.join(models.Service.reviews, isouter=True) \
-             .group_by(models.Service.id) \
-             .having(func.avg(models.Review.rating) >= min_rating)
-
-    # 🔹 Ordenamiento
-    if sort_by == "price_asc":
-        q = q.order_by(models.Service.price.asc())
-    elif sort_by == "price_desc":
-        q = q.order_by(models.Service.price.desc())
-    elif sort_by == "rating_desc":
-        q = q.join(models.Service.reviews, isouter=True) \
-             .group_by(models.Service.id) \
-             .order_by(func.avg(models.Review.rating).desc())
-    elif sort_by == "relevance" and query:
-        rank_expr = func.ts_rank_cd(
-            func.to_tsvector('spanish', models.Service.title + ' ' + models.Service.description),
-            func.plainto_tsquery('spanish', query)
-        ).label('rank')
-
-        q = q.add_columns(rank_expr).order_by(desc(text("rank")))
-
-
-    return q.all()
+def get_services(db: Session, page: PageParams = None):
+    # Solo servicios con skill; vendor/skill/rating se cargan en el mismo SELECT
+    query = (
+        db.query(models.Service)
+        .options(*schemas.SERVICE_OUT_LOAD)
+        .filter(models.Service.skill_id.isnot(None))
+    )
+    return pagination.paginate_query(
+        query,
+        page or PageParams(),
+        pagination.created_desc(models.Service),
+        tag="services",
+    )
 
 
 def update_service(db: Session, service_id: int, service: schemas.ServiceUpdate):
@@ -174,6 +173,8 @@ def update_service(db: Session, service_id: int, service: schemas.ServiceUpdate)
     
     db.commit()
     db.refresh(db_service)
+    cache.invalidate("services")
+    suggest.index.upsert_service(db_service.id, db_service.title, db_service.is_active)
     return db_service
 
 
@@ -183,8 +184,11 @@ def delete_service(db: Session, service_id: int):
     if not db_service:
         return None
     
+    ratings.forget_service(db, service_id)
     db.delete(db_service)
     db.commit()
+    cache.invalidate("services")
+    suggest.index.remove_service(service_id)
     return True
 
 
@@ -192,30 +196,89 @@ def delete_service(db: Session, service_id: int):
 # ==========================
 # Skills
 # ==========================
-def get_skills(db: Session):
-    return db.query(models.Skill).all()
-
-def assign_skills(db: Session, user_id: int, skill_ids: list[int]):
-    # Agregamos las nuevas skills si no existen
-    for skill_id in skill_ids:
-        # Verificar si ya existe
-        existing_skill = db.query(models.UserSkill).filter(
-            models.UserSkill.user_id == user_id,
-            models.UserSkill.skill_id == skill_id
-        ).first()
-        
-        if not existing_skill:
-            db_skill = models.UserSkill(user_id=user_id, skill_id=skill_id)
-            db.add(db_skill)
-            
+def get_skills(db: Session, page: PageParams = None):
+    return pagination.paginate_query(
+        db.query(models.Skill), page or PageParams(), [pagination.Key(models.Skill.id)], tag="skills"
+    )
+
+# Una sola sentencia por asignación: las ids pedidas se cruzan con skills (las que no
+# existen quedan fuera), se insertan con ON CONFLICT y, en modo reemplazo, se borran
+# las que sobran. Devuelve el conjunto final y lo que cambió.
+_ASSIGN_SKILLS_SQL = """
+    WITH requested AS (
+        SELECT DISTINCT r.skill_id
+        FROM unnest(CAST(:skill_ids AS int[])) AS r(skill_id)
+        JOIN skills sk ON sk.id = r.skill_id
+    ),
+    added AS (
+        INSERT INTO user_skills (user_id, skill_id)
+        SELECT :user_id, skill_id FROM requested
+        ON CONFLICT DO NOTHING
+        RETURNING skill_id
+    ),
+    removed AS (
+        DELETE FROM user_skills us
+        WHERE :replace AND us.user_id = :user_id
+          AND us.skill_id NOT IN (SELECT skill_id FROM requested)
+        RETURNING us.skill_id
+    )
+    SELECT
+        ARRAY(SELECT skill_id FROM requested) AS requested,
+        ARRAY(SELECT skill_id FROM added) AS added,
+        ARRAY(SELECT skill_id FROM removed) AS removed,
+        -- Las CTE no ven sus propias escrituras: las actuales + las agregadas
+        ARRAY(
+            SELECT skill_id FROM user_skills WHERE user_id = :user_id AND NOT :replace
+            UNION
+            SELECT skill_id FROM requested
+            ORDER BY 1
+        ) AS effective
+"""
+
+def assign_skills(db: Session, user_id: int, skill_ids: list[int], replace: bool = False):
+    """
+    Asigna skills a un usuario en una sola consulta.
+
+    Con `replace=True` el conjunto del usuario queda exactamente igual a `skill_ids`.
+    Si alguna id no existe no se cambia nada y se devuelve en "unknown".
+    """
+    row = db.execute(
+        text(_ASSIGN_SKILLS_SQL),
+        {"user_id": user_id, "skill_ids": list(skill_ids), "replace": replace},
+    ).one()
+
+    unknown = sorted(set(skill_ids) - set(row.requested))
+    if unknown:
+        db.rollback()
+        return {"user_id": user_id, "unknown": unknown}
     db.commit()
 
-    return {"user_id": user_id, "skills_assigned": skill_ids}
+    # Las skills salen del catálogo en memoria, sin otra consulta
+    skills = [registry.resolve(skill_id) for skill_id in row.effective]
+    if None in skills:
+        # Skill creada después de la foto; esto corre en el threadpool, así que se puede
+        # recargar en el momento (las ids ya se validaron contra la base)
+        registry.load(db)
+        skills = [registry.resolve(skill_id) for skill_id in row.effective]
+
+    return {
+        "user_id": user_id,
+        "skills_assigned": skill_ids,
+        "added": sorted(row.added),
+        "removed": sorted(row.removed),
+        "skills": skills,
+        "unknown": [],
+    }
 
 
 def get_user_skills(db: Session, user_id: int):
     """Obtener todas las skills de un usuario"""
-    user_skills = db.query(models.UserSkill).filter(models.UserSkill.user_id == user_id).all()
+    user_skills = (
+        db.query(models.UserSkill)
+        .options(*schemas.USER_SKILL_OUT_LOAD)
+        .filter(models.UserSkill.user_id == user_id)
+        .all()
+    )
     return user_skills
 
 
@@ -234,19 +297,25 @@ def remove_user_skill(db: Session, user_id: int, skill_id: int):
     return {"message": "Skill eliminada exitosamente", "user_id": user_id, "skill_id": skill_id}
 
 
-def get_services_by_vendor(db: Session, vendor_id: int):
-    """Obtener todos los servicios de un vendedor"""
-    services = db.query(models.Service).filter(models.Service.vendor_id == vendor_id).all()
-    return services
+def get_services_by_vendor(db: Session, vendor_id: int, page: PageParams = None):
+    """Obtener los servicios de un vendedor (paginado)"""
+    query = (
+        db.query(models.Service)
+        .options(*schemas.SERVICE_OUT_LOAD)
+        .filter(models.Service.vendor_id == vendor_id)
+    )
+    return pagination.paginate_query(
+        query, page or PageParams(), pagination.created_desc(models.Service), tag="services"
+    )
 
 
-def get_jobs_by_vendor(db: Session, vendor_id: int):
-    """Obtener todos los trabajos donde el usuario es el vendedor"""
-    jobs = db.query(models.Job).filter(models.Job.vendor_id == vendor_id).all()
-    return jobs
+def get_jobs_by_vendor(db: Session, vendor_id: int, page: PageParams = None):
+    """Obtener los trabajos donde el usuario es el vendedor (paginado)"""
+    query = db.query(models.Job).options(*schemas.JOB_OUT_LOAD).filter(models.Job.vendor_id == vendor_id)
+    return pagination.paginate_query(query, page or PageParams(), pagination.created_desc(models.Job), tag="jobs")
 
 
-def get_jobs_by_contractor(db: Session, contractor_id: int):
-    """Obtener todos los trabajos donde el usuario es el contratador"""
-    jobs = db.query(models.Job).filter(models.Job.contractor_id == contractor_id).all()
-    return jobs
+def get_jobs_by_contractor(db: Session, contractor_id: int, page: PageParams = None):
+    """Obtener los trabajos donde el usuario es el contratador (paginado)"""
+    query = db.query(models.Job).options(*schemas.JOB_OUT_LOAD).filter(models.Job.contractor_id == contractor_id)
+    return pagination.paginate_query(query, page or PageParams(), pagination.created_desc(models.Job), tag="jobs")
@@ -0,0 +1,151 @@
+"""
+Resumen del panel del vendedor (`GET /users/{id}/dashboard`).
+
+La tabla `vendor_job_stats` guarda, por (vendedor, estado), cuántos trabajos hay y la
+suma de `total_amount`. La mantienen triggers por sentencia sobre `jobs` (INSERT,
+UPDATE y DELETE, con tablas de transición), así se actualiza en la misma transacción
+desde cualquier camino: creación, transiciones de job_states.py, /status, carga
+masiva o borrados en cascada. Cada sentencia agrega sus filas y toca una fila del
+resumen por (vendedor, estado), en orden, no una por trabajo.
+
+El panel lee esas filas, el resumen de calificaciones (vendor_ratings) y los últimos
+trabajos por el índice (vendor_id, created_at); ninguna consulta recorre todos los
+trabajos del vendedor.
+
+La tabla y los triggers se crean en migrations/0005_vendor_job_stats.py.
+
+Reconstrucción y verificación:
+
+    python -m backend.dashboard rebuild
+    python -m backend.dashboard check
+"""
+import argparse
+import sys
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from .job_states import STATUSES
+
+RECENT_JOBS = 5
+
+# Agregado "real" desde jobs; base de rebuild y check
+_TRUTH = """
+    SELECT vendor_id, COALESCE(status, 'pendiente') AS status,
+           COUNT(*) AS job_count, COALESCE(SUM(total_amount), 0) AS amount_sum
+    FROM jobs
+    WHERE vendor_id IS NOT NULL
+    GROUP BY vendor_id, COALESCE(status, 'pendiente')
+"""
+
+
+def get_summary(db: Session, vendor_id: int, recent: int = RECENT_JOBS) -> dict:
+    """Conteos y montos por estado, calificación, servicios y últimos trabajos."""
+    by_status = {status: {"count": 0, "amount": 0.0} for status in STATUSES}
+    for row in db.execute(text("""
+        SELECT status, job_count, amount_sum FROM vendor_job_stats WHERE vendor_id = :id
+    """), {"id": vendor_id}).mappings():
+        by_status[row["status"]] = {"count": row["job_count"], "amount": float(row["amount_sum"])}
+
+    header = db.execute(text("""
+        SELECT
+            vr.review_count, vr.avg_rating,
+            (SELECT COUNT(*) FROM services s WHERE s.vendor_id = :id) AS service_count,
+            (SELECT COUNT(*) FROM services s WHERE s.vendor_id = :id AND s.is_active) AS active_service_count
+        FROM (SELECT 1) one
+        LEFT JOIN vendor_ratings vr ON vr.vendor_id = :id
+    """), {"id": vendor_id}).mappings().one()
+
+    recent_jobs = db.execute(text("""
+        SELECT j.id, j.status, j.total_amount, j.created_at,
+               j.service_id, s.title AS service_title,
+               j.contractor_id, c.name AS contractor_name
+        FROM jobs j
+        LEFT JOIN services s ON s.id = j.service_id
+        LEFT JOIN users c ON c.id = j.contractor_id
+        WHERE j.vendor_id = :id
+        ORDER BY j.created_at DESC NULLS LAST, j.id DESC
+        LIMIT :limit
+    """), {"id": vendor_id, "limit": recent}).mappings().all()
+
+    return {
+        "vendor_id": vendor_id,
+        "jobs_by_status": {status: values["count"] for status, values in by_status.items()},
+        "total_jobs": sum(values["count"] for values in by_status.values()),
+        "revenue": {
+            "completed": by_status["completado"]["amount"],
+            "in_progress": by_status["en_progreso"]["amount"],
+            "pending": by_status["pendiente"]["amount"],
+        },
+        "review_count": header["review_count"] or 0,
+        "avg_rating": float(header["avg_rating"]) if header["avg_rating"] is not None else None,
+        "service_count": header["service_count"],
+        "active_service_count": header["active_service_count"],
+        "recent_jobs": [dict(row) for row in recent_jobs],
+    }
+
+
+def rebuild(db: Session) -> int:
+    """Recalcula vendor_job_stats desde jobs (backfill). Hace commit."""
+    # SHARE bloquea las escrituras a jobs (y con ellas los triggers) mientras se reconstruye
+    db.execute(text("LOCK TABLE jobs IN SHARE MODE"))
+    db.execute(text("DELETE FROM vendor_job_stats"))
+    result = db.execute(text(f"""
+        INSERT INTO vendor_job_stats (vendor_id, status, job_count, amount_sum)
+        SELECT t.vendor_id, t.status, t.job_count, t.amount_sum
+        FROM ({_TRUTH}) t
+        JOIN users u ON u.id = t.vendor_id
+    """))
+    db.commit()
+    return result.rowcount
+
+
+def check(db: Session):
+    """
+    Compara vendor_job_stats contra el agregado real.
+
+    Devuelve una lista de diferencias; vacía si todo es consistente.
+    """
+    rows = db.execute(text(f"""
+        SELECT
+            COALESCE(t.vendor_id, s.vendor_id) AS vendor_id,
+            COALESCE(t.status, s.status) AS status,
+            COALESCE(s.job_count, 0) AS stored_count,
+            COALESCE(s.amount_sum, 0) AS stored_amount,
+            COALESCE(t.job_count, 0) AS actual_count,
+            COALESCE(t.amount_sum, 0) AS actual_amount
+        FROM ({_TRUTH}) t
+        FULL OUTER JOIN vendor_job_stats s ON s.vendor_id = t.vendor_id AND s.status = t.status
+        WHERE COALESCE(s.job_count, 0) <> COALESCE(t.job_count, 0)
+           OR COALESCE(s.amount_sum, 0) <> COALESCE(t.amount_sum, 0)
+    """)).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumen de trabajos por vendedor")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"vendor_job_stats: {rebuild(db)} filas")
+            return 0
+
+        mismatches = check(db)
+        for m in mismatches:
+            print(
+                f"vendedor {m['vendor_id']} / {m['status']}: guardado ({m['stored_count']}, {m['stored_amount']})"
+                f" vs real ({m['actual_count']}, {m['actual_amount']})"
+            )
+        print("OK" if not mismatches else f"{len(mismatches)} inconsistencias")
+        return 0 if not mismatches else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,16 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from uuid import uuid4
 
 import os
 from dotenv import load_dotenv
 
+from . import instrumentation, pool_metrics
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -15,7 +21,42 @@ if not DATABASE_URL:
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
+# --- Pool de conexiones (configurable por entorno) ---
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)  # segundos esperando una conexión libre
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)  # segundos; < idle timeout del Postgres administrado
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+# Modo PgBouncer (transaction pooling): PgBouncer hace el pooling, así que aquí no se
+# retienen conexiones ni estado de servidor entre transacciones
+DB_PGBOUNCER = _env_bool("DB_PGBOUNCER", False)
+
+def engine_options():
+    """Opciones de create_engine según el entorno (compartidas con otros engines)."""
+    if DB_PGBOUNCER:
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": pool_metrics.InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(DATABASE_URL, **engine_options())
+pool_metrics.install(engine)
+instrumentation.install(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -26,3 +67,42 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Engine asíncrono (asyncpg) ---
+# Convive con el engine síncrono durante la migración: los endpoints de lectura más
+# usados usan get_async_db y el resto sigue con get_db.
+def _async_url_and_args(url: str):
+    parsed = make_url(url)
+    query = dict(parsed.query)
+    connect_args = {}
+    # asyncpg no entiende sslmode (usado en Render); se traduce a su parámetro ssl
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    if DB_PGBOUNCER:
+        # Sin prepared statements con nombre fijo: PgBouncer puede cambiar de conexión
+        query["prepared_statement_cache_size"] = "0"
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    return parsed, connect_args
+
+def async_engine_options():
+    options = engine_options()
+    if options.get("poolclass") is not NullPool:
+        # El pool instrumentado es síncrono; el engine async usa su pool por defecto
+        options.pop("poolclass")
+    return options
+
+ASYNC_DATABASE_URL, _async_connect_args = _async_url_and_args(DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, connect_args=_async_connect_args, **async_engine_options()
+)
+instrumentation.install(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Dependencia de sesión asíncrona
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,124 @@
+"""
+Exportación en streaming de trabajos, pagos y reseñas (NDJSON o CSV).
+
+Cada exportación es un único SELECT plano (los joins se hacen una vez en la base)
+leído con un cursor del lado del servidor: las filas llegan en bloques de
+EXPORT_BATCH_SIZE y cada bloque se serializa y se envía antes de pedir el
+siguiente, así la memoria no crece con el tamaño de la tabla.
+"""
+import csv
+import io
+import os
+from datetime import datetime
+from typing import Iterator, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.sql import text
+
+from .database import engine
+from .fastjson import dumps
+from .instrumentation import serializing
+
+load_dotenv()
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE") or 2000)
+
+# Cada consulta filtra por `{alias}.created_at` (desde/hasta opcionales) y ordena por id
+EXPORTS = {
+    "jobs": ("j", """
+        SELECT
+            j.id, j.status, j.created_at, j.start_date, j.end_date, j.total_amount,
+            j.client_confirmed, j.vendor_confirmed,
+            j.service_id, s.title AS service_title,
+            j.contractor_id, c.name AS contractor_name, c.email AS contractor_email,
+            j.vendor_id, v.name AS vendor_name, v.email AS vendor_email,
+            COALESCE(p.paid_amount, 0) AS paid_amount,
+            COALESCE(p.payment_count, 0) AS payment_count
+        FROM jobs j
+        LEFT JOIN services s ON s.id = j.service_id
+        LEFT JOIN users c ON c.id = j.contractor_id
+        LEFT JOIN users v ON v.id = j.vendor_id
+        LEFT JOIN (
+            SELECT job_id,
+                   SUM(amount) FILTER (WHERE status = 'pagado') AS paid_amount,
+                   COUNT(*) AS payment_count
+            FROM payments
+            GROUP BY job_id
+        ) p ON p.job_id = j.id
+    """),
+    "payments": ("p", """
+        SELECT
+            p.id, p.job_id, p.amount, p.method, p.status, p.created_at,
+            j.total_amount AS job_total_amount, j.status AS job_status,
+            j.contractor_id, j.vendor_id, j.service_id
+        FROM payments p
+        LEFT JOIN jobs j ON j.id = p.job_id
+    """),
+    "reviews": ("r", """
+        SELECT
+            r.id, r.job_id, r.rating, r.comment, r.created_at,
+            j.service_id, s.title AS service_title, j.vendor_id, j.contractor_id
+        FROM reviews r
+        LEFT JOIN jobs j ON j.id = r.job_id
+        LEFT JOIN services s ON s.id = j.service_id
+    """),
+}
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def build_query(kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    alias, sql = EXPORTS[kind]
+    conditions, params = [], {}
+    if since is not None:
+        conditions.append(f"{alias}.created_at >= :since")
+        params["since"] = since
+    if until is not None:
+        conditions.append(f"{alias}.created_at < :until")
+        params["until"] = until
+    if conditions:
+        sql += "\n        WHERE " + " AND ".join(conditions)
+    sql += f"\n        ORDER BY {alias}.id"
+    return text(sql), params
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def stream(kind: str, fmt: str = "ndjson", since: Optional[datetime] = None,
+           until: Optional[datetime] = None, batch_size: int = None) -> Iterator[bytes]:
+    """
+    Genera el archivo por bloques de bytes.
+
+    Abre su propia conexión (el request puede terminar antes que el stream) y la
+    cierra al agotarse o si el cliente corta la descarga.
+    """
+    query, params = build_query(kind, since, until)
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query, params)
+        columns = list(result.keys())
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in result.partitions():
+                with serializing():
+                    for row in rows:
+                        writer.writerow([_csv_value(v) for v in row])
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            for rows in result.partitions():
+                with serializing():
+                    chunk = b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+                yield chunk
@@ -0,0 +1,26 @@
+"""
+Serialización JSON a bytes con orjson (si está instalado) o json de la stdlib.
+
+Fechas en ISO 8601 (UTC con "Z", igual que Pydantic) y Decimal como número.
+"""
+from decimal import Decimal
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} no es serializable")
+
+
+try:
+    import orjson
+
+    def dumps(value) -> bytes:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+except ImportError:  # pragma: no cover - orjson es opcional
+    import json
+
+    def dumps(value) -> bytes:
+        return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
@@ -0,0 +1,267 @@
+"""
+Coordenadas de usuarios y servicios, geocodificadas sin red desde un nomenclátor local.
+
+`users.location` sigue siendo texto libre ("Mixco, Guatemala"); `users.latitude` /
+`users.longitude` las completa un trigger buscando cada parte del texto (de la más
+específica a la más general) en la tabla `gazetteer`, que se carga de
+`data/gazetteer.csv`. Si alguna parte nombra un país conocido, solo valen lugares de
+ese país. Los servicios copian las coordenadas de su vendedor (otro trigger), así la
+búsqueda filtra y ordena por distancia sin JOIN.
+
+La tabla, las funciones SQL (`geo_distance_km`, `geocode_location`) y los triggers
+se crean en migrations/0008_geo.py; los índices GiST sobre `point(longitude,
+latitude)` de users y services, en la 0009. El filtro por radio se arma como caja
+(`<@ box`, usa el índice) más la distancia exacta (haversine, `geo_distance_km`) sobre
+los candidatos; se combina con los índices de skill y texto por bitmap.
+
+    python -m backend.geo load              # recarga el nomenclátor desde el CSV
+    python -m backend.geo regeocode         # vuelve a geocodificar todos los usuarios
+    python -m backend.geo lookup "Xela, Guatemala"
+
+Las cajas no cruzan el antimeridiano (180°); no hace falta para el mercado actual.
+"""
+import argparse
+import csv
+import math
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Query
+from sqlalchemy.sql import text
+
+load_dotenv()
+
+GEO_DEFAULT_RADIUS_KM = float(os.getenv("GEO_DEFAULT_RADIUS_KM") or 25)
+GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM") or 500)
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "gazetteer.csv")
+
+EARTH_RADIUS_KM = 6371.0088  # el mismo de geo_distance_km (migración 0008)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+# ==========================
+# Zona de búsqueda
+# ==========================
+@dataclass
+class Area:
+    """Caja (min_lon, min_lat, max_lon, max_lat) y, si hay centro, radio en km."""
+
+    box: Tuple[float, float, float, float]
+    center: Optional[Tuple[float, float]] = None  # (lat, lon)
+    radius_km: Optional[float] = None
+
+    def where(self, params: dict, alias: str = "s") -> str:
+        """Condición SQL (caja por índice + distancia exacta); agrega sus parámetros."""
+        params.update(geo_min_lon=self.box[0], geo_min_lat=self.box[1], geo_max_lon=self.box[2], geo_max_lat=self.box[3])
+        sql = (
+            f"point({alias}.longitude, {alias}.latitude)"
+            " <@ box(point(:geo_min_lon, :geo_min_lat), point(:geo_max_lon, :geo_max_lat))"
+        )
+        if self.radius_km is not None:
+            sql += f" AND {self.distance_sql(params, alias)} <= :geo_radius_km"
+            params["geo_radius_km"] = self.radius_km
+        return sql
+
+    def distance_sql(self, params: dict, alias: str = "s") -> str:
+        """Expresión de la distancia al centro en km (float8, apta para el cursor)."""
+        params.update(geo_lat=self.center[0], geo_lon=self.center[1])
+        return f"geo_distance_km(:geo_lat, :geo_lon, {alias}.latitude, {alias}.longitude)"
+
+    def cursor_tag(self, tag: str) -> str:
+        """Tag de un cursor por distancia, con el centro: otro centro lo invalida (400)."""
+        return f"{tag}@{self.center[0]:.6f},{self.center[1]:.6f}"
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Caja en grados que contiene el círculo de `radius_km` alrededor de (lat, lon)."""
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    # Cerca de los polos el círculo abarca todas las longitudes
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return max(lon - dlon, -180.0), min_lat, min(lon + dlon, 180.0), max_lat
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    """"min_lon,min_lat,max_lon,max_lat" -> tupla; ValueError si no es válida."""
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox debe tener 4 números: min_lon,min_lat,max_lon,max_lat")
+    min_lon, min_lat, max_lon, max_lat = parts
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox fuera de rango o con mínimos mayores que máximos")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def area(
+    center: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+    bbox: Optional[str] = None,
+) -> Optional[Area]:
+    """
+    Zona de búsqueda a partir de los parámetros del request (None si no hay ninguno).
+
+    Con centro, el radio por defecto es GEO_DEFAULT_RADIUS_KM y nunca pasa de
+    GEO_MAX_RADIUS_KM (así ordenar por distancia siempre recorre una caja acotada).
+    `bbox` sola filtra por la caja; junto con centro, las dos se intersectan.
+    """
+    box = parse_bbox(bbox) if bbox else None
+    if center is None:
+        if radius_km is not None:
+            raise ValueError("radius_km requiere lat/lon o near")
+        return Area(box) if box else None
+
+    lat, lon = center
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat/lon fuera de rango")
+    radius_km = min(radius_km or GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM)
+    circle = bounding_box(lat, lon, radius_km)
+    if box:
+        circle = (max(circle[0], box[0]), max(circle[1], box[1]), min(circle[2], box[2]), min(circle[3], box[3]))
+        if circle[0] > circle[2] or circle[1] > circle[3]:
+            raise ValueError("bbox no se cruza con el radio alrededor del centro")
+    return Area(circle, center, radius_km)
+
+
+# ==========================
+# Parámetros del request
+# ==========================
+@dataclass
+class GeoParams:
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    near: Optional[str] = None
+    radius_km: Optional[float] = None
+    bbox: Optional[str] = None
+
+
+def geo_params(
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitud del centro"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitud del centro"),
+    near: Optional[str] = Query(None, max_length=200, description='Lugar como centro, p.ej. "Mixco, Guatemala"'),
+    radius_km: Optional[float] = Query(
+        None, gt=0, le=GEO_MAX_RADIUS_KM, description=f"Radio en km (por defecto {GEO_DEFAULT_RADIUS_KM:g})"
+    ),
+    bbox: Optional[str] = Query(None, description="Caja min_lon,min_lat,max_lon,max_lat"),
+) -> GeoParams:
+    """Dependencia de FastAPI con los parámetros de ubicación."""
+    return GeoParams(lat=lat, lon=lon, near=near, radius_km=radius_km, bbox=bbox)
+
+
+def _resolve(params: GeoParams, center) -> Optional[Area]:
+    try:
+        return area(center, params.radius_km, params.bbox)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+def _center(params: GeoParams):
+    if (params.lat is None) != (params.lon is None):
+        raise HTTPException(status_code=422, detail="lat y lon van juntas")
+    return (params.lat, params.lon) if params.lat is not None else None
+
+
+def _unknown_place(near):
+    return HTTPException(status_code=422, detail=f"Ubicación desconocida: {near}")
+
+
+def resolve(db, params: GeoParams) -> Optional[Area]:
+    """Zona del request; `near` se geocodifica con el nomenclátor. 422 si no es válida."""
+    center = _center(params)
+    if center is None and params.near:
+        center = geocode(db, params.near)
+        if center is None:
+            raise _unknown_place(params.near)
+    return _resolve(params, center)
+
+
+async def resolve_async(db, params: GeoParams) -> Optional[Area]:
+    """Igual que `resolve`, sobre una sesión asíncrona."""
+    center = _center(params)
+    if center is None and params.near:
+        center = await geocode_async(db, params.near)
+        if center is None:
+            raise _unknown_place(params.near)
+    return _resolve(params, center)
+
+
+# ==========================
+# Nomenclátor
+# ==========================
+_GEOCODE_SQL = "SELECT g.latitude, g.longitude FROM geocode_location(:value) g"
+
+
+def geocode(db, value: str) -> Optional[Tuple[float, float]]:
+    """(lat, lon) de un texto de ubicación según el nomenclátor, o None."""
+    row = db.execute(text(_GEOCODE_SQL), {"value": value}).one()
+    return None if row[0] is None else (row[0], row[1])
+
+
+async def geocode_async(db, value: str) -> Optional[Tuple[float, float]]:
+    """Igual que `geocode`, sobre una sesión asíncrona."""
+    row = (await db.execute(text(_GEOCODE_SQL), {"value": value})).one()
+    return None if row[0] is None else (row[0], row[1])
+
+
+def load_gazetteer(conn, path: str = GAZETTEER_PATH) -> int:
+    """Reemplaza el contenido de `gazetteer` por el CSV (una fila por nombre y alias)."""
+    rows = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for place in csv.DictReader(f):
+            names = [place["name"], *filter(None, (a.strip() for a in place["aliases"].split("|")))]
+            for name in names:
+                rows.append({
+                    "name": name,
+                    "place": place["name"],
+                    "country": place["country"],
+                    "latitude": float(place["latitude"]),
+                    "longitude": float(place["longitude"]),
+                    "population": int(place["population"]) if place["population"] else None,
+                })
+    conn.execute(text("DELETE FROM gazetteer"))
+    conn.execute(text("""
+        INSERT INTO gazetteer (name_normalized, place, country, country_normalized, latitude, longitude, population)
+        VALUES (normalize_search_text(:name), :place, :country, normalize_search_text(:country),
+                :latitude, :longitude, :population)
+        ON CONFLICT DO NOTHING
+    """), rows)
+    return len(rows)
+
+
+def regeocode(conn) -> int:
+    """Recalcula las coordenadas de todos los usuarios (p.ej. tras cambiar el CSV)."""
+    result = conn.execute(text("""
+        WITH coded AS (
+            SELECT u.id, g.latitude, g.longitude FROM users u, LATERAL geocode_location(u.location) g
+        )
+        UPDATE users t SET latitude = c.latitude, longitude = c.longitude
+        FROM coded c
+        WHERE c.id = t.id AND (t.latitude, t.longitude) IS DISTINCT FROM (c.latitude, c.longitude)
+    """))
+    return result.rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nomenclátor y coordenadas de usuarios/servicios")
+    parser.add_argument("command", choices=["load", "regeocode", "lookup"])
+    parser.add_argument("value", nargs="?", help="Texto de ubicación (para lookup)")
+    args = parser.parse_args(argv)
+
+    from .database import engine
+
+    with engine.begin() as conn:
+        if args.command == "load":
+            print(f"gazetteer: {load_gazetteer(conn)} nombres")
+        elif args.command == "regeocode":
+            print(f"users: {regeocode(conn)} actualizados")
+        else:
+            point = geocode(conn, args.value or "")
+            print(point if point else "sin coincidencia")
+            return 0 if point else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Hash de contraseñas (argon2) fuera del pool de threads de los requests.
+
+argon2 es caro a propósito; si corre en el threadpool de Starlette, una ráfaga de
+logins deja sin threads al resto de endpoints. Aquí el trabajo va a un executor
+propio y acotado:
+
+- HASH_EXECUTOR: "thread" (por defecto; argon2-cffi libera el GIL) o "process".
+- HASH_WORKERS: número de workers (por defecto, núcleos de CPU).
+- HASH_MAX_PENDING: máximo de hashes en cola + en curso; por encima se rechaza con
+  `HashingOverloaded` en lugar de encolar sin límite.
+- ARGON2_TIME_COST / ARGON2_MEMORY_COST (KiB) / ARGON2_PARALLELISM: parámetros de argon2.
+  Los que no estén configurados quedan en los valores por defecto de passlib. Si
+  cambian, los hashes viejos se regeneran en el siguiente login correcto.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+
+load_dotenv()
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+# None: se usa el valor por defecto de passlib
+ARGON2_TIME_COST = _int_env("ARGON2_TIME_COST", None)
+ARGON2_MEMORY_COST = _int_env("ARGON2_MEMORY_COST", None)
+ARGON2_PARALLELISM = _int_env("ARGON2_PARALLELISM", None)
+
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+HASH_WORKERS = _int_env("HASH_WORKERS", os.cpu_count() or 2)
+HASH_MAX_PENDING = _int_env("HASH_MAX_PENDING", HASH_WORKERS * 8)
+
+_argon2_settings = {
+    f"argon2__{name}": value
+    for name, value in (
+        ("time_cost", ARGON2_TIME_COST),
+        ("memory_cost", ARGON2_MEMORY_COST),
+        ("parallelism", ARGON2_PARALLELISM),
+    )
+    if value is not None
+}
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **_argon2_settings)
+
+
+class HashingOverloaded(Exception):
+    """La cola del executor de hashing está llena."""
+
+
+# Funciones de módulo para que se puedan enviar a un ProcessPoolExecutor
+def hash_password(password: str) -> str:
+    if not isinstance(password, str):
+        raise ValueError("Password must be a string")
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if not isinstance(plain_password, str):
+        raise ValueError("Password must be a string")
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str):
+    """Devuelve (válida, nuevo_hash); nuevo_hash es None si el hash guardado está al día."""
+    if not isinstance(plain_password, str):
+        raise ValueError("Password must be a string")
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class BoundedExecutor:
+    """Executor con un tope de trabajos pendientes; no bloquea al encolar."""
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Se crea en el primer uso: así un fork del servidor no hereda workers vivos
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="argon2"
+                        )
+        return self._executor
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingOverloaded()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def map_waiting(self, fn, items):
+        """
+        Como map(), para cargas masivas: espera un lugar libre en vez de rechazar y
+        deja como mucho `workers` trabajos en vuelo, así los logins siguen entrando.
+        """
+        results, window = [], deque()
+        for item in items:
+            if len(window) >= self.workers:
+                results.append(window.popleft().result())
+            self._slots.acquire()
+            try:
+                future = self._get_executor().submit(fn, item)
+            except Exception:
+                self._slots.release()
+                raise
+            future.add_done_callback(lambda _: self._slots.release())
+            window.append(future)
+        results.extend(future.result() for future in window)
+        return results
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+executor = BoundedExecutor(HASH_EXECUTOR, HASH_WORKERS, HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    return await executor.run(hash_password, password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str):
+    return await executor.run(verify_and_update, plain_password, hashed_password)
@@ -0,0 +1,266 @@
+"""
+Índices de las consultas calientes y verificación de sus planes.
+
+Los índices se declaran en `models.py` y los crean las migraciones (0003 y las que
+agregan sus columnas) con su propio DDL y `CREATE INDEX CONCURRENTLY`, que no bloquea
+las escrituras. `apply` crea desde models.py los que falten en una base ya migrada y
+rehace los que quedaron inválidos. `check` corre EXPLAIN sobre cada consulta caliente,
+armada con el mismo código que usan los routers, y falla si alguna no usa el índice
+esperado.
+
+    python -m backend.indexes apply
+    python -m backend.indexes check
+
+`check` desactiva los seq scans en su transacción: con tablas chicas (desarrollo, CI)
+Postgres prefiere recorrer la tabla, y lo que interesa verificar es que exista un
+índice que sirva para la consulta y su orden.
+"""
+import argparse
+import re
+import sys
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import text
+
+from . import crud, geo, models, pagination, schemas, search, service_rows
+from .database import engine
+from .pagination import Keyset, PageParams
+
+# Índices de models.py que administra este módulo
+QUERY_INDEXES = (
+    "idx_services_vendor_created",
+    "idx_services_created_with_skill",
+    "idx_services_skill",
+    "idx_jobs_vendor_created",
+    "idx_jobs_contractor_created",
+    "idx_jobs_vendor_status",
+    "idx_jobs_contractor_status",
+    "idx_jobs_service",
+    "uq_reviews_job",
+    "idx_payments_job",
+    "idx_user_skills_skill",
+    "idx_services_title_trgm",
+    "idx_skills_name_trgm",
+    "idx_services_geo",
+    "idx_users_geo",
+)
+
+
+def _model_indexes():
+    by_name = {
+        index.name: index
+        for table in models.Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    return [by_name[name] for name in QUERY_INDEXES]
+
+
+def index_ddl(index) -> str:
+    """DDL de un índice del modelo como CREATE INDEX CONCURRENTLY IF NOT EXISTS."""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+    return re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)
+
+
+def apply(conn=None):
+    """
+    Crea los índices que falten; rehace los que quedaron inválidos por un build fallido.
+
+    `conn` tiene que estar en autocommit (CONCURRENTLY no corre dentro de una transacción).
+    """
+    if conn is None:
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            return apply(conn)
+
+    for index in _model_indexes():
+        valid = conn.execute(
+            text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+            {"name": index.name},
+        ).scalar()
+        if valid is False:
+            print(f"{index.name}: inválido, se reconstruye")
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+        elif valid:
+            print(f"{index.name}: ok")
+            continue
+        conn.execute(text(index_ddl(index)))
+        print(f"{index.name}: creado")
+
+
+# ==========================
+# Consultas calientes
+# ==========================
+def _orm_sql(stmt, keys, tag):
+    stmt, _ = pagination.keyset_statement(stmt, PageParams(), keys, tag=tag)
+    return stmt
+
+
+def hot_queries():
+    """(nombre, sentencia, índices aceptados) de cada lectura que debe usar un índice."""
+    Job, Service, Review = models.Job, models.Service, models.Review
+    vendor_keys = Keyset(pagination.created_desc_sql("s"), PageParams())
+
+    return [
+        (
+            "services por vendedor (routers/services.py)",
+            text(service_rows.select_services(
+                where="s.vendor_id = 1 AND TRUE", order_by=vendor_keys.order_by(), limit=vendor_keys.fetch_limit
+            )),
+            {"idx_services_vendor_created"},
+        ),
+        (
+            "listado de servicios (crud.get_services)",
+            _orm_sql(
+                select(Service).options(*schemas.SERVICE_OUT_LOAD).where(Service.skill_id.isnot(None)),
+                pagination.created_desc(Service), "services",
+            ),
+            {"idx_services_created_with_skill"},
+        ),
+        (
+            "servicios por skill (búsqueda con skill_ids)",
+            select(Service.id).where(Service.skill_id.in_([1, 2])),
+            {"idx_services_skill"},
+        ),
+        (
+            "trabajos por vendedor (crud.get_jobs_by_vendor)",
+            _orm_sql(
+                select(Job).options(*schemas.JOB_OUT_LOAD).where(Job.vendor_id == 1),
+                pagination.created_desc(Job), "jobs",
+            ),
+            # Con pocas filas Postgres puede preferir el índice por estado y ordenar después
+            {"idx_jobs_vendor_created", "idx_jobs_vendor_status"},
+        ),
+        (
+            "trabajos por contratador (crud.get_jobs_by_contractor)",
+            _orm_sql(
+                select(Job).options(*schemas.JOB_OUT_LOAD).where(Job.contractor_id == 1),
+                pagination.created_desc(Job), "jobs",
+            ),
+            {"idx_jobs_contractor_created", "idx_jobs_contractor_status"},
+        ),
+        (
+            "trabajos por estado del contratador",
+            select(Job.status, Job.total_amount).where(Job.contractor_id == 1, Job.status == "pendiente"),
+            {"idx_jobs_contractor_status"},
+        ),
+        (
+            "trabajos por estado del vendedor",
+            select(Job.status, Job.total_amount).where(Job.vendor_id == 1, Job.status == "pendiente"),
+            {"idx_jobs_vendor_status"},
+        ),
+        (
+            "reseñas de un servicio (routers/reviews.py)",
+            _orm_sql(
+                select(Review).join(Job).where(Job.service_id == 1),
+                pagination.created_desc(Review), "reviews",
+            ),
+            {"idx_jobs_service"},
+        ),
+        (
+            "reseña de un trabajo (routers/reviews.py)",
+            select(Review).where(Review.job_id == 1),
+            {"uq_reviews_job"},
+        ),
+        (
+            "pagos de un trabajo",
+            select(models.Payment).where(models.Payment.job_id == 1),
+            {"idx_payments_job"},
+        ),
+        (
+            "búsqueda difusa por título (search.py, mode=fuzzy)",
+            select(Service.id).where(Service.title_normalized.op("%>")(func.normalize_search_text("plomeria"))),
+            {"idx_services_title_trgm"},
+        ),
+        (
+            "búsqueda difusa por skill (search.py, mode=fuzzy)",
+            select(models.Skill.id).where(
+                models.Skill.name_normalized.op("%>")(func.normalize_search_text("electrisista"))
+            ),
+            {"idx_skills_name_trgm"},
+        ),
+        (
+            "servicios cerca de un punto (search.py, lat/lon)",
+            _geo_search_sql(),
+            {"idx_services_geo"},
+        ),
+        (
+            "vendedores cerca de un punto (routers/users.py)",
+            _geo_vendors_sql(),
+            {"idx_users_geo"},
+        ),
+    ]
+
+
+def _geo_search_sql():
+    sql, params, _ = search.build_search_sql(
+        area=geo.area(center=(14.6349, -90.5069), radius_km=10), sort_by="distance"
+    )
+    return _bound(sql, params)
+
+
+def _geo_vendors_sql():
+    sql, params, _ = crud.nearby_vendors_sql(geo.area(center=(14.6349, -90.5069), radius_km=10), PageParams())
+    return _bound(sql, params)
+
+
+def _bound(sql, params):
+    # text() rechaza parámetros que no aparecen en el SQL (p.ej. :lang sin texto)
+    return text(sql).bindparams(**{k: v for k, v in params.items() if f":{k}" in sql})
+
+
+def _index_names(plan) -> set:
+    names = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= _index_names(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            names |= _index_names(value)
+    return names
+
+
+def explain(conn, stmt) -> set:
+    """Índices que usa el plan de `stmt`."""
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+    return _index_names(plan)
+
+
+def check(bind=None) -> list:
+    """Devuelve la lista de consultas que no usan ninguno de sus índices esperados."""
+    bind = bind or engine
+    failures = []
+    with bind.connect() as conn:
+        with conn.begin() as trans:
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for name, stmt, expected in hot_queries():
+                used = explain(conn, stmt)
+                ok = bool(used & expected)
+                print(f"{'ok  ' if ok else 'FALLA'} {name}: {', '.join(sorted(used)) or 'sin índices'}")
+                if not ok:
+                    failures.append((name, expected, used))
+            trans.rollback()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índices de las consultas calientes")
+    parser.add_argument("command", choices=["apply", "check"])
+    args = parser.parse_args(argv)
+
+    if args.command == "apply":
+        apply()
+        return 0
+    failures = check()
+    if failures:
+        print(f"{len(failures)} consulta(s) sin el índice esperado")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
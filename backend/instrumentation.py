@@ -0,0 +1,290 @@
+"""
+Instrumentación por request: latencia, SQL, serialización y tamaño de respuesta.
+
+`InstrumentationMiddleware` (ASGI puro, sin BaseHTTPMiddleware) abre un
+`RequestStats` en un contextvar al entrar cada request. Los eventos
+`before/after_cursor_execute` de los engines de `database.py` suman ahí las
+sentencias y el tiempo en la base. El tiempo de serialización lo suman
+`InstrumentedRoute` (route_class de todos los routers: validación contra el
+response_model en `serialize_response`, `jsonable_encoder` y render, desde que el
+endpoint devuelve hasta que la respuesta queda armada) y `serializing()`, para los
+endpoints que arman el JSON ellos mismos (service_rows, export). Al terminar, los totales se acumulan por ruta (la plantilla, p.ej.
+`/services/{service_id}`, no el path concreto) y `render()` los devuelve en
+formato de texto de Prometheus para `/metrics`.
+
+Los requests más lentos que SLOW_REQUEST_MS se registran en el log con su SQL.
+"""
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS") or 1000)
+# Sentencias guardadas por request para el log de lentos (las bulk pueden ser miles)
+MAX_LOGGED_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    __slots__ = ("db_statements", "db_seconds", "serialize_seconds", "statements", "endpoint_returned_at")
+
+    def __init__(self):
+        self.db_statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements = []
+        self.endpoint_returned_at = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class RouteStats:
+    """Totales acumulados de una ruta (método + plantilla)."""
+
+    __slots__ = ("buckets", "count", "seconds", "db_statements", "db_seconds", "serialize_seconds",
+                 "response_bytes", "statuses")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # el último es +Inf
+        self.count = 0
+        self.seconds = 0.0
+        self.db_statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int, stats: RequestStats):
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            entry = self.routes.get((method, route))
+            if entry is None:
+                entry = self.routes[(method, route)] = RouteStats()
+            entry.buckets[bucket] += 1
+            entry.count += 1
+            entry.seconds += seconds
+            entry.db_statements += stats.db_statements
+            entry.db_seconds += stats.db_seconds
+            entry.serialize_seconds += stats.serialize_seconds
+            entry.response_bytes += size
+            entry.statuses[status] = entry.statuses.get(status, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+
+registry = Registry()
+
+
+# --- SQL ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    start = getattr(context, "_instrumentation_start", None)
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    stats.db_statements += 1
+    stats.db_seconds += elapsed
+    if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+        stats.statements.append((statement, elapsed))
+
+
+def install(engine):
+    """Registra los listeners de SQL en un engine síncrono (o `async_engine.sync_engine`)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Serialización ---
+@contextmanager
+def serializing():
+    """Suma al request en curso el tiempo que tarda el bloque (JSON armado a mano)."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_seconds += time.perf_counter() - start
+
+
+def _endpoint_returned():
+    stats = _current.get()
+    if stats is not None:
+        stats.endpoint_returned_at = time.perf_counter()
+
+
+def _timed_endpoint(call):
+    """Envuelve el endpoint para marcar cuándo devuelve (async o sync, como el original)."""
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _endpoint_returned()
+    else:
+        # Los sync corren en el threadpool con una copia del contexto: ven el mismo RequestStats
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _endpoint_returned()
+    endpoint._instrumented = True
+    return endpoint
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute que mide la serialización: desde que el endpoint devuelve hasta que
+    FastAPI termina de armar la respuesta (serialize_response y render)."""
+
+    def get_route_handler(self):
+        if not getattr(self.dependant.call, "_instrumented", False):
+            self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def instrumented_handler(request):
+            response = await handler(request)
+            stats = _current.get()
+            if stats is not None and stats.endpoint_returned_at is not None:
+                stats.serialize_seconds += time.perf_counter() - stats.endpoint_returned_at
+                stats.endpoint_returned_at = None
+            return response
+
+        return instrumented_handler
+
+
+# --- Middleware ---
+def _route_template(scope) -> str:
+    # FastAPI deja la ruta elegida en el scope; sin ruta (404) se agrupa todo junto
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            route = _route_template(scope)
+            registry.observe(scope["method"], route, status, elapsed, size, stats)
+            if elapsed * 1000.0 >= SLOW_REQUEST_MS:
+                _log_slow(scope, route, status, elapsed, stats)
+
+
+def _log_slow(scope, route, status, elapsed, stats: RequestStats):
+    lines = [
+        f"Request lento: {scope['method']} {scope['path']} ({route}) -> {status} en {elapsed * 1000:.1f} ms; "
+        f"{stats.db_statements} sentencias SQL, {stats.db_seconds * 1000:.1f} ms en la base, "
+        f"{stats.serialize_seconds * 1000:.1f} ms serializando"
+    ]
+    for statement, seconds in stats.statements:
+        lines.append(f"  [{seconds * 1000:.1f} ms] {' '.join(statement.split())[:500]}")
+    if stats.db_statements > len(stats.statements):
+        lines.append(f"  ... y {stats.db_statements - len(stats.statements)} sentencias más")
+    logger.warning("\n".join(lines))
+
+
+# --- Prometheus ---
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render() -> str:
+    """Métricas por ruta en formato de texto de Prometheus."""
+    with registry._lock:
+        routes = [(key, _copy(entry)) for key, entry in sorted(registry.routes.items())]
+
+    requests_total = ["# TYPE http_requests_total counter"]
+    duration = ["# TYPE http_request_duration_seconds histogram"]
+    summaries = {
+        name: [f"# TYPE {name} summary"]
+        for name in ("http_request_db_statements", "http_request_db_seconds",
+                     "http_request_serialize_seconds", "http_response_size_bytes")
+    }
+    for (method, route), entry in routes:
+        labels = f'method="{method}",route="{_escape(route)}"'
+        for status, count in sorted(entry.statuses.items()):
+            requests_total.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, entry.buckets):
+            cumulative += count
+            duration.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        duration.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {entry.count}')
+        duration.append(f"http_request_duration_seconds_sum{{{labels}}} {round(entry.seconds, 6)}")
+        duration.append(f"http_request_duration_seconds_count{{{labels}}} {entry.count}")
+        for name, total in (
+            ("http_request_db_statements", entry.db_statements),
+            ("http_request_db_seconds", round(entry.db_seconds, 6)),
+            ("http_request_serialize_seconds", round(entry.serialize_seconds, 6)),
+            ("http_response_size_bytes", entry.response_bytes),
+        ):
+            summaries[name].append(f"{name}_sum{{{labels}}} {total}")
+            summaries[name].append(f"{name}_count{{{labels}}} {entry.count}")
+
+    lines = requests_total + duration
+    for block in summaries.values():
+        lines += block
+    return "\n".join(lines) + "\n"
+
+
+def _copy(entry: RouteStats) -> RouteStats:
+    copy = RouteStats()
+    for name in RouteStats.__slots__:
+        value = getattr(entry, name)
+        setattr(copy, name, value.copy() if isinstance(value, (list, dict)) else value)
+    return copy
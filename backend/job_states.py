@@ -0,0 +1,131 @@
+"""
+Máquina de estados de los trabajos: pendiente -> en_progreso -> completado / cancelado.
+
+Cada transición de TRANSITIONS se aplica con un único UPDATE ... WHERE ... RETURNING:
+el estado de origen, quién puede hacerla y las banderas de confirmación se evalúan en
+la base sobre la fila ya bloqueada, no en Python sobre una lectura anterior. Si dos
+requests llegan a la vez, el segundo espera el lock de fila y Postgres vuelve a evaluar
+su WHERE y su SET sobre la versión que dejó el primero, así no se pierden
+confirmaciones y el trabajo termina en `completado` cuando confirmaron ambas partes.
+
+Si el UPDATE no toca ninguna fila, una lectura aparte solo decide qué error devolver
+(404 / 403 / 400). Quién actúa sale del token (routers/jobs.py), no de un SELECT a users.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+from sqlalchemy import and_, case, or_, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+STATUSES = ("pendiente", "en_progreso", "completado", "cancelado")
+
+# Rol -> (columna del usuario, bandera de confirmación)
+_ACTORS = {
+    "contractor": (models.Job.contractor_id, models.Job.client_confirmed),
+    "vendor": (models.Job.vendor_id, models.Job.vendor_confirmed),
+}
+# Rol -> users.role que puede ocuparlo (viene en el token, ver auth.py)
+ACTOR_ROLES = {
+    "contractor": "contratador",
+    "vendor": "vendedor",
+}
+
+
+@dataclass(frozen=True)
+class Transition:
+    sources: Tuple[str, ...]
+    target: str
+    actors: Tuple[str, ...]
+    # Cada actor confirma por su lado; el estado cambia cuando confirmaron todos
+    needs_all_confirmations: bool = False
+    forbidden_detail: str = "Usuario no autorizado para este trabajo"
+    invalid_detail: str = "Transición de estado inválida"
+
+
+TRANSITIONS = {
+    "accept": Transition(
+        sources=("pendiente",),
+        target="en_progreso",
+        actors=("vendor",),
+        forbidden_detail="Solo el vendedor puede aceptar el trabajo",
+        invalid_detail="El trabajo no está pendiente",
+    ),
+    "complete": Transition(
+        sources=("en_progreso",),
+        target="completado",
+        actors=("contractor", "vendor"),
+        needs_all_confirmations=True,
+        invalid_detail="El trabajo no está en progreso",
+    ),
+    "cancel": Transition(
+        sources=("pendiente", "en_progreso"),
+        target="cancelado",
+        actors=("contractor", "vendor"),
+        invalid_detail="El trabajo ya está completado o cancelado",
+    ),
+}
+
+
+class JobTransitionError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def transition_statement(name: str, job_id: int, user_id: int):
+    """UPDATE condicional de la transición `name`, con RETURNING de la fila si se aplicó."""
+    spec = TRANSITIONS[name]
+    actors = [_ACTORS[actor] for actor in spec.actors]
+    values = {}
+    if spec.needs_all_confirmations:
+        # En el SET las columnas valen lo que tenía la fila antes del UPDATE
+        confirmed_after = []
+        for user_column, flag in actors:
+            after = or_(flag.is_(True), user_column.is_not_distinct_from(user_id))
+            values[flag.key] = after
+            confirmed_after.append(after)
+        values["status"] = case((and_(*confirmed_after), spec.target), else_=models.Job.status)
+    else:
+        values["status"] = spec.target
+
+    return (
+        update(models.Job)
+        .where(
+            models.Job.id == job_id,
+            models.Job.status.in_(spec.sources),
+            or_(*(user_column == user_id for user_column, _ in actors)),
+        )
+        .values(**values)
+        .returning(*models.Job.__table__.c)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply(db: Session, name: str, job_id: int, user_id: int, role: str = None) -> dict:
+    """
+    Aplica la transición y hace commit; devuelve las columnas del trabajo actualizado.
+
+    Con `role` (el del token), un usuario cuyo rol no puede hacer la transición se
+    rechaza con 403 sin tocar la base.
+    """
+    spec = TRANSITIONS[name]
+    if role is not None and role not in {ACTOR_ROLES[actor] for actor in spec.actors}:
+        raise JobTransitionError(403, spec.forbidden_detail)
+    row = db.execute(transition_statement(name, job_id, user_id)).mappings().first()
+    if row is None:
+        db.rollback()
+        raise _rejection(db, spec, job_id, user_id)
+    db.commit()
+    return dict(row)
+
+
+def _rejection(db: Session, spec: Transition, job_id: int, user_id: int) -> JobTransitionError:
+    job = db.get(models.Job, job_id)
+    if job is None:
+        return JobTransitionError(404, "Trabajo no encontrado")
+    if user_id not in (getattr(job, _ACTORS[actor][0].key) for actor in spec.actors):
+        return JobTransitionError(403, spec.forbidden_detail)
+    return JobTransitionError(400, spec.invalid_detail)
@@ -1,12 +1,45 @@
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from . import models
-from .database import engine
-from .routers import users, services, skills, jobs, reviews
+from . import auth, migrate, warmup
+from .ratelimit import AdmissionMiddleware
+from .instrumentation import InstrumentationMiddleware, InstrumentedRoute
+from .routers import users, services, skills, jobs, reviews, metrics, imports, exports, health
+from .skill_registry import registry as skill_registry
+from .suggest import index as suggest_index
 
-models.Base.metadata.create_all(bind=engine)
+# El esquema no se toca al arrancar (ver migrate.py); solo se avisa si falta migrar
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    migrate.warn_if_pending()
+    # Foto inicial del catálogo de skills; si falla, se carga en la primera lectura
+    try:
+        skill_registry.load()
+    except Exception:
+        logging.getLogger(__name__).exception("No se pudo cargar el catálogo de skills al arrancar")
+    # Índice del autocompletado (/services/suggest); si falla, se arma en la primera consulta
+    try:
+        suggest_index.load()
+    except Exception:
+        logging.getLogger(__name__).exception("No se pudo cargar el índice de autocompletado al arrancar")
+    # Tokens revocados (ver auth.py); si falla, se reintenta en segundo plano
+    try:
+        auth.revocations.load()
+    except Exception:
+        logging.getLogger(__name__).exception("No se pudo cargar la lista de tokens revocados al arrancar")
+    # Mappers, schemas y pools listos antes de /health/ready (ver warmup.py)
+    retry = await warmup.warm_up(app)
+    yield
+    if retry is not None:
+        retry.cancel()
 
-app = FastAPI(title="Backend de Marketplace de Servicios")
+app = FastAPI(
+    title="Backend de Marketplace de Servicios",
+    lifespan=lifespan,
+)
+# Rutas declaradas en la app; los routers pasan su propio route_class (ver instrumentation.py)
+app.router.route_class = InstrumentedRoute
 
 import os
 from dotenv import load_dotenv
@@ -23,20 +56,33 @@ allowed_origins_env = os.getenv("ALLOWED_ORIGINS")
 if allowed_origins_env:
     origins.extend([origin.strip() for origin in allowed_origins_env.split(",")])
 
+# --- Límites por cliente y tope de requests en curso (ver ratelimit.py) ---
+# Dentro de CORS, así los 429/503 llevan sus headers y el navegador puede leerlos
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,  # Usa la lista definida
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Search-Mode", "Retry-After"],  # cursor, modo de búsqueda y espera tras 429/503
 )
 
+# --- Instrumentación (latencia, SQL y tamaño por ruta; se expone en /metrics) ---
+# Se agrega al final para quedar afuera de todo y medir también a CORS
+app.add_middleware(InstrumentationMiddleware)
+
 # --- Rutas ---
 app.include_router(users.router)
 app.include_router(services.router)
 app.include_router(skills.router)
 app.include_router(jobs.router)
 app.include_router(reviews.router)
+app.include_router(metrics.router)
+app.include_router(imports.router)
+app.include_router(exports.router)
+app.include_router(health.router)
 
 @app.get("/")
 def root():
@@ -0,0 +1,282 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración es un módulo `backend/migrations/NNNN_nombre.py` con una función
+`upgrade(conn)`. Se aplican en orden, una sola vez, y quedan registradas en
+`schema_migrations`; un advisory lock evita que dos procesos migren a la vez.
+
+- Por defecto la migración corre en una transacción y se registra en la misma.
+- Con `TRANSACTIONAL = False` recibe una conexión en autocommit (para
+  `CREATE INDEX CONCURRENTLY` o backfills por lotes) y se registra al terminar;
+  tiene que poder re-ejecutarse si se interrumpe a la mitad.
+
+Cada migración guarda el SQL exacto que corre (copiado, no importado de los módulos
+de la app): una migración ya aplicada en producción tiene que hacer lo mismo en una
+base nueva aunque el código cambie después. Solo usa los helpers de este módulo.
+
+Los backfills (`backfill()`) actualizan por lotes de BACKFILL_BATCH_SIZE filas en
+orden de id, con un commit por lote, y guardan el último id en `schema_backfills`:
+si se cortan, retoman donde quedaron.
+
+El servidor no toca el esquema al arrancar; las migraciones se corren en el deploy:
+
+    python -m backend.migrate upgrade
+    python -m backend.migrate status
+
+Con DB_PGBOUNCER, apuntar DATABASE_URL a la conexión directa al correr las
+migraciones (el advisory lock es de sesión).
+"""
+import argparse
+import importlib
+import logging
+import os
+import pkgutil
+import re
+import sys
+import time
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from sqlalchemy.sql import text
+
+from . import migrations
+from .database import engine
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE") or 1000)
+BACKFILL_PAUSE_SECONDS = float(os.getenv("BACKFILL_PAUSE_SECONDS") or 0)
+
+# Clave arbitraria del advisory lock de migraciones
+LOCK_KEY = 7_310_001
+
+_MODULE_NAME = re.compile(r"^(\d{4})_(\w+)$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    module: object
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+    @property
+    def description(self) -> str:
+        doc = (self.module.__doc__ or "").strip()
+        return doc.splitlines()[0] if doc else self.name
+
+
+def discover():
+    """Migraciones de `backend/migrations`, ordenadas por versión."""
+    found = []
+    for info in pkgutil.iter_modules(migrations.__path__):
+        match = _MODULE_NAME.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{migrations.__name__}.{info.name}")
+        found.append(Migration(int(match.group(1)), match.group(2), module))
+    found.sort(key=lambda m: m.version)
+    versions = [m.version for m in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Hay dos migraciones con la misma versión")
+    return found
+
+
+def _ensure_tables(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            name TEXT PRIMARY KEY,
+            last_id BIGINT NOT NULL DEFAULT 0,
+            rows_done BIGINT NOT NULL DEFAULT 0,
+            finished_at TIMESTAMP
+        );
+    """))
+
+
+def applied_versions(conn) -> set:
+    exists = conn.execute(text("SELECT to_regclass('schema_migrations') IS NOT NULL")).scalar()
+    if not exists:
+        return set()
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def _record(conn, migration: Migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n) ON CONFLICT (version) DO NOTHING"),
+        {"v": migration.version, "n": migration.name},
+    )
+
+
+def upgrade(target: int = None, bind=None):
+    """Aplica las migraciones pendientes hasta `target` (inclusive; todas si es None)."""
+    bind = bind or engine
+    with bind.connect() as lock_conn:
+        lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": LOCK_KEY})
+        try:
+            _ensure_tables(lock_conn)
+            done = applied_versions(lock_conn)
+            for migration in discover():
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                print(f"{migration.version:04d} {migration.name}: aplicando")
+                start = time.perf_counter()
+                if migration.transactional:
+                    with bind.begin() as conn:
+                        migration.module.upgrade(conn)
+                        _record(conn, migration)
+                else:
+                    with bind.connect() as conn:
+                        conn.execution_options(isolation_level="AUTOCOMMIT")
+                        migration.module.upgrade(conn)
+                        _record(conn, migration)
+                print(f"{migration.version:04d} {migration.name}: ok ({time.perf_counter() - start:.1f}s)")
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": LOCK_KEY})
+
+
+def pending(bind=None):
+    """Migraciones aún no aplicadas (una sola consulta; sin lock)."""
+    bind = bind or engine
+    with bind.connect() as conn:
+        done = applied_versions(conn)
+    return [m for m in discover() if m.version not in done]
+
+
+def warn_if_pending(bind=None):
+    """Para el arranque del servidor: solo avisa, no migra."""
+    try:
+        missing = pending(bind)
+    except Exception:
+        logger.exception("No se pudo consultar el estado de las migraciones")
+        return
+    if missing:
+        logger.warning(
+            "Hay %d migraciones pendientes (%s); correr `python -m backend.migrate upgrade`",
+            len(missing), ", ".join(f"{m.version:04d}" for m in missing),
+        )
+
+
+# ==========================
+# Backfills por lotes
+# ==========================
+def backfill(conn, name: str, table: str, set_sql: str, where: str = "TRUE",
+             batch_size: int = None, pause: float = None) -> int:
+    """
+    UPDATE {table} SET {set_sql} por lotes de filas con id creciente que cumplan `where`.
+
+    `conn` debe estar en autocommit: cada lote es su propia transacción y no bloquea
+    la tabla entera. El avance queda en `schema_backfills`, así que volver a llamarla
+    con el mismo `name` retoma desde el último id procesado. Devuelve las filas
+    actualizadas en esta llamada.
+    """
+    batch_size = batch_size or BACKFILL_BATCH_SIZE
+    pause = BACKFILL_PAUSE_SECONDS if pause is None else pause
+    _ensure_tables(conn)
+    conn.execute(text("INSERT INTO schema_backfills (name) VALUES (:n) ON CONFLICT (name) DO NOTHING"), {"n": name})
+
+    total = 0
+    while True:
+        last_id, finished = conn.execute(
+            text("SELECT last_id, finished_at IS NOT NULL FROM schema_backfills WHERE name = :n"), {"n": name}
+        ).one()
+        if finished:
+            break
+        ids = conn.execute(text(f"""
+            WITH batch AS (
+                SELECT id FROM {table}
+                WHERE id > :last_id AND ({where})
+                ORDER BY id
+                LIMIT :batch_size
+            )
+            UPDATE {table} t SET {set_sql}
+            FROM batch
+            WHERE t.id = batch.id
+            RETURNING t.id
+        """), {"last_id": last_id, "batch_size": batch_size}).scalars().all()
+
+        if not ids:
+            conn.execute(text("UPDATE schema_backfills SET finished_at = NOW() WHERE name = :n"), {"n": name})
+            break
+        total += len(ids)
+        conn.execute(
+            text("UPDATE schema_backfills SET last_id = :last, rows_done = rows_done + :rows WHERE name = :n"),
+            {"last": max(ids), "rows": len(ids), "n": name},
+        )
+        logger.info("backfill %s: %d filas (último id %d)", name, total, max(ids))
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+# ==========================
+# Índices
+# ==========================
+def create_index(conn, name: str, ddl: str):
+    """
+    Corre `ddl` (un CREATE INDEX CONCURRENTLY IF NOT EXISTS) si el índice `name` falta.
+
+    Un build CONCURRENTLY cortado deja el índice inválido: se borra y se vuelve a crear.
+    `conn` tiene que estar en autocommit.
+    """
+    valid = conn.execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name},
+    ).scalar()
+    if valid:
+        return
+    if valid is False:
+        logger.info("%s: inválido, se reconstruye", name)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(ddl))
+    logger.info("%s: creado", name)
+
+
+# ==========================
+# CLI
+# ==========================
+def status(bind=None):
+    bind = bind or engine
+    with bind.connect() as conn:
+        done = applied_versions(conn)
+        backfills = []
+        if conn.execute(text("SELECT to_regclass('schema_backfills') IS NOT NULL")).scalar():
+            backfills = conn.execute(text(
+                "SELECT name, last_id, rows_done, finished_at FROM schema_backfills ORDER BY name"
+            )).all()
+    for migration in discover():
+        mark = "aplicada " if migration.version in done else "pendiente"
+        print(f"{migration.version:04d} {mark} {migration.name}: {migration.description}")
+    for name, last_id, rows_done, finished_at in backfills:
+        state = "terminado" if finished_at else f"en curso (último id {last_id})"
+        print(f"backfill {name}: {rows_done} filas, {state}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema")
+    sub = parser.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("upgrade", help="aplica las migraciones pendientes")
+    up.add_argument("--to", type=int, default=None, help="versión máxima a aplicar")
+    sub.add_parser("status", help="lista migraciones y backfills")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "upgrade":
+        upgrade(target=args.to)
+    else:
+        status()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+"""Completa search_vector de los servicios anteriores al trigger, por lotes."""
+from ..migrate import backfill
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # El trigger tsvectorupdate mantiene las filas nuevas; solo faltan las que quedaron en NULL
+    backfill(
+        conn,
+        "services.search_vector",
+        "services",
+        "search_vector = to_tsvector('spanish', coalesce(t.title,'') || ' ' || coalesce(t.description,''))",
+        where="search_vector IS NULL",
+    )
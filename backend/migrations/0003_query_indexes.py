@@ -0,0 +1,100 @@
+"""Índices de las consultas calientes, con CREATE INDEX CONCURRENTLY.
+
+La lista queda fija aquí; los índices que se agregaron después a models.py los crea
+la migración que agrega sus columnas.
+"""
+import logging
+
+from sqlalchemy.sql import text
+
+from ..migrate import create_index
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONAL = False
+
+INDEXES = [
+    ("idx_services_vendor_created", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_services_vendor_created
+        ON services (vendor_id, created_at DESC NULLS LAST, id DESC)
+    """),
+    ("idx_services_created_with_skill", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_services_created_with_skill
+        ON services (created_at DESC NULLS LAST, id DESC) WHERE skill_id IS NOT NULL
+    """),
+    ("idx_services_skill", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_services_skill ON services (skill_id)
+    """),
+    ("idx_jobs_vendor_created", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_vendor_created
+        ON jobs (vendor_id, created_at DESC NULLS LAST, id DESC)
+    """),
+    ("idx_jobs_contractor_created", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_contractor_created
+        ON jobs (contractor_id, created_at DESC NULLS LAST, id DESC)
+    """),
+    ("idx_jobs_vendor_status", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_vendor_status
+        ON jobs (vendor_id, status) INCLUDE (total_amount)
+    """),
+    ("idx_jobs_contractor_status", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_contractor_status
+        ON jobs (contractor_id, status) INCLUDE (total_amount)
+    """),
+    ("idx_jobs_service", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_jobs_service ON jobs (service_id)
+    """),
+    ("uq_reviews_job", """
+        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_reviews_job ON reviews (job_id)
+    """),
+    ("idx_payments_job", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payments_job ON payments (job_id)
+    """),
+    ("idx_user_skills_skill", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_skills_skill ON user_skills (skill_id)
+    """),
+]
+
+
+# uq_reviews_job no se puede crear con reseñas repetidas: queda la primera de cada trabajo
+# y las demás se mueven a reviews_dedupe_archive (no se pierden: un operador puede
+# revisarlas y restaurar la que corresponda). Los resúmenes de calificaciones se
+# recalculan sin ellas en la 0004, que siempre corre a continuación.
+ARCHIVE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS reviews_dedupe_archive (
+        LIKE reviews INCLUDING DEFAULTS,
+        archived_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+DEDUPE_REVIEWS_SQL = """
+    WITH removed AS (
+        DELETE FROM reviews r
+        USING reviews keep
+        WHERE r.job_id = keep.job_id AND r.id > keep.id
+        RETURNING r.*
+    ), archived AS (
+        INSERT INTO reviews_dedupe_archive
+        SELECT removed.*, NOW() FROM removed
+        RETURNING job_id
+    )
+    SELECT count(*) AS removed, array_agg(DISTINCT job_id ORDER BY job_id) AS job_ids FROM archived
+"""
+
+
+def _dedupe_reviews(conn):
+    conn.execute(text(ARCHIVE_TABLE_SQL))
+    row = conn.execute(text(DEDUPE_REVIEWS_SQL)).one()
+    if row.removed:
+        logger.warning(
+            "uq_reviews_job: %d reseñas repetidas movidas a reviews_dedupe_archive (trabajos: %s); "
+            "la 0004 recalcula los resúmenes de calificaciones",
+            row.removed, ", ".join(str(job_id) for job_id in row.job_ids),
+        )
+
+
+def upgrade(conn):
+    for name, ddl in INDEXES:
+        if name == "uq_reviews_job":
+            _dedupe_reviews(conn)
+        create_index(conn, name, ddl)
@@ -0,0 +1,35 @@
+"""Llena service_ratings y vendor_ratings a partir de las reseñas existentes."""
+from sqlalchemy.sql import text
+
+SQL = """
+-- Bloquea escrituras concurrentes de los resúmenes mientras se reconstruyen
+LOCK TABLE service_ratings IN EXCLUSIVE MODE;
+DELETE FROM service_ratings;
+INSERT INTO service_ratings (service_id, review_count, rating_sum, avg_rating)
+SELECT t.key_id, t.review_count, t.rating_sum, t.rating_sum::numeric / t.review_count
+FROM (
+    SELECT j.service_id AS key_id, COUNT(r.id) AS review_count, COALESCE(SUM(r.rating), 0) AS rating_sum
+    FROM reviews r
+    JOIN jobs j ON j.id = r.job_id
+    WHERE j.service_id IS NOT NULL AND r.rating IS NOT NULL
+    GROUP BY j.service_id
+) t
+WHERE t.review_count > 0;
+
+LOCK TABLE vendor_ratings IN EXCLUSIVE MODE;
+DELETE FROM vendor_ratings;
+INSERT INTO vendor_ratings (vendor_id, review_count, rating_sum, avg_rating)
+SELECT t.key_id, t.review_count, t.rating_sum, t.rating_sum::numeric / t.review_count
+FROM (
+    SELECT j.vendor_id AS key_id, COUNT(r.id) AS review_count, COALESCE(SUM(r.rating), 0) AS rating_sum
+    FROM reviews r
+    JOIN jobs j ON j.id = r.job_id
+    WHERE j.vendor_id IS NOT NULL AND r.rating IS NOT NULL
+    GROUP BY j.vendor_id
+) t
+WHERE t.review_count > 0;
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(SQL))
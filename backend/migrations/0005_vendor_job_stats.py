@@ -0,0 +1,97 @@
+"""Resumen de trabajos por vendedor (vendor_job_stats), sus triggers y el backfill."""
+from sqlalchemy.sql import text
+
+SQL = """
+CREATE TABLE IF NOT EXISTS vendor_job_stats (
+    vendor_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL,
+    job_count INT NOT NULL DEFAULT 0,
+    amount_sum NUMERIC(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (vendor_id, status)
+);
+
+-- Deltas de la sentencia agrupados por (vendedor, estado) y ordenados (mismo orden de
+-- locks en todas). En DELETE solo se descuenta: si el vendedor se está borrando, su
+-- resumen ya se fue en cascada y no hay que volver a insertarlo
+CREATE OR REPLACE FUNCTION vendor_job_stats_trigger_func() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO vendor_job_stats (vendor_id, status, job_count, amount_sum)
+        SELECT vendor_id, COALESCE(status, 'pendiente') AS status,
+               SUM(n) AS job_count, COALESCE(SUM(amount), 0) AS amount_sum
+        FROM (SELECT vendor_id, status, 1 AS n, total_amount AS amount FROM new_rows) d
+        WHERE vendor_id IS NOT NULL
+        GROUP BY vendor_id, COALESCE(status, 'pendiente')
+        HAVING SUM(n) <> 0 OR COALESCE(SUM(amount), 0) <> 0
+        ORDER BY vendor_id, status
+        ON CONFLICT (vendor_id, status) DO UPDATE SET
+            job_count = vendor_job_stats.job_count + EXCLUDED.job_count,
+            amount_sum = vendor_job_stats.amount_sum + EXCLUDED.amount_sum;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO vendor_job_stats (vendor_id, status, job_count, amount_sum)
+        SELECT vendor_id, COALESCE(status, 'pendiente') AS status,
+               SUM(n) AS job_count, COALESCE(SUM(amount), 0) AS amount_sum
+        FROM (
+            SELECT vendor_id, status, 1 AS n, total_amount AS amount FROM new_rows
+            UNION ALL
+            SELECT vendor_id, status, -1 AS n, -total_amount AS amount FROM old_rows
+        ) d
+        WHERE vendor_id IS NOT NULL
+        GROUP BY vendor_id, COALESCE(status, 'pendiente')
+        HAVING SUM(n) <> 0 OR COALESCE(SUM(amount), 0) <> 0
+        ORDER BY vendor_id, status
+        ON CONFLICT (vendor_id, status) DO UPDATE SET
+            job_count = vendor_job_stats.job_count + EXCLUDED.job_count,
+            amount_sum = vendor_job_stats.amount_sum + EXCLUDED.amount_sum;
+    ELSE
+        UPDATE vendor_job_stats s
+        SET job_count = s.job_count + d.job_count, amount_sum = s.amount_sum + d.amount_sum
+        FROM (
+            SELECT vendor_id, COALESCE(status, 'pendiente') AS status,
+                   SUM(n) AS job_count, COALESCE(SUM(amount), 0) AS amount_sum
+            FROM (SELECT vendor_id, status, -1 AS n, -total_amount AS amount FROM old_rows) d
+            WHERE vendor_id IS NOT NULL
+            GROUP BY vendor_id, COALESCE(status, 'pendiente')
+            HAVING SUM(n) <> 0 OR COALESCE(SUM(amount), 0) <> 0
+            ORDER BY vendor_id, status
+        ) d
+        WHERE s.vendor_id = d.vendor_id AND s.status = d.status;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS vendor_job_stats_insert ON jobs;
+CREATE TRIGGER vendor_job_stats_insert AFTER INSERT ON jobs
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_job_stats_trigger_func();
+
+DROP TRIGGER IF EXISTS vendor_job_stats_update ON jobs;
+CREATE TRIGGER vendor_job_stats_update AFTER UPDATE ON jobs
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_job_stats_trigger_func();
+
+DROP TRIGGER IF EXISTS vendor_job_stats_delete ON jobs;
+CREATE TRIGGER vendor_job_stats_delete AFTER DELETE ON jobs
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION vendor_job_stats_trigger_func();
+
+-- Backfill en la misma transacción que los triggers: ningún trabajo queda sin contar.
+-- SHARE bloquea las escrituras a jobs mientras se reconstruye
+LOCK TABLE jobs IN SHARE MODE;
+DELETE FROM vendor_job_stats;
+INSERT INTO vendor_job_stats (vendor_id, status, job_count, amount_sum)
+SELECT t.vendor_id, t.status, t.job_count, t.amount_sum
+FROM (
+    SELECT vendor_id, COALESCE(status, 'pendiente') AS status,
+           COUNT(*) AS job_count, COALESCE(SUM(total_amount), 0) AS amount_sum
+    FROM jobs
+    WHERE vendor_id IS NOT NULL
+    GROUP BY vendor_id, COALESCE(status, 'pendiente')
+) t
+JOIN users u ON u.id = t.vendor_id;
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(SQL))
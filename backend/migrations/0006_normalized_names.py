@@ -0,0 +1,43 @@
+"""Columnas normalizadas (lower + unaccent) de títulos y skills para la búsqueda difusa.
+
+Las filas existentes se completan en la migración 0007, por lotes, junto con los
+índices de trigramas.
+"""
+from sqlalchemy.sql import text
+
+SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() es STABLE (depende del diccionario por defecto); con el diccionario fijo
+-- se puede declarar IMMUTABLE y usar en índices y columnas mantenidas
+CREATE OR REPLACE FUNCTION normalize_search_text(value text) RETURNS text AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, coalesce(value, '')))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+ALTER TABLE services ADD COLUMN IF NOT EXISTS title_normalized TEXT;
+ALTER TABLE skills ADD COLUMN IF NOT EXISTS name_normalized TEXT;
+
+CREATE OR REPLACE FUNCTION tsvector_update_trigger_func() RETURNS trigger AS $$
+BEGIN
+  new.search_vector := to_tsvector('spanish', coalesce(new.title,'') || ' ' || coalesce(new.description,''));
+  new.title_normalized := normalize_search_text(new.title);
+  return new;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION skills_name_normalized_func() RETURNS trigger AS $$
+BEGIN
+  new.name_normalized := normalize_search_text(new.name);
+  return new;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS skills_name_normalized ON skills;
+CREATE TRIGGER skills_name_normalized BEFORE INSERT OR UPDATE OF name
+ON skills FOR EACH ROW EXECUTE FUNCTION skills_name_normalized_func();
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(SQL))
@@ -0,0 +1,30 @@
+"""Completa title_normalized / name_normalized por lotes y crea los índices de trigramas."""
+from ..migrate import backfill, create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # Los triggers de la 0006 mantienen las filas nuevas; solo faltan las anteriores
+    backfill(
+        conn,
+        "services.title_normalized",
+        "services",
+        "title_normalized = normalize_search_text(t.title)",
+        where="title_normalized IS NULL",
+    )
+    backfill(
+        conn,
+        "skills.name_normalized",
+        "skills",
+        "name_normalized = normalize_search_text(t.name)",
+        where="name_normalized IS NULL",
+    )
+    create_index(conn, "idx_services_title_trgm", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_services_title_trgm
+        ON services USING gin (title_normalized gin_trgm_ops)
+    """)
+    create_index(conn, "idx_skills_name_trgm", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_skills_name_trgm
+        ON skills USING gin (name_normalized gin_trgm_ops)
+    """)
@@ -0,0 +1,122 @@
+"""Coordenadas de usuarios y servicios, nomenclátor y sus triggers (ver geo.py).
+
+Las filas existentes se geocodifican en la migración 0009, por lotes, junto con los
+índices GiST.
+"""
+import csv
+import os
+
+from sqlalchemy.sql import text
+
+SQL = """
+CREATE TABLE IF NOT EXISTS gazetteer (
+    name_normalized TEXT NOT NULL,
+    place TEXT NOT NULL,
+    country TEXT NOT NULL,
+    country_normalized TEXT NOT NULL,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    population INT,
+    PRIMARY KEY (name_normalized, country_normalized, place)
+);
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+ALTER TABLE services ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE services ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+
+-- Distancia sobre la esfera (haversine), en km
+CREATE OR REPLACE FUNCTION geo_distance_km(lat1 float8, lon1 float8, lat2 float8, lon2 float8)
+RETURNS float8 AS $$
+    SELECT 2 * 6371.0088 * asin(sqrt(least(1.0,
+        sin(radians(lat2 - lat1) / 2) ^ 2
+        + cos(radians(lat1)) * cos(radians(lat2)) * sin(radians(lon2 - lon1) / 2) ^ 2
+    )))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- "Zona 10, Ciudad de Guatemala" -> primera parte que esté en el nomenclátor
+CREATE OR REPLACE FUNCTION geocode_location(value text, OUT latitude float8, OUT longitude float8) AS $$
+    WITH parts AS (
+        SELECT regexp_replace(btrim(p.part), '\\s+', ' ', 'g') AS name, p.pos
+        FROM regexp_split_to_table(normalize_search_text(value), ',') WITH ORDINALITY AS p(part, pos)
+    ), countries AS (
+        SELECT DISTINCT g.country_normalized
+        FROM gazetteer g JOIN parts p ON p.name = g.country_normalized
+    )
+    SELECT g.latitude, g.longitude
+    FROM parts p
+    JOIN gazetteer g ON g.name_normalized = p.name
+    WHERE NOT EXISTS (SELECT 1 FROM countries)
+       OR g.country_normalized IN (SELECT country_normalized FROM countries)
+    ORDER BY p.pos, g.population DESC NULLS LAST
+    LIMIT 1
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION users_geocode_func() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND new.location IS NOT DISTINCT FROM old.location THEN
+    return new;
+  END IF;
+  SELECT g.latitude, g.longitude INTO new.latitude, new.longitude FROM geocode_location(new.location) g;
+  return new;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_geocode ON users;
+CREATE TRIGGER users_geocode BEFORE INSERT OR UPDATE OF location
+ON users FOR EACH ROW EXECUTE FUNCTION users_geocode_func();
+
+CREATE OR REPLACE FUNCTION users_geo_to_services_func() RETURNS trigger AS $$
+BEGIN
+  UPDATE services SET latitude = new.latitude, longitude = new.longitude WHERE vendor_id = new.id;
+  return NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_geo_to_services ON users;
+CREATE TRIGGER users_geo_to_services AFTER UPDATE ON users FOR EACH ROW
+WHEN (old.latitude IS DISTINCT FROM new.latitude OR old.longitude IS DISTINCT FROM new.longitude)
+EXECUTE FUNCTION users_geo_to_services_func();
+
+CREATE OR REPLACE FUNCTION services_vendor_geo_func() RETURNS trigger AS $$
+BEGIN
+  SELECT u.latitude, u.longitude INTO new.latitude, new.longitude FROM users u WHERE u.id = new.vendor_id;
+  return new;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS services_vendor_geo ON services;
+CREATE TRIGGER services_vendor_geo BEFORE INSERT OR UPDATE OF vendor_id
+ON services FOR EACH ROW EXECUTE FUNCTION services_vendor_geo_func();
+"""
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.csv")
+
+
+def _load_gazetteer(conn):
+    # Una fila por nombre y por cada alias del CSV
+    rows = []
+    with open(GAZETTEER_PATH, encoding="utf-8", newline="") as f:
+        for place in csv.DictReader(f):
+            names = [place["name"], *filter(None, (a.strip() for a in place["aliases"].split("|")))]
+            for name in names:
+                rows.append({
+                    "name": name,
+                    "place": place["name"],
+                    "country": place["country"],
+                    "latitude": float(place["latitude"]),
+                    "longitude": float(place["longitude"]),
+                    "population": int(place["population"]) if place["population"] else None,
+                })
+    conn.execute(text("DELETE FROM gazetteer"))
+    conn.execute(text("""
+        INSERT INTO gazetteer (name_normalized, place, country, country_normalized, latitude, longitude, population)
+        VALUES (normalize_search_text(:name), :place, :country, normalize_search_text(:country),
+                :latitude, :longitude, :population)
+        ON CONFLICT DO NOTHING
+    """), rows)
+
+
+def upgrade(conn):
+    conn.execute(text(SQL))
+    _load_gazetteer(conn)
@@ -0,0 +1,32 @@
+"""Geocodifica los usuarios existentes, copia sus coordenadas a los servicios y crea los índices GiST."""
+from ..migrate import backfill, create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    # Los triggers de la 0008 mantienen las filas nuevas; solo faltan las anteriores.
+    # Al cambiar las coordenadas de un vendedor, users_geo_to_services ya actualiza sus servicios
+    backfill(
+        conn,
+        "users.latitude",
+        "users",
+        "(latitude, longitude) = (SELECT g.latitude, g.longitude FROM geocode_location(t.location) g)",
+        where="location IS NOT NULL AND latitude IS NULL",
+    )
+    # Servicios de vendedores que ya tenían coordenadas o que no las cambiaron
+    backfill(
+        conn,
+        "services.latitude",
+        "services",
+        "(latitude, longitude) = (SELECT u.latitude, u.longitude FROM users u WHERE u.id = t.vendor_id)",
+        where="latitude IS NULL AND vendor_id IS NOT NULL",
+    )
+    create_index(conn, "idx_users_geo", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_geo
+        ON users USING gist (point(longitude, latitude))
+    """)
+    create_index(conn, "idx_services_geo", """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_services_geo
+        ON services USING gist (point(longitude, latitude))
+    """)
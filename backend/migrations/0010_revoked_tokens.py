@@ -0,0 +1,16 @@
+"""Tokens de acceso revocados antes de vencer (logout), ver auth.py."""
+from sqlalchemy.sql import text
+
+SQL = """
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    user_id INT REFERENCES users(id) ON DELETE CASCADE,
+    expires_at TIMESTAMPTZ NOT NULL,
+    revoked_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at);
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(SQL))
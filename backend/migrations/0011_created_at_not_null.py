@@ -0,0 +1,41 @@
+"""created_at NOT NULL DEFAULT NOW() en users, services, jobs, reviews y payments.
+
+Con la columna NOT NULL el cursor de los listados es la comparación de filas
+`(created_at, id) < (:v, :id)`, un solo rango del índice. Las filas viejas sin fecha
+quedaban al final de los listados (NULLS LAST): se completan, por lotes, con la fecha
+más antigua de su tabla, así conservan su lugar.
+
+SET NOT NULL se apoya en un CHECK validado aparte (sin bloquear escrituras mientras
+recorre la tabla) y luego se borra.
+"""
+from sqlalchemy.sql import text
+
+from ..migrate import backfill
+
+TRANSACTIONAL = False
+
+TABLES = ("users", "services", "jobs", "reviews", "payments")
+
+
+def _fill_value(conn, table: str) -> str:
+    oldest = conn.execute(text(f"SELECT min(created_at) FROM {table}")).scalar()
+    return f"TIMESTAMP '{oldest.isoformat(sep=' ')}'" if oldest is not None else "NOW()"
+
+
+def upgrade(conn):
+    for table in TABLES:
+        constraint = f"{table}_created_at_not_null"
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN created_at SET DEFAULT NOW()"))
+        fill = _fill_value(conn, table)
+        backfill(conn, f"{table}.created_at", table, f"created_at = {fill}", where="created_at IS NULL")
+        # Lo que se haya insertado sin fecha durante el backfill
+        conn.execute(text(f"UPDATE {table} SET created_at = {fill} WHERE created_at IS NULL"))
+
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": constraint}
+        ).scalar()
+        if not exists:
+            conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK (created_at IS NOT NULL) NOT VALID"))
+        conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}"))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN created_at SET NOT NULL"))
+        conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}"))
@@ -0,0 +1 @@
+"""Migraciones versionadas; ver backend/migrate.py."""
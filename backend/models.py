@@ -1,8 +1,9 @@
 from sqlalchemy import (
     Column, Integer, String, Text, ForeignKey, Numeric,
-    Boolean, Date, TIMESTAMP
+    Boolean, Date, TIMESTAMP, Index, Float, func
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from .database import Base
 
 # ==========================
@@ -19,10 +20,17 @@ class User(Base):
     role = Column(String(20), nullable=False)  # vendedor / contratador
     profile_picture_url = Column(Text)  # URL or path to profile picture
     location = Column(String(200))  # User location
+    # Geocodificadas desde `location` con el nomenclátor (trigger users_geocode, ver geo.py)
+    latitude = Column(Float)
+    longitude = Column(Float)
     bio = Column(Text)  # User biography
-    created_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
     updated_at = Column(TIMESTAMP)
 
+    __table_args__ = (
+        Index("idx_users_geo", func.point(longitude, latitude), postgresql_using="gist"),
+    )
+
     # Relaciones
     skills = relationship("UserSkill", back_populates="user")
     services = relationship("Service", back_populates="vendor", cascade="all, delete-orphan")
@@ -39,9 +47,16 @@ class Skill(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, nullable=False)
     description = Column(Text)
+    # lower(unaccent(name)) para la búsqueda por trigramas; la mantiene un trigger (migración 0006)
+    name_normalized = deferred(Column(Text))
 
     users = relationship("UserSkill", back_populates="skill")
 
+    __table_args__ = (
+        Index("idx_skills_name_trgm", "name_normalized", postgresql_using="gin",
+              postgresql_ops={"name_normalized": "gin_trgm_ops"}),
+    )
+
 
 # ==========================
 # Relación Usuario-Habilidad
@@ -70,12 +85,39 @@ class Service(Base):
     price = Column(Numeric(10, 2), nullable=False)
     is_active = Column(Boolean, default=True)
     image_url = Column(Text, nullable=True)  # Nueva: foto del servicio
-    created_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+    # Mantenida por el trigger tsvectorupdate (ver migrations/0001_baseline.py); no se carga por defecto
+    search_vector = deferred(Column(TSVECTOR))
+    # lower(unaccent(title)) para la búsqueda por trigramas; la mantiene el mismo trigger
+    title_normalized = deferred(Column(Text))
+    # Copia de las coordenadas del vendedor (triggers de geo.py), para filtrar sin JOIN
+    latitude = Column(Float)
+    longitude = Column(Float)
+
+    __table_args__ = (
+        Index("idx_services_search_vector", "search_vector", postgresql_using="gin"),
+        Index("idx_services_title_trgm", "title_normalized", postgresql_using="gin",
+              postgresql_ops={"title_normalized": "gin_trgm_ops"}),
+        Index("idx_services_geo", func.point(longitude, latitude), postgresql_using="gist"),
+    )
 
     # Relaciones
     vendor = relationship("User", back_populates="services")
     skill = relationship("Skill")  # relación directa con Skill
     jobs = relationship("Job", back_populates="service", cascade="all, delete-orphan")
+    rating_summary = relationship("ServiceRating", uselist=False, viewonly=True)
+
+    # Valores de service_ratings expuestos en ServiceOut (0 si aún no hay reseñas)
+    @property
+    def avg_rating(self):
+        summary = self.rating_summary
+        if summary is None or summary.avg_rating is None:
+            return 0.0
+        return float(summary.avg_rating)
+
+    @property
+    def review_count(self):
+        return self.rating_summary.review_count if self.rating_summary is not None else 0
 
 
 # ==========================
@@ -94,7 +136,7 @@ class Job(Base):
     total_amount = Column(Numeric(10, 2))
     client_confirmed = Column(Boolean, default=False)
     vendor_confirmed = Column(Boolean, default=False)
-    created_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
 
     service = relationship("Service", back_populates="jobs")
     contractor_user = relationship("User", back_populates="jobs_as_contractor", foreign_keys=[contractor_id])
@@ -113,7 +155,7 @@ class Review(Base):
     job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"))
     rating = Column(Integer)
     comment = Column(Text)
-    created_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
 
     job = relationship("Job", back_populates="reviews")
 
@@ -129,6 +171,90 @@ class Payment(Base):
     amount = Column(Numeric(10, 2), nullable=False)
     method = Column(String(50))
     status = Column(String(20), default="pendiente")
-    created_at = Column(TIMESTAMP)
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
 
     job = relationship("Job", back_populates="payments")
+
+
+# ==========================
+# Índices de consultas
+# ==========================
+# Alineados con el orden de los listados (pagination.created_desc: created_at DESC
+# NULLS LAST, id DESC) para que cada página salga del índice sin ordenar. created_at
+# es NOT NULL desde la migración 0011; el NULLS LAST queda para no rehacer los índices. Ver
+# indexes.py para crearlos en una base existente y verificar los planes.
+Index(
+    "idx_services_vendor_created",
+    Service.vendor_id, Service.created_at.desc().nulls_last(), Service.id.desc(),
+)
+Index(
+    "idx_services_created_with_skill",
+    Service.created_at.desc().nulls_last(), Service.id.desc(),
+    postgresql_where=Service.skill_id.isnot(None),
+)
+Index("idx_services_skill", Service.skill_id)
+Index(
+    "idx_jobs_vendor_created",
+    Job.vendor_id, Job.created_at.desc().nulls_last(), Job.id.desc(),
+)
+Index(
+    "idx_jobs_contractor_created",
+    Job.contractor_id, Job.created_at.desc().nulls_last(), Job.id.desc(),
+)
+# Conteos y montos por estado (dashboards) sin tocar la tabla
+Index("idx_jobs_vendor_status", Job.vendor_id, Job.status, postgresql_include=["total_amount"])
+Index("idx_jobs_contractor_status", Job.contractor_id, Job.status, postgresql_include=["total_amount"])
+Index("idx_jobs_service", Job.service_id)
+# Una reseña por trabajo (routers/reviews.py inserta con ON CONFLICT DO NOTHING sobre este índice)
+Index("uq_reviews_job", Review.job_id, unique=True)
+Index("idx_payments_job", Payment.job_id)
+Index("idx_user_skills_skill", UserSkill.skill_id)
+
+
+# ==========================
+# Resumen de calificaciones
+# ==========================
+# Agregados mantenidos de forma incremental al crear reseñas (ver ratings.py)
+class ServiceRating(Base):
+    __tablename__ = "service_ratings"
+
+    service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    avg_rating = Column(Numeric)
+
+
+class VendorRating(Base):
+    __tablename__ = "vendor_ratings"
+
+    vendor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    avg_rating = Column(Numeric)
+
+
+# ==========================
+# Resumen de trabajos por vendedor
+# ==========================
+# Cantidad y monto de trabajos por (vendedor, estado), mantenidos por triggers sobre
+# jobs (ver dashboard.py)
+class VendorJobStats(Base):
+    __tablename__ = "vendor_job_stats"
+
+    vendor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String(20), primary_key=True)
+    job_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+# ==========================
+# Tokens revocados
+# ==========================
+# Tokens de acceso revocados antes de vencer (ver auth.py)
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(Text, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    revoked_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -0,0 +1,304 @@
+"""
+Paginación por keyset (cursor) compartida por todos los endpoints de listas.
+
+Cada listado se ordena por columnas estables que terminan en `id`, p.ej.
+`(created_at DESC, id DESC)` o `(price ASC, id ASC)`. El cursor es opaco para el
+cliente: codifica los valores de esas columnas de la última fila devuelta, y la
+página siguiente se pide con `WHERE (cols) después de (valores)` + `LIMIT`, así que
+una página profunda cuesta lo mismo que la primera.
+
+El cuerpo de la respuesta sigue siendo la lista; el cursor de la página siguiente
+viaja en la cabecera `X-Next-Cursor` (ausente en la última página).
+
+Uso con el ORM:
+
+    page = pagination.paginate_query(query, params, pagination.created_desc(models.Job))
+
+Con `select()` y AsyncSession:
+
+    stmt, keyset = pagination.keyset_statement(stmt, params, pagination.created_desc(models.Job))
+    page = keyset.page((await db.execute(stmt)).scalars().all())
+
+Uso con SQL crudo:
+
+    keyset = pagination.Keyset([Key("s.price"), Key("s.id")], params, tag="price_asc")
+    where_sql, bind = keyset.where()
+    ... ORDER BY {keyset.order_by()} LIMIT {keyset.fetch_limit}
+    page = keyset.page(rows)
+"""
+import base64
+import bisect
+import binascii
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy.sql import text
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# ==========================
+# Parámetros de página
+# ==========================
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_LIMIT
+    cursor: Optional[str] = None
+
+
+def page_params(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="Máximo de elementos por página"),
+    cursor: Optional[str] = Query(None, description=f"Cursor opaco devuelto en {NEXT_CURSOR_HEADER}"),
+) -> PageParams:
+    """Dependencia de FastAPI con los parámetros `limit` y `cursor`."""
+    return PageParams(limit=limit, cursor=cursor)
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    next_cursor: Optional[str] = None
+
+    def as_result(self):
+        """(items, cabeceras) para las vistas cacheadas de cache.py."""
+        return self.items, {NEXT_CURSOR_HEADER: self.next_cursor}
+
+
+def apply_to_response(response: Response, page: Page):
+    """Pone el cursor de la página siguiente en la cabecera y devuelve los elementos."""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+# ==========================
+# Codificación del cursor
+# ==========================
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("tipo de valor desconocido")
+    return value
+
+
+def encode_cursor(tag: str, values: list) -> str:
+    payload = json.dumps({"k": tag, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def peek_cursor_tag(cursor: str) -> Optional[str]:
+    """Ordenamiento con que se armó un cursor, o None si no se puede leer."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload.get("k") if isinstance(payload, dict) else None
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+def decode_cursor(cursor: str, tag: str, size: int) -> list:
+    """Decodifica un cursor; responde 400 si es inválido o de otro ordenamiento."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload.get("k") != tag or len(payload.get("v", [])) != size:
+            raise ValueError("cursor de otro ordenamiento")
+        return [_decode_value(v) for v in payload["v"]]
+    except (ValueError, TypeError, AttributeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+# ==========================
+# Keyset
+# ==========================
+@dataclass
+class Key:
+    """
+    Columna de ordenamiento.
+
+    `expr` es SQL (p.ej. "s.price") o una columna del ORM; `attr` es el nombre con el
+    que se lee el valor de cada fila (por defecto el nombre de la columna). Las
+    columnas que admiten NULL se ordenan con NULLS LAST; `nulls_last=True` lo fuerza
+    en una columna NOT NULL para que el ORDER BY coincida con un índice declarado así.
+    """
+    expr: Any
+    desc: bool = False
+    nullable: Optional[bool] = None
+    attr: Optional[str] = None
+    nulls_last: Optional[bool] = None
+
+    def __post_init__(self):
+        if not isinstance(self.expr, str):
+            column = self.expr
+            self.expr = f"{column.table.name}.{column.name}"
+            if self.nullable is None:
+                self.nullable = bool(column.nullable) and not column.primary_key
+            if self.attr is None:
+                self.attr = column.key
+        if self.nullable is None:
+            self.nullable = False
+        if self.attr is None:
+            self.attr = self.expr.rsplit(".", 1)[-1]
+        if self.nulls_last is None:
+            self.nulls_last = self.nullable
+
+
+@dataclass
+class Keyset:
+    keys: List[Key]
+    params: PageParams
+    tag: str = "default"
+    prefix: str = "ks"
+    _values: Optional[list] = field(default=None, init=False)
+
+    def __post_init__(self):
+        if self.params.cursor:
+            self._values = decode_cursor(self.params.cursor, self.tag, len(self.keys))
+
+    @property
+    def fetch_limit(self) -> int:
+        # Se pide una fila de más para saber si hay página siguiente
+        return self.params.limit + 1
+
+    def order_by(self, alias: Optional[str] = None) -> str:
+        """ORDER BY de las claves; con `alias`, sobre las columnas ya proyectadas
+        (`alias.attr`), p.ej. para ordenar afuera de una consulta que envuelve la página."""
+        parts = []
+        for key in self.keys:
+            expr = f"{alias}.{key.attr}" if alias else key.expr
+            direction = "DESC" if key.desc else "ASC"
+            nulls = " NULLS LAST" if key.nulls_last else ""
+            parts.append(f"{expr} {direction}{nulls}")
+        return ", ".join(parts)
+
+    def where(self):
+        """Devuelve (sql, params) con la condición "después del cursor"; TRUE si no hay cursor."""
+        if self._values is None:
+            return "TRUE", {}
+
+        params = {f"{self.prefix}{i}": v for i, v in enumerate(self._values)}
+        names = list(params)
+
+        # Caso común (sin NULLs, misma dirección): comparación de filas, usa el índice directamente
+        if not any(k.nullable for k in self.keys) and len({k.desc for k in self.keys}) == 1:
+            op = "<" if self.keys[0].desc else ">"
+            cols = ", ".join(k.expr for k in self.keys)
+            binds = ", ".join(f":{n}" for n in names)
+            return f"({cols}) {op} ({binds})", params
+
+        # Caso general: OR de (prefijo igual AND columna k posterior)
+        branches = []
+        for i, key in enumerate(self.keys):
+            conds = []
+            for prev, name in zip(self.keys[:i], names[:i]):
+                if params[name] is None:
+                    conds.append(f"{prev.expr} IS NULL")
+                else:
+                    conds.append(f"{prev.expr} = :{name}")
+            after = self._after(key, names[i], params[names[i]])
+            if after is None:
+                continue
+            conds.append(after)
+            branches.append("(" + " AND ".join(conds) + ")")
+        if not branches:
+            return "FALSE", {}
+        sql = "(" + " OR ".join(branches) + ")"
+        return sql, {n: v for n, v in params.items() if f":{n}" in sql}
+
+    @staticmethod
+    def _after(key: Key, name: str, value):
+        # Con NULLS LAST no hay nada después de un NULL en esa columna
+        if value is None:
+            return None
+        op = "<" if key.desc else ">"
+        cond = f"{key.expr} {op} :{name}"
+        if key.nullable:
+            cond = f"({cond} OR {key.expr} IS NULL)"
+        return cond
+
+    def page(self, rows) -> Page:
+        """Recorta la fila extra y arma el cursor a partir de la última fila devuelta."""
+        rows = list(rows)
+        if len(rows) <= self.params.limit:
+            return Page(items=rows)
+        items = rows[: self.params.limit]
+        last = items[-1]
+        values = [_row_value(last, key.attr) for key in self.keys]
+        return Page(items=items, next_cursor=encode_cursor(self.tag, values))
+
+
+def _row_value(row, attr):
+    if isinstance(row, Mapping):
+        return row[attr]
+    return getattr(row, attr)
+
+
+def keyset_statement(stmt, params: PageParams, keys: List[Key], tag: str = "default"):
+    """
+    Aplica keyset + límite a un `Query` o `select()` del ORM.
+
+    Devuelve (stmt, keyset); con las filas obtenidas, `keyset.page(rows)` arma la página.
+    """
+    keyset = Keyset(keys, params, tag=tag)
+    where_sql, bind = keyset.where()
+    if bind:
+        stmt = stmt.filter(text(where_sql).bindparams(**bind))
+    stmt = stmt.order_by(text(keyset.order_by())).limit(keyset.fetch_limit)
+    return stmt, keyset
+
+
+def paginate_query(query, params: PageParams, keys: List[Key], tag: str = "default") -> Page:
+    """Aplica keyset + límite a una consulta del ORM y devuelve la página."""
+    query, keyset = keyset_statement(query, params, keys, tag=tag)
+    return keyset.page(query.all())
+
+
+def paginate_sequence(items, params: PageParams, key, tag: str = "default") -> Page:
+    """
+    Keyset sobre una secuencia en memoria ya ordenada de forma ascendente por `key`.
+
+    `key(item)` devuelve la tupla de ordenamiento (p.ej. `(skill.id,)`).
+    """
+    start = 0
+    if params.cursor:
+        sample = key(items[0]) if items else ()
+        after = tuple(decode_cursor(params.cursor, tag, len(sample) or 1))
+        start = bisect.bisect_right([key(item) for item in items], after)
+    chunk = list(items[start:start + params.limit + 1])
+    if len(chunk) <= params.limit:
+        return Page(items=chunk)
+    chunk = chunk[: params.limit]
+    return Page(items=chunk, next_cursor=encode_cursor(tag, list(key(chunk[-1]))))
+
+
+def created_desc(model) -> List[Key]:
+    """Orden estándar de listados: más recientes primero, desempate por id."""
+    return [Key(model.created_at, desc=True, nulls_last=True), Key(model.id, desc=True)]
+
+
+def created_desc_sql(alias: str) -> List[Key]:
+    """`created_desc` para SQL crudo sobre una tabla con alias (p.ej. "s")."""
+    return [Key(f"{alias}.created_at", desc=True, nulls_last=True), Key(f"{alias}.id", desc=True)]
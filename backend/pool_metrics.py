@@ -0,0 +1,100 @@
+"""
+Métricas del pool de conexiones de SQLAlchemy.
+
+`InstrumentedQueuePool` mide cuánto espera cada checkout por una conexión libre y
+cuántos terminan en timeout; los eventos del pool cuentan conexiones nuevas,
+checkouts e invalidaciones. `render()` devuelve todo en formato de texto de
+Prometheus para el endpoint `/metrics`.
+"""
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            if seconds > self.wait_seconds_max:
+                self.wait_seconds_max = seconds
+            if timed_out:
+                self.timeouts += 1
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que registra el tiempo de espera de cada checkout."""
+
+    _local = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get se llama a sí mismo en algunas carreras; solo se mide la llamada externa
+        if getattr(self._local, "active", False):
+            return super()._do_get()
+        self._local.active = True
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        finally:
+            self._local.active = False
+        stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+def install(engine):
+    """Registra los listeners de eventos del pool del engine."""
+    event.listen(engine, "connect", lambda *a: stats.incr("connects"))
+    event.listen(engine, "checkout", lambda *a: stats.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *a: stats.incr("checkins"))
+    event.listen(engine, "invalidate", lambda *a: stats.incr("invalidations"))
+
+
+def render(engine) -> str:
+    """Métricas del pool en formato de texto de Prometheus."""
+    pool = engine.pool
+    gauges = {}
+    if isinstance(pool, QueuePool):
+        gauges = {
+            "db_pool_size": pool.size(),
+            "db_pool_checked_out": pool.checkedout(),
+            "db_pool_checked_in": pool.checkedin(),
+            # overflow() es negativo mientras no se usa el overflow
+            "db_pool_overflow": max(pool.overflow(), 0),
+        }
+    counters = {
+        "db_pool_connects_total": stats.connects,
+        "db_pool_checkouts_total": stats.checkouts,
+        "db_pool_checkins_total": stats.checkins,
+        "db_pool_invalidations_total": stats.invalidations,
+        "db_pool_timeouts_total": stats.timeouts,
+        "db_pool_wait_seconds_total": round(stats.wait_seconds_total, 6),
+    }
+    lines = []
+    for name, value in gauges.items():
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    for name, value in counters.items():
+        lines += [f"# TYPE {name} counter", f"{name} {value}"]
+    lines += ["# TYPE db_pool_wait_seconds_max gauge", f"db_pool_wait_seconds_max {round(stats.wait_seconds_max, 6)}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,174 @@
+"""
+Conteo de sentencias SQL para detectar N+1 en pruebas.
+
+    from backend.query_budget import assert_max_queries
+
+    with assert_max_queries(2):
+        client.get("/jobs/")
+
+Si el bloque ejecuta más sentencias que el presupuesto, lanza AssertionError con la
+lista de SQL ejecutado. Escucha los eventos de los engines de `database.py` (síncrono y
+asyncpg) o del que se pase, así que cuenta todas las sentencias del proceso mientras el
+bloque está activo.
+
+`ENDPOINT_BUDGETS` fija cuántas sentencias puede ejecutar cada lectura de trabajos,
+servicios, reseñas y usuarios (los listados, una sola por página: las relaciones van
+por joinedload o en la proyección de service_rows). `check` los recorre a través de la
+app completa contra una base con datos y falla si alguno se pasa:
+
+    python -m backend.query_budget check
+    python -m backend.query_budget check --strict   # además, falla si un listado trae < 2 filas
+
+Antes de cada pedido vacía la caché de respuestas para que la consulta se ejecute. Un
+listado con una sola fila no puede mostrar un N+1; sin --strict solo se avisa.
+"""
+import argparse
+import sys
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.sql import text
+
+# (ruta, parámetros, presupuesto, es listado); las rutas de /users/{id}/... además buscan al usuario
+ENDPOINT_BUDGETS = (
+    ("/jobs/", {}, 1, True),
+    ("/jobs/{job_id}", {}, 1, False),
+    ("/jobs/vendor/{vendor_id}", {}, 1, True),
+    ("/jobs/contractor/{contractor_id}", {}, 1, True),
+    ("/jobs/user/{vendor_id}", {}, 1, True),
+    ("/services/", {}, 1, True),
+    ("/services/{service_id}", {}, 1, False),
+    ("/services/vendor/{vendor_id}", {}, 1, True),
+    ("/services/search", {}, 1, True),
+    ("/services/search", {"facets": "true"}, 1, False),
+    ("/reviews/service/{service_id}", {}, 1, True),
+    ("/users/", {}, 1, True),
+    ("/users/{vendor_id}/services", {}, 2, True),
+    ("/users/{vendor_id}/jobs-as-vendor", {}, 2, True),
+    ("/users/{contractor_id}/jobs-as-contractor", {}, 2, True),
+)
+LISTING_LIMIT = 200
+
+
+class QueryCounter:
+    """Acumula las sentencias ejecutadas en un engine mientras está activo."""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from .database import engine as sync_engine, async_engine
+            self.engines = [sync_engine, async_engine.sync_engine]
+        else:
+            self.engines = [engine]
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        return False
+
+
+@contextmanager
+def assert_max_queries(budget: int, engine=None):
+    """Falla si el bloque ejecuta más de `budget` sentencias SQL."""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > budget:
+        listing = "\n".join(f"  {i + 1}. {sql.strip()}" for i, sql in enumerate(counter.statements))
+        raise AssertionError(
+            f"Se ejecutaron {counter.count} sentencias SQL (presupuesto: {budget}):\n{listing}"
+        )
+
+
+# Ids con más filas detrás, para que cada listado tenga varias
+_SAMPLE_SQL = {
+    "vendor_id": "SELECT vendor_id FROM jobs GROUP BY vendor_id ORDER BY count(*) DESC, vendor_id LIMIT 1",
+    "contractor_id": "SELECT contractor_id FROM jobs GROUP BY contractor_id ORDER BY count(*) DESC, contractor_id LIMIT 1",
+    "service_id": (
+        "SELECT j.service_id FROM reviews r JOIN jobs j ON j.id = r.job_id "
+        "GROUP BY j.service_id ORDER BY count(*) DESC, j.service_id LIMIT 1"
+    ),
+    "job_id": "SELECT max(id) FROM jobs",
+}
+
+
+def _sample_ids(engine) -> dict:
+    with engine.connect() as conn:
+        ids = {name: conn.execute(text(sql)).scalar() for name, sql in _SAMPLE_SQL.items()}
+    if ids["service_id"] is None and ids["job_id"] is not None:
+        # Sin reseñas: cualquier servicio con trabajos
+        with engine.connect() as conn:
+            ids["service_id"] = conn.execute(
+                text("SELECT service_id FROM jobs WHERE id = :id"), {"id": ids["job_id"]}
+            ).scalar()
+    return ids if ids["job_id"] is not None else {}
+
+
+def check(strict: bool = False) -> list:
+    """Devuelve los endpoints que superan su presupuesto (o, con `strict`, que no lo prueban)."""
+    from fastapi.testclient import TestClient
+
+    from . import cache
+    from .database import engine
+    from .main import app
+
+    ids = _sample_ids(engine)
+    if not ids:
+        print("La base no tiene trabajos: no hay endpoints que medir")
+        return ["sin datos"] if strict else []
+
+    failures = []
+    with TestClient(app) as client:
+        for template, params, budget, listing in ENDPOINT_BUDGETS:
+            path = template.format(**ids)
+            label = f"{path}?{'&'.join(f'{k}={v}' for k, v in params.items())}" if params else path
+            if listing:
+                params = {**params, "limit": LISTING_LIMIT}
+            cache.invalidate("services", "skills")
+            try:
+                with assert_max_queries(budget) as counter:
+                    response = client.get(path, params=params)
+                response.raise_for_status()
+            except AssertionError as exc:
+                print(f"FALLA {label}: {exc}")
+                failures.append(label)
+                continue
+            rows = len(response.json()) if listing else 1
+            if listing and rows < 2:
+                print(f"aviso {label}: {rows} fila(s), no alcanza para detectar un N+1")
+                if strict:
+                    failures.append(label)
+                continue
+            print(f"ok    {label}: {counter.count} sentencia(s), {rows} fila(s)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de sentencias SQL por endpoint")
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--strict", action="store_true", help="fallar también si un listado trae menos de 2 filas")
+    args = parser.parse_args(argv)
+
+    failures = check(strict=args.strict)
+    if failures:
+        print(f"{len(failures)} endpoint(s) fuera del presupuesto")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
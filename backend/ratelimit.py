@@ -0,0 +1,407 @@
+"""
+Límites por cliente y control de admisión.
+
+`AdmissionMiddleware` (ASGI puro, como `InstrumentationMiddleware`) hace dos cosas
+antes de que el request llegue a la app:
+
+1. Token bucket por ruta (`RULES`): cada regla tiene límites por IP (`scope["client"]`:
+   con serve.py sale de X-Forwarded-For solo si la conexión viene de un proxy de
+   FORWARDED_ALLOW_IPS; si no, es la IP de la conexión) y/o por usuario (el `sub` del
+   Bearer, verificado con `auth.verify`; sin token o con uno inválido solo cuenta la IP). Si un
+   bucket está vacío responde 429 con `Retry-After` = segundos hasta el próximo token.
+   Las rutas caras son `POST /users/login` y `POST /users/` (argon2) y
+   `GET /services/search` (FTS); el login además limita por email (`check`, en el
+   endpoint, porque el email viene en el body). Por email solo cuentan los intentos
+   fallidos: el endpoint devuelve el token (`refund`) si la contraseña era correcta.
+2. Tope global de requests en curso por worker (ADMISSION_MAX_IN_FLIGHT). Los que no
+   entran esperan en una cola corta (ADMISSION_MAX_QUEUE, hasta
+   ADMISSION_QUEUE_SECONDS); si no hay lugar responde 503 con `Retry-After`, antes
+   de que el pool de conexiones se sature y todo empiece a esperar pool_timeout.
+   `/health*` y `/metrics` quedan afuera.
+
+Los buckets viven en `MemoryBackend` (por worker: con N workers el límite efectivo
+es N veces el configurado) o, con RATE_LIMIT_REDIS_URL, en `RedisBackend`,
+compartido entre workers y máquinas (requiere el paquete `redis`; si Redis no
+responde se deja pasar el request). Cualquier objeto con `take(key, limit)` sirve de
+backend (ver `set_backend`).
+
+Los límites se configuran como "cantidad/segundos" (p.ej. "20/60": ráfaga de 20 y
+luego uno cada 3 s); "0" desactiva ese límite.
+"""
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from . import auth, database
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Limit:
+    key: str  # "ip", "user" o "email"
+    burst: float  # capacidad del bucket
+    rate: float  # tokens por segundo
+
+    @classmethod
+    def parse(cls, key: str, spec: str) -> Optional["Limit"]:
+        """ "cantidad/segundos" -> Limit; None si está desactivado ("0" o vacío)."""
+        count, _, seconds = (spec or "0").partition("/")
+        count, seconds = float(count), float(seconds or 1)
+        if count <= 0:
+            return None
+        return cls(key=key, burst=count, rate=count / seconds)
+
+
+def _limit_env(key: str, name: str, default: str) -> Optional[Limit]:
+    return Limit.parse(key, os.getenv(name) or default)
+
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# Buckets en memoria por worker; por encima se descartan los que ya se rellenaron
+RATE_LIMIT_MEMORY_MAX_KEYS = int(os.getenv("RATE_LIMIT_MEMORY_MAX_KEYS") or 100000)
+
+# Sin pool propio (PgBouncer) el tope no se deriva del pool
+_POOL_CAPACITY = 32 if database.DB_PGBOUNCER else database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
+# Dos pools por worker (síncrono + asyncpg); 0 desactiva el tope
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT") or 2 * _POOL_CAPACITY)
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE") or ADMISSION_MAX_IN_FLIGHT)
+ADMISSION_QUEUE_SECONDS = float(os.getenv("ADMISSION_QUEUE_SECONDS") or 0.5)
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER") or 1)
+ADMISSION_EXEMPT_PREFIXES = ("/health", "/metrics")
+
+# (método, path) -> (nombre de la regla, límites)
+RULES: Dict[Tuple[str, str], Tuple[str, Tuple[Limit, ...]]] = {
+    ("POST", "/users/login"): ("login", (
+        _limit_env("ip", "RATE_LIMIT_LOGIN_IP", "20/60"),
+    )),
+    ("POST", "/users"): ("register", (
+        _limit_env("ip", "RATE_LIMIT_REGISTER_IP", "10/60"),
+    )),
+    ("GET", "/services/search"): ("search", (
+        _limit_env("ip", "RATE_LIMIT_SEARCH_IP", "120/60"),
+        _limit_env("user", "RATE_LIMIT_SEARCH_USER", "60/60"),
+    )),
+}
+RULES = {route: (name, tuple(limit for limit in limits if limit)) for route, (name, limits) in RULES.items()}
+
+# Intentos de login por email (en el endpoint), sea cual sea la IP
+LOGIN_EMAIL_LIMIT = _limit_env("email", "RATE_LIMIT_LOGIN_EMAIL", "10/300")
+
+
+# ==========================
+# Backends
+# ==========================
+class MemoryBackend:
+    """Buckets en un dict del worker: clave -> (tokens, actualizado_en)."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        """Consume `cost` tokens; devuelve 0 si pasó o los segundos a esperar si no.
+
+        Con `cost` negativo devuelve tokens (sin pasar de la ráfaga).
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            if tokens < cost:
+                self._buckets[key] = (tokens, now)
+                return (cost - tokens) / limit.rate
+            self._buckets[key] = (min(limit.burst, tokens - cost), now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, limit)
+        return 0.0
+
+    def _prune(self, now: float, limit: Limit):
+        # Un bucket que ya se rellenó equivale a no tenerlo; la tasa de la regla
+        # actual sirve de cota (con otra regla a lo sumo se olvida antes de tiempo)
+        full_after = limit.burst / limit.rate
+        self._buckets = {
+            key: entry for key, entry in self._buckets.items() if now - entry[1] < full_after
+        }
+        while len(self._buckets) > self.max_keys:
+            self._buckets.pop(next(iter(self._buckets)))
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Token bucket atómico en Redis; la hora sale del servidor para que todos los
+# workers usen el mismo reloj. Devuelve los segundos a esperar como texto
+# (Redis trunca los números de Lua a entero).
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < cost then
+    wait = (cost - tokens) / rate
+else
+    tokens = math.min(burst, tokens - cost)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Buckets compartidos en Redis. Si Redis falla, deja pasar (y lo registra)."""
+
+    KEY_PREFIX = "ratelimit:"
+    ERROR_LOG_SECONDS = 60
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError:  # pragma: no cover - redis es opcional
+            raise RuntimeError("RATE_LIMIT_REDIS_URL requiere el paquete `redis` (pip install redis)")
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_TAKE_SCRIPT)
+        self._last_error_log = 0.0
+
+    async def take(self, key: str, limit: Limit, cost: float = 1.0) -> float:
+        try:
+            wait = await self._script(keys=[self.KEY_PREFIX + key], args=[limit.rate, limit.burst, cost])
+        except Exception as exc:
+            now = time.monotonic()
+            if now - self._last_error_log > self.ERROR_LOG_SECONDS:
+                self._last_error_log = now
+                logger.warning("Rate limit en Redis no disponible (%s); se deja pasar", exc)
+            return 0.0
+        return float(wait)
+
+
+def _default_backend():
+    if RATE_LIMIT_REDIS_URL:
+        return RedisBackend(RATE_LIMIT_REDIS_URL)
+    return MemoryBackend()
+
+
+backend = _default_backend()
+
+
+def set_backend(new_backend):
+    """Reemplaza el backend de los buckets (cualquier objeto con `async take(key, limit)`)."""
+    global backend
+    backend = new_backend
+
+
+# ==========================
+# Métricas
+# ==========================
+class Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limited = {}  # (regla, clave) -> rechazos con 429
+        self.shed = 0  # rechazos con 503 por el tope global
+
+    def record_limited(self, rule: str, key: str):
+        with self._lock:
+            self.limited[(rule, key)] = self.limited.get((rule, key), 0) + 1
+
+    def record_shed(self):
+        with self._lock:
+            self.shed += 1
+
+
+counters = Counters()
+
+
+# ==========================
+# Límites
+# ==========================
+def _retry_after(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+async def check(rule: str, value: str, limit: Optional[Limit]):
+    """Consume un token de `rule:limit.key:value`; 429 con Retry-After si no hay."""
+    if not RATE_LIMIT_ENABLED or limit is None or not value:
+        return
+    wait = await backend.take(f"{rule}:{limit.key}:{value}", limit)
+    if wait > 0:
+        counters.record_limited(rule, limit.key)
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiadas solicitudes, intenta de nuevo más tarde",
+            headers={"Retry-After": _retry_after(wait)},
+        )
+
+
+async def refund(rule: str, value: str, limit: Optional[Limit]):
+    """Devuelve el token que tomó `check` (p.ej. el login por email, si no falló)."""
+    if not RATE_LIMIT_ENABLED or limit is None or not value:
+        return
+    await backend.take(f"{rule}:{limit.key}:{value}", limit, cost=-1.0)
+
+
+def _user_id(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return str(auth.verify(token.strip()).id)
+            except auth.TokenError:
+                return None  # el endpoint responderá 401 si lo exige
+    return None
+
+
+async def _limited(scope) -> Optional[float]:
+    """Segundos a esperar si algún bucket de la regla de la ruta está vacío."""
+    path = scope["path"].rstrip("/") or "/"
+    rule = RULES.get((scope["method"], path))
+    if rule is None:
+        return None
+    name, limits = rule
+    client = scope.get("client")
+    identities = {"ip": client[0] if client else None}
+    if any(limit.key == "user" for limit in limits):
+        identities["user"] = _user_id(scope)
+    for limit in limits:
+        value = identities.get(limit.key)
+        if not value:
+            continue
+        wait = await backend.take(f"{name}:{limit.key}:{value}", limit)
+        if wait > 0:
+            counters.record_limited(name, limit.key)
+            return wait
+    return None
+
+
+# ==========================
+# Admisión
+# ==========================
+class Admission:
+    """Tope de requests en curso con una cola FIFO acotada (un event loop por worker)."""
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT, max_queue: int = ADMISSION_MAX_QUEUE):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # `release` pasa el lugar directamente al primero de la cola
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+admission = Admission()
+
+
+# ==========================
+# Middleware
+# ==========================
+async def _reject(scope, receive, send, status: int, retry_after: str, detail: str):
+    response = JSONResponse({"detail": detail}, status_code=status, headers={"Retry-After": retry_after})
+    await response(scope, receive, send)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(ADMISSION_EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        if RATE_LIMIT_ENABLED:
+            wait = await _limited(scope)
+            if wait is not None:
+                await _reject(scope, receive, send, 429, _retry_after(wait),
+                              "Demasiadas solicitudes, intenta de nuevo más tarde")
+                return
+
+        if admission.max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+        if not await admission.acquire(ADMISSION_QUEUE_SECONDS):
+            counters.record_shed()
+            await _reject(scope, receive, send, 503, str(ADMISSION_RETRY_AFTER),
+                          "Servicio saturado, intenta de nuevo en unos segundos")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release()
+
+
+# ==========================
+# Prometheus
+# ==========================
+def render() -> str:
+    """Rechazos por regla y estado del tope global, en formato de texto de Prometheus."""
+    with counters._lock:
+        limited = sorted(counters.limited.items())
+        shed = counters.shed
+    lines = ["# TYPE http_rate_limited_total counter"]
+    lines += [f'http_rate_limited_total{{rule="{rule}",key="{key}"}} {count}' for (rule, key), count in limited]
+    lines += [
+        "# TYPE http_admission_rejected_total counter",
+        f"http_admission_rejected_total {shed}",
+        "# TYPE http_admission_in_flight gauge",
+        f"http_admission_in_flight {admission.in_flight}",
+        "# TYPE http_admission_waiting gauge",
+        f"http_admission_waiting {admission.waiting}",
+        "# TYPE http_admission_max_in_flight gauge",
+        f"http_admission_max_in_flight {admission.max_in_flight}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,183 @@
+"""
+Resumen de calificaciones por servicio y por vendedor.
+
+Las tablas `service_ratings` y `vendor_ratings` guardan (review_count, rating_sum,
+avg_rating) y se actualizan en la misma transacción que inserta la reseña, así las
+páginas de detalle, de vendedor y la búsqueda leen un valor precalculado en lugar de
+agregar todas las reseñas en cada request.
+
+Reconstrucción y verificación:
+
+    python -m backend.ratings rebuild
+    python -m backend.ratings check
+"""
+import argparse
+import sys
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+# Agregados "reales" calculados desde reviews + jobs; base de rebuild y check
+_SERVICE_TRUTH = """
+    SELECT j.service_id AS key_id, COUNT(r.id) AS review_count, COALESCE(SUM(r.rating), 0) AS rating_sum
+    FROM reviews r
+    JOIN jobs j ON j.id = r.job_id
+    WHERE j.service_id IS NOT NULL AND r.rating IS NOT NULL
+    GROUP BY j.service_id
+"""
+
+_VENDOR_TRUTH = """
+    SELECT j.vendor_id AS key_id, COUNT(r.id) AS review_count, COALESCE(SUM(r.rating), 0) AS rating_sum
+    FROM reviews r
+    JOIN jobs j ON j.id = r.job_id
+    WHERE j.vendor_id IS NOT NULL AND r.rating IS NOT NULL
+    GROUP BY j.vendor_id
+"""
+
+_TABLES = {
+    "service_ratings": ("service_id", _SERVICE_TRUTH),
+    "vendor_ratings": ("vendor_id", _VENDOR_TRUTH),
+}
+
+
+def _upsert_sql(table: str, key: str) -> str:
+    return f"""
+        INSERT INTO {table} ({key}, review_count, rating_sum, avg_rating)
+        VALUES (:key_id, 1, :rating, :rating)
+        ON CONFLICT ({key}) DO UPDATE SET
+            review_count = {table}.review_count + 1,
+            rating_sum = {table}.rating_sum + EXCLUDED.rating_sum,
+            avg_rating = ({table}.rating_sum + EXCLUDED.rating_sum)::numeric
+                         / ({table}.review_count + 1)
+    """
+
+
+def record_review(db: Session, service_id: int, vendor_id: int, rating: int):
+    """
+    Suma una reseña a los agregados del servicio y del vendedor.
+
+    No hace commit: debe llamarse dentro de la transacción que inserta la reseña.
+    El upsert es atómico en Postgres, por lo que reseñas concurrentes no pierden updates.
+    """
+    if rating is None:
+        return
+    if service_id is not None:
+        db.execute(text(_upsert_sql("service_ratings", "service_id")), {"key_id": service_id, "rating": rating})
+    if vendor_id is not None:
+        db.execute(text(_upsert_sql("vendor_ratings", "vendor_id")), {"key_id": vendor_id, "rating": rating})
+
+
+def forget_service(db: Session, service_id: int):
+    """
+    Resta de `vendor_ratings` las reseñas de un servicio que se va a eliminar.
+
+    La fila de `service_ratings` se borra sola por el ON DELETE CASCADE. No hace commit.
+    """
+    db.execute(text("""
+        UPDATE vendor_ratings vr SET
+            review_count = vr.review_count - d.review_count,
+            rating_sum = vr.rating_sum - d.rating_sum,
+            avg_rating = CASE
+                WHEN vr.review_count - d.review_count > 0
+                THEN (vr.rating_sum - d.rating_sum)::numeric / (vr.review_count - d.review_count)
+            END
+        FROM (
+            SELECT j.vendor_id, COUNT(r.id) AS review_count, COALESCE(SUM(r.rating), 0) AS rating_sum
+            FROM reviews r
+            JOIN jobs j ON j.id = r.job_id
+            WHERE j.service_id = :service_id AND r.rating IS NOT NULL
+            GROUP BY j.vendor_id
+        ) d
+        WHERE vr.vendor_id = d.vendor_id
+    """), {"service_id": service_id})
+
+
+def get_service_rating(db: Session, service_id: int):
+    return db.execute(
+        text("SELECT review_count, rating_sum, avg_rating FROM service_ratings WHERE service_id = :id"),
+        {"id": service_id},
+    ).mappings().first()
+
+
+def get_vendor_rating(db: Session, vendor_id: int):
+    return db.execute(
+        text("SELECT review_count, rating_sum, avg_rating FROM vendor_ratings WHERE vendor_id = :id"),
+        {"id": vendor_id},
+    ).mappings().first()
+
+
+def rebuild(db: Session):
+    """Recalcula ambos resúmenes desde cero (backfill). Hace commit."""
+    counts = {}
+    for table, (key, truth) in _TABLES.items():
+        # Bloquea escrituras concurrentes del resumen mientras se reconstruye
+        db.execute(text(f"LOCK TABLE {table} IN EXCLUSIVE MODE"))
+        db.execute(text(f"DELETE FROM {table}"))
+        result = db.execute(text(f"""
+            INSERT INTO {table} ({key}, review_count, rating_sum, avg_rating)
+            SELECT t.key_id, t.review_count, t.rating_sum, t.rating_sum::numeric / t.review_count
+            FROM ({truth}) t
+            WHERE t.review_count > 0
+        """))
+        counts[table] = result.rowcount
+    db.commit()
+    return counts
+
+
+def check(db: Session):
+    """
+    Compara los resúmenes guardados contra los agregados reales.
+
+    Devuelve una lista de diferencias; vacía si todo es consistente.
+    """
+    mismatches = []
+    for table, (key, truth) in _TABLES.items():
+        rows = db.execute(text(f"""
+            SELECT
+                COALESCE(t.key_id, s.{key}) AS key_id,
+                COALESCE(s.review_count, 0) AS stored_count,
+                COALESCE(s.rating_sum, 0) AS stored_sum,
+                s.avg_rating AS stored_avg,
+                COALESCE(t.review_count, 0) AS actual_count,
+                COALESCE(t.rating_sum, 0) AS actual_sum
+            FROM ({truth}) t
+            FULL OUTER JOIN {table} s ON s.{key} = t.key_id
+            WHERE COALESCE(s.review_count, 0) <> COALESCE(t.review_count, 0)
+               OR COALESCE(s.rating_sum, 0) <> COALESCE(t.rating_sum, 0)
+               OR (t.review_count > 0
+                   AND s.avg_rating IS DISTINCT FROM t.rating_sum::numeric / t.review_count)
+        """)).mappings().all()
+        for row in rows:
+            mismatches.append({"table": table, **row})
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumen de calificaciones")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            counts = rebuild(db)
+            for table, count in counts.items():
+                print(f"{table}: {count} filas")
+            return 0
+
+        mismatches = check(db)
+        for m in mismatches:
+            print(
+                f"{m['table']} id={m['key_id']}: guardado ({m['stored_count']}, {m['stored_sum']}, {m['stored_avg']})"
+                f" vs real ({m['actual_count']}, {m['actual_sum']})"
+            )
+        print("OK" if not mismatches else f"{len(mismatches)} inconsistencias")
+        return 0 if not mismatches else 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+# backend/routers/exports.py
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from .. import auth, export
+from ..instrumentation import InstrumentedRoute
+
+router = APIRouter(prefix="/export", tags=["export"], route_class=InstrumentedRoute)
+
+
+@router.get("/{kind}")
+def export_rows(
+    kind: Literal["jobs", "payments", "reviews"],
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    since: Optional[datetime] = Query(None, description="created_at desde (inclusive)"),
+    until: Optional[datetime] = Query(None, description="created_at hasta (exclusivo)"),
+    principal: auth.Principal = Depends(auth.staff_principal("admin", "finance")),
+):
+    """Exportar trabajos, pagos o reseñas como NDJSON o CSV, en streaming (administradores y finanzas)"""
+    extension = "ndjson" if format == "ndjson" else "csv"
+    return StreamingResponse(
+        export.stream(kind, format, since, until),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{extension}"'},
+    )
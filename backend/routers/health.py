@@ -0,0 +1,18 @@
+# backend/routers/health.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from .. import warmup
+from ..instrumentation import InstrumentedRoute
+
+router = APIRouter(prefix="/health", tags=["health"], route_class=InstrumentedRoute)
+
+@router.get("/live")
+def live():
+    """El proceso responde"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+def ready():
+    """Listo para recibir tráfico: calentamiento terminado (503 mientras tanto)"""
+    snapshot = warmup.state.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
@@ -0,0 +1,60 @@
+# backend/routers/imports.py
+import codecs
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from .. import auth, bulk_import
+from ..instrumentation import InstrumentedRoute
+
+router = APIRouter(prefix="/import", tags=["import"], route_class=InstrumentedRoute)
+
+
+async def _lines(request: Request):
+    """Líneas del cuerpo a medida que llegan (con su salto de línea)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        lines = buffer.splitlines(keepends=True)
+        buffer = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+@router.post("/{kind}")
+async def bulk_import_rows(
+    kind: Literal["services", "users", "jobs"],
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="Por defecto según el Content-Type"),
+    principal: auth.Principal = Depends(auth.staff_principal("admin", "partner")),
+    db: Session = Depends(get_db),
+):
+    """
+    Carga masiva desde NDJSON (un objeto por línea) o CSV con encabezado.
+
+    Cada fila se valida con el schema de creación correspondiente; las filas con
+    errores se informan por número de línea y no frenan al resto. Solo para
+    administradores y socios (ver auth.STAFF_GROUPS); los trabajos que no están
+    pendientes solo los importa un administrador.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    importer = bulk_import.Importer(db, kind, format, trusted=auth.is_staff(principal, "admin"))
+
+    # Validación y carga en el threadpool, un bloque de líneas por vez
+    block = []
+    async for line in _lines(request):
+        block.append(line)
+        if len(block) >= importer.chunk_size:
+            await run_in_threadpool(importer.feed_lines, block)
+            block = []
+    await run_in_threadpool(importer.feed_lines, block)
+    result = await run_in_threadpool(importer.finish)
+    return result.as_dict()
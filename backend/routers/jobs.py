@@ -1,19 +1,34 @@
 # backend/routers/jobs.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from .. import crud, schemas, models
+from typing import List, Optional
+from ..database import get_db, get_async_db
+from .. import auth, crud, job_states, schemas, models, pagination
+from ..pagination import PageParams, page_params
+from ..instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/jobs", tags=["jobs"])
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=InstrumentedRoute)
 
 @router.post("/", response_model=schemas.JobOut)
-def create_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
-    """Crear un nuevo trabajo (contratación de servicio)"""
+def create_job(
+    job: schemas.JobCreate,
+    principal: auth.Principal = Depends(auth.current_principal),
+    db: Session = Depends(get_db),
+):
+    """Crear un nuevo trabajo (contratación de servicio); el contratador es quien tiene el token"""
+    if job.contractor_id != principal.id:
+        raise HTTPException(status_code=403, detail="Solo puedes contratar a tu nombre")
+    if principal.role != job_states.ACTOR_ROLES["contractor"]:
+        raise HTTPException(status_code=403, detail="Solo un contratador puede contratar servicios")
+
     # Verificar que el servicio existe
     service = db.query(models.Service).filter(models.Service.id == job.service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
+    if job.vendor_id != service.vendor_id:
+        raise HTTPException(status_code=400, detail="El vendedor no corresponde al servicio")
     
     # Crear el trabajo
     db_job = models.Job(
@@ -26,102 +41,115 @@ def create_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
         total_amount=job.total_amount or service.price
     )
     db.add(db_job)
+    db.flush()
+    job_id = db_job.id
     db.commit()
-    db.refresh(db_job)
-    return db_job
+    # Recarga con las relaciones de JobOut en un solo SELECT
+    return db.query(models.Job).options(*schemas.JOB_OUT_LOAD).filter(models.Job.id == job_id).one()
 
 @router.get("/", response_model=List[schemas.JobOut])
-def get_jobs(db: Session = Depends(get_db)):
-    """Obtener todos los trabajos"""
-    return db.query(models.Job).all()
+def get_jobs(response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    """Obtener todos los trabajos (paginado)"""
+    query = db.query(models.Job).options(*schemas.JOB_OUT_LOAD)
+    page = pagination.paginate_query(query, page, pagination.created_desc(models.Job), tag="jobs")
+    return pagination.apply_to_response(response, page)
 
 @router.get("/{job_id}", response_model=schemas.JobOut)
 def get_job(job_id: int, db: Session = Depends(get_db)):
     """Obtener un trabajo específico por ID"""
-    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    job = db.query(models.Job).options(*schemas.JOB_OUT_LOAD).filter(models.Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Trabajo no encontrado")
     return job
 
 @router.get("/user/{user_id}", response_model=List[schemas.JobOut])
-def get_user_jobs(user_id: int, db: Session = Depends(get_db)):
+async def get_user_jobs(
+    user_id: int, response: Response, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)
+):
     """Obtener todos los trabajos de un usuario (como contratador o vendedor)"""
-    jobs = db.query(models.Job).filter(
+    stmt = select(models.Job).options(*schemas.JOB_OUT_LOAD).where(
         (models.Job.contractor_id == user_id) | (models.Job.vendor_id == user_id)
-    ).all()
-    return jobs
+    )
+    stmt, keyset = pagination.keyset_statement(stmt, page, pagination.created_desc(models.Job), tag="jobs")
+    rows = (await db.execute(stmt)).scalars().all()
+    return pagination.apply_to_response(response, keyset.page(rows))
 
 
 @router.get("/vendor/{vendor_id}", response_model=List[schemas.JobOut])
-def get_vendor_jobs(vendor_id: int, db: Session = Depends(get_db)):
+def get_vendor_jobs(
+    vendor_id: int, response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
+):
     """Obtener todos los trabajos donde el usuario es el vendedor"""
-    jobs = db.query(models.Job).filter(models.Job.vendor_id == vendor_id).all()
-    return jobs
+    return pagination.apply_to_response(response, crud.get_jobs_by_vendor(db, vendor_id, page))
 
 
 @router.get("/contractor/{contractor_id}", response_model=List[schemas.JobOut])
-def get_contractor_jobs(contractor_id: int, db: Session = Depends(get_db)):
+def get_contractor_jobs(
+    contractor_id: int, response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
+):
     """Obtener todos los trabajos donde el usuario es el contratador"""
-    jobs = db.query(models.Job).filter(models.Job.contractor_id == contractor_id).all()
-    return jobs
+    return pagination.apply_to_response(response, crud.get_jobs_by_contractor(db, contractor_id, page))
 
 
 from pydantic import BaseModel
 
+# Quién actúa sale del token; `user_id` se acepta por compatibilidad y debe coincidir
 class JobAction(BaseModel):
-    user_id: int
+    user_id: Optional[int] = None
+
+def _transition(name: str, job_id: int, principal: auth.Principal, action: Optional[JobAction], db: Session):
+    if action is not None and action.user_id is not None and action.user_id != principal.id:
+        raise HTTPException(status_code=403, detail="El usuario no coincide con el token")
+    try:
+        return job_states.apply(db, name, job_id, principal.id, principal.role)
+    except job_states.JobTransitionError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
 
 @router.put("/{job_id}/accept")
-def accept_job(job_id: int, action: JobAction, db: Session = Depends(get_db)):
+def accept_job(
+    job_id: int,
+    action: Optional[JobAction] = None,
+    principal: auth.Principal = Depends(auth.current_principal),
+    db: Session = Depends(get_db),
+):
     """El vendedor acepta el trabajo"""
-    job = db.query(models.Job).filter(models.Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
-    
-    if job.vendor_id != action.user_id:
-        raise HTTPException(status_code=403, detail="Solo el vendedor puede aceptar el trabajo")
-        
-    if job.status != "pendiente":
-        raise HTTPException(status_code=400, detail="El trabajo no está pendiente")
-        
-    job.status = "en_progreso"
-    db.commit()
-    db.refresh(job)
-    return job
+    return _transition("accept", job_id, principal, action, db)
 
 @router.put("/{job_id}/complete")
-def complete_job(job_id: int, action: JobAction, db: Session = Depends(get_db)):
+def complete_job(
+    job_id: int,
+    action: Optional[JobAction] = None,
+    principal: auth.Principal = Depends(auth.current_principal),
+    db: Session = Depends(get_db),
+):
     """Confirmar finalización del trabajo (requiere confirmación de ambas partes)"""
-    job = db.query(models.Job).filter(models.Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
-        
-    if action.user_id == job.contractor_id:
-        job.client_confirmed = True
-    elif action.user_id == job.vendor_id:
-        job.vendor_confirmed = True
-    else:
-        raise HTTPException(status_code=403, detail="Usuario no autorizado para este trabajo")
-        
-    if job.client_confirmed and job.vendor_confirmed:
-        job.status = "completado"
-        
-    db.commit()
-    db.refresh(job)
-    return job
+    return _transition("complete", job_id, principal, action, db)
+
+@router.put("/{job_id}/cancel")
+def cancel_job(
+    job_id: int,
+    action: Optional[JobAction] = None,
+    principal: auth.Principal = Depends(auth.current_principal),
+    db: Session = Depends(get_db),
+):
+    """Cancelar un trabajo pendiente o en progreso (cualquiera de las partes)"""
+    return _transition("cancel", job_id, principal, action, db)
+
+# Estado destino -> transición de job_states que lleva a él
+_STATUS_TRANSITIONS = {spec.target: name for name, spec in job_states.TRANSITIONS.items()}
 
 @router.put("/{job_id}/status")
-def update_job_status(job_id: int, status: str, db: Session = Depends(get_db)):
-    """Actualizar el estado de un trabajo (Admin/Debug)"""
-    valid_statuses = ["pendiente", "en_progreso", "completado", "cancelado"]
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Estado inválido. Debe ser uno de: {valid_statuses}")
-    
-    job = db.query(models.Job).filter(models.Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
-    
-    job.status = status
-    db.commit()
-    db.refresh(job)
+def update_job_status(
+    job_id: int,
+    status: str,
+    principal: auth.Principal = Depends(auth.current_principal),
+    db: Session = Depends(get_db),
+):
+    """Llevar el trabajo a `status` con la transición correspondiente (aceptar, completar o cancelar)"""
+    if status not in job_states.STATUSES:
+        raise HTTPException(status_code=400, detail=f"Estado inválido. Debe ser uno de: {list(job_states.STATUSES)}")
+    name = _STATUS_TRANSITIONS.get(status)
+    if name is None:
+        raise HTTPException(status_code=400, detail=f"Un trabajo no puede volver a '{status}'")
+    job = _transition(name, job_id, principal, None, db)
     return {"message": "Estado actualizado exitosamente", "job": job}
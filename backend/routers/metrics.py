@@ -0,0 +1,13 @@
+# backend/routers/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..database import engine
+from .. import instrumentation, pool_metrics, ratelimit
+from ..instrumentation import InstrumentedRoute
+
+router = APIRouter(tags=["metrics"], route_class=InstrumentedRoute)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return pool_metrics.render(engine) + instrumentation.render() + ratelimit.render()
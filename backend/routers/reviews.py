@@ -1,11 +1,14 @@
 # backend/routers/reviews.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from typing import List
 from ..database import get_db
-from .. import crud, schemas, models
+from .. import crud, schemas, models, ratings, pagination, cache
+from ..pagination import PageParams, page_params
+from ..instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/reviews", tags=["reviews"])
+router = APIRouter(prefix="/reviews", tags=["reviews"], route_class=InstrumentedRoute)
 
 @router.post("/", response_model=schemas.ReviewOut)
 def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
@@ -15,24 +18,32 @@ def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
     if not job:
         raise HTTPException(status_code=404, detail="Trabajo no encontrado")
     
-    # Verificar si ya existe una review para este job
-    existing_review = db.query(models.Review).filter(models.Review.job_id == review.job_id).first()
-    if existing_review:
-        raise HTTPException(status_code=400, detail="Ya existe una reseña para este trabajo")
+    # Una reseña por trabajo (uq_reviews_job): el upsert vacío resuelve también dos
+    # reseñas simultáneas sin que una termine en IntegrityError
+    review_id = db.execute(
+        insert(models.Review)
+        .values(job_id=review.job_id, rating=review.rating, comment=review.comment)
+        .on_conflict_do_nothing(index_elements=["job_id"])
+        .returning(models.Review.id)
+    ).scalar()
+    if review_id is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Ya existe una reseña para este trabajo")
 
-    db_review = models.Review(
-        job_id=review.job_id,
-        rating=review.rating,
-        comment=review.comment
-    )
-    db.add(db_review)
+    # Actualiza los agregados en la misma transacción que la reseña
+    ratings.record_review(db, job.service_id, job.vendor_id, review.rating)
     db.commit()
-    db.refresh(db_review)
+    db_review = db.get(models.Review, review_id)
+    # El rating de los servicios cambió
+    cache.invalidate("services")
     return db_review
 
 @router.get("/service/{service_id}", response_model=List[schemas.ReviewOut])
-def get_service_reviews(service_id: int, db: Session = Depends(get_db)):
-    """Obtener todas las reseñas de un servicio específico"""
+def get_service_reviews(
+    service_id: int, response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
+):
+    """Obtener las reseñas de un servicio específico (paginado)"""
     # Hacemos un join con Job para filtrar por service_id
-    reviews = db.query(models.Review).join(models.Job).filter(models.Job.service_id == service_id).all()
-    return reviews
+    query = db.query(models.Review).join(models.Job).filter(models.Job.service_id == service_id)
+    page = pagination.paginate_query(query, page, pagination.created_desc(models.Review), tag="reviews")
+    return pagination.apply_to_response(response, page)
@@ -1,290 +1,121 @@
 # backend/routers/services.py
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from typing import Optional, List
-from ..database import get_db
-from .. import crud, schemas
+from typing import Literal, Optional, List, Union
+from ..database import get_db, get_async_db
+from .. import crud, geo, schemas, search, suggest, pagination, cache, service_rows, fastjson
+from ..pagination import Keyset, PageParams, page_params
+from ..instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/services", tags=["services"])
+router = APIRouter(prefix="/services", tags=["services"], route_class=InstrumentedRoute)
+
+# Lecturas cacheadas; se invalidan desde crud (create/update/delete_service) y reviews
+SERVICE_LIST_CACHE = cache.CachedView("services", list[schemas.ServiceOut])
+SERVICE_DETAIL_CACHE = cache.CachedView("services", schemas.ServiceOut)
 
 @router.post("/", response_model=schemas.ServiceOut)
 def create_service(service: schemas.ServiceCreate, db: Session = Depends(get_db)):
     return crud.create_service(db, service)
 
 @router.get("/", response_model=list[schemas.ServiceOut])
-def get_services(db: Session = Depends(get_db)):
-    return crud.get_services(db)
+def get_services(request: Request, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return SERVICE_LIST_CACHE.serve(request, lambda: crud.get_services(db, page).as_result())
 
 
-@router.get("/search", response_model=list[schemas.ServiceOut])
-def search_services(
-    db: Session = Depends(get_db),
+@router.get("/search", response_model=Union[list[schemas.ServiceOut], schemas.SearchPageOut])
+async def search_services(
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
     query: Optional[str] = Query("", description="Texto a buscar (full text search)"),
     skill_ids: Optional[List[int]] = Query(None, description="IDs de skills, p.ej. ?skill_ids=1&skill_ids=2"),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     min_rating: Optional[float] = Query(None),
-    sort_by: Optional[str] = Query("relevance", description="relevance | price_asc | price_desc | rating_desc")
+    sort_by: Optional[str] = Query(
+        "relevance", description="relevance | price_asc | price_desc | rating_desc | distance (con lat/lon o near)"
+    ),
+    location: geo.GeoParams = Depends(geo.geo_params),
+    mode: Literal["auto", "fts", "fuzzy"] = Query(
+        "auto", description="auto (full text y, si no hay resultados, difusa) | fts | fuzzy (tolera errores de tipeo)"
+    ),
+    facets: bool = Query(
+        False,
+        description="Si es true, la respuesta es {items, facets} con conteos por skill, por estrellas "
+                    "e histograma de precios del conjunto filtrado (no dependen del cursor: pedirlas en la primera página)",
+    ),
 ):
-    params = {
-        "query": query or "",
-        "to_tsvector_lang": "spanish",
-        "plainto_tsquery_lang": "spanish"
-    }
-
-    filters = ["TRUE"]
-    if skill_ids:
-        filters.append("s.skill_id = ANY(:skill_ids)")
-        params["skill_ids"] = skill_ids
-    if min_price is not None:
-        filters.append("s.price >= :min_price")
-        params["min_price"] = min_price
-    if max_price is not None:
-        filters.append("s.price <= :max_price")
-        params["max_price"] = max_price
-    if min_rating is not None:
-        filters.append("COALESCE(rps.avg_rating, 0) >= :min_rating")
-        params["min_rating"] = min_rating
-
-    where_clause = " AND ".join(filters)
-
-    if sort_by == "price_asc":
-        order_clause = "s.price ASC"
-    elif sort_by == "price_desc":
-        order_clause = "s.price DESC"
-    elif sort_by == "rating_desc":
-        order_clause = "COALESCE(rps.avg_rating, 0) DESC NULLS LAST"
-    else:
-        order_clause = "rank DESC"
-
-    query_text = text(f"""
-        WITH reviews_per_service AS (
-            SELECT j.service_id AS service_id, AVG(r.rating) as avg_rating
-            FROM jobs j
-            LEFT JOIN reviews r ON r.job_id = j.id
-            GROUP BY j.service_id
-        )
-        SELECT
-            s.id,
-            s.vendor_id,
-            s.skill_id,
-            s.title,
-            s.description,
-            s.price,
-            s.is_active,
-            s.created_at,
-            s.image_url,
-            COALESCE(rps.avg_rating, 0) AS avg_rating_calc,
-            u.id AS vendor_id_sel,
-            u.name AS vendor_name,
-            u.email AS vendor_email,
-            u.phone AS vendor_phone,
-            u.role AS vendor_role,
-            u.profile_picture_url AS vendor_profile_picture_url,
-            u.created_at AS vendor_created_at,
-            u.updated_at AS vendor_updated_at,
-            sk.id AS skill_id_sel,
-            sk.name AS skill_name,
-            ts_rank_cd(
-                to_tsvector(:to_tsvector_lang, COALESCE(s.title,'') || ' ' || COALESCE(s.description,'')),
-                plainto_tsquery(:plainto_tsquery_lang, :query)
-            ) AS rank
-        FROM services s
-        LEFT JOIN reviews_per_service rps ON rps.service_id = s.id
-        LEFT JOIN users u ON u.id = s.vendor_id
-        LEFT JOIN skills sk ON sk.id = s.skill_id
-        WHERE {where_clause}
-        ORDER BY {order_clause}
-    """)
-
-    result = db.execute(query_text, params).mappings().all()
-
-    services = []
-    for row in result:
-        skill_data = None
-        if row["skill_id_sel"] is not None:
-            skill_data = {
-                "id": row["skill_id_sel"],
-                "name": row["skill_name"],
-                "description": None
-            }
-
-        services.append({
-            "id": row["id"],
-            "title": row["title"],
-            "description": row["description"],
-            "price": float(row["price"]) if row["price"] is not None else None,
-            "is_active": bool(row["is_active"]) if row["is_active"] is not None else True,
-            "created_at": row["created_at"],
-            "image_url": row["image_url"],
-            "vendor": {
-                "id": row["vendor_id_sel"],
-                "name": row["vendor_name"],
-                "email": row["vendor_email"],
-                "phone": row["vendor_phone"],
-                "role": row["vendor_role"],
-                "profile_picture_url": row["vendor_profile_picture_url"],
-                "created_at": row["vendor_created_at"],
-                "updated_at": row["vendor_updated_at"],
-            },
-            "skill": skill_data,
-        })
-
-    return services
+    filters = dict(
+        area=await geo.resolve_async(db, location),
+        query=query,
+        skill_ids=skill_ids,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        sort_by=sort_by,
+        page=page,
+    )
+    if not facets:
+        result, used_mode = await search.run_search_async(db, mode, **filters)
+        headers = {pagination.NEXT_CURSOR_HEADER: result.next_cursor, search.SEARCH_MODE_HEADER: used_mode}
+        return service_rows.json_response(service_rows.dump_services(result.items), headers=headers)
+
+    # Página y facetas en la misma sentencia y el mismo modo (los conteos corresponden a lo mostrado)
+    result, used_mode, facet_values = await search.run_search_with_facets_async(db, mode, **filters)
+    headers = {pagination.NEXT_CURSOR_HEADER: result.next_cursor, search.SEARCH_MODE_HEADER: used_mode}
+    return service_rows.json_response(
+        service_rows.dump_services_page(result.items, facets=facet_values), headers=headers
+    )
+
+
+@router.get("/suggest", response_model=list[schemas.SuggestionOut])
+def suggest_services(
+    prefix: str = Query("", max_length=100, description="Lo que el usuario lleva escrito"),
+    limit: int = Query(suggest.DEFAULT_LIMIT, ge=1, le=suggest.MAX_LIMIT),
+):
+    """Autocompletado de títulos de servicios y nombres de skills (en memoria, sin consultar la base)"""
+    return service_rows.json_response(fastjson.dumps(suggest.index.suggest(prefix, limit)))
 
 
 @router.get("/vendor/{vendor_id}", response_model=list[schemas.ServiceOut])
-def get_vendor_services(vendor_id: int, db: Session = Depends(get_db)):
+async def get_vendor_services(
+    vendor_id: int, request: Request, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)
+):
     """Obtener todos los servicios de un vendedor específico"""
-    
-    query_text = text("""
-        WITH reviews_per_service AS (
-            SELECT j.service_id AS service_id, AVG(r.rating) as avg_rating
-            FROM jobs j
-            LEFT JOIN reviews r ON r.job_id = j.id
-            GROUP BY j.service_id
-        )
-        SELECT
-            s.id,
-            s.vendor_id,
-            s.skill_id,
-            s.title,
-            s.description,
-            s.price,
-            s.is_active,
-            s.created_at,
-            s.image_url,
-            COALESCE(rps.avg_rating, 0) AS avg_rating_calc,
-            u.id AS vendor_id_sel,
-            u.name AS vendor_name,
-            u.email AS vendor_email,
-            u.phone AS vendor_phone,
-            u.role AS vendor_role,
-            u.profile_picture_url AS vendor_profile_picture_url,
-            u.created_at AS vendor_created_at,
-            u.updated_at AS vendor_updated_at,
-            sk.id AS skill_id_sel,
-            sk.name AS skill_name
-        FROM services s
-        LEFT JOIN reviews_per_service rps ON rps.service_id = s.id
-        LEFT JOIN users u ON u.id = s.vendor_id
-        LEFT JOIN skills sk ON sk.id = s.skill_id
-        WHERE s.vendor_id = :vendor_id
-        ORDER BY s.created_at DESC
-    """)
-    
-    result = db.execute(query_text, {"vendor_id": vendor_id}).mappings().all()
-    
-    services = []
-    for row in result:
-        skill_data = None
-        if row["skill_id_sel"] is not None:
-            skill_data = {
-                "id": row["skill_id_sel"],
-                "name": row["skill_name"],
-                "description": None
-            }
+    return await SERVICE_LIST_CACHE.serve_async(
+        request, lambda: _fetch_vendor_services(db, vendor_id, page)
+    )
 
-        services.append({
-            "id": row["id"],
-            "title": row["title"],
-            "description": row["description"],
-            "price": float(row["price"]) if row["price"] is not None else None,
-            "is_active": bool(row["is_active"]) if row["is_active"] is not None else True,
-            "created_at": row["created_at"],
-            "image_url": row["image_url"],
-            "avg_rating": float(row["avg_rating_calc"]) if row["avg_rating_calc"] is not None else 0.0,
-            "vendor": {
-                "id": row["vendor_id_sel"],
-                "name": row["vendor_name"],
-                "email": row["vendor_email"],
-                "phone": row["vendor_phone"],
-                "role": row["vendor_role"],
-                "profile_picture_url": row["vendor_profile_picture_url"],
-                "created_at": row["vendor_created_at"],
-                "updated_at": row["vendor_updated_at"],
-            },
-            "skill": skill_data,
-        })
 
-    return services
+async def _fetch_vendor_services(db: AsyncSession, vendor_id: int, page: PageParams):
+    keyset = Keyset(pagination.created_desc_sql("s"), page, tag="services")
+    keyset_sql, keyset_params = keyset.where()
 
+    query_text = text(service_rows.select_services(
+        where=f"s.vendor_id = :vendor_id AND {keyset_sql}",
+        order_by=keyset.order_by(),
+        limit=keyset.fetch_limit,
+    ))
+    rows = await db.execute(query_text, {"vendor_id": vendor_id, **keyset_params})
+    result = keyset.page(rows.mappings().all())
+    return service_rows.dump_services(result.items), {pagination.NEXT_CURSOR_HEADER: result.next_cursor}
 
 
 @router.get("/{service_id}", response_model=schemas.ServiceOut)
-def get_service(service_id: int, db: Session = Depends(get_db)):
+async def get_service(service_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Obtener un servicio específico por ID con toda su información"""
-    
-    # Query con rating promedio
-    query_text = text("""
-        WITH reviews_per_service AS (
-            SELECT j.service_id AS service_id, AVG(r.rating) as avg_rating
-            FROM jobs j
-            LEFT JOIN reviews r ON r.job_id = j.id
-            GROUP BY j.service_id
-        )
-        SELECT
-            s.id,
-            s.vendor_id,
-            s.skill_id,
-            s.title,
-            s.description,
-            s.price,
-            s.is_active,
-            s.created_at,
-            s.image_url,
-            COALESCE(rps.avg_rating, 0) AS avg_rating_calc,
-            u.id AS vendor_id_sel,
-            u.name AS vendor_name,
-            u.email AS vendor_email,
-            u.phone AS vendor_phone,
-            u.role AS vendor_role,
-            u.profile_picture_url AS vendor_profile_picture_url,
-            u.created_at AS vendor_created_at,
-            u.updated_at AS vendor_updated_at,
-            sk.id AS skill_id_sel,
-            sk.name AS skill_name
-        FROM services s
-        LEFT JOIN reviews_per_service rps ON rps.service_id = s.id
-        LEFT JOIN users u ON u.id = s.vendor_id
-        LEFT JOIN skills sk ON sk.id = s.skill_id
-        WHERE s.id = :service_id
-    """)
-    
-    result = db.execute(query_text, {"service_id": service_id}).mappings().first()
+    return await SERVICE_DETAIL_CACHE.serve_async(request, lambda: _fetch_service(db, service_id))
+
+
+async def _fetch_service(db: AsyncSession, service_id: int):
+    query_text = text(service_rows.select_services(where="s.id = :service_id"))
+    result = (await db.execute(query_text, {"service_id": service_id})).mappings().first()
     
     if not result:
         raise HTTPException(status_code=404, detail="Servicio no encontrado")
     
-    skill_data = None
-    if result["skill_id_sel"] is not None:
-        skill_data = {
-            "id": result["skill_id_sel"],
-            "name": result["skill_name"],
-            "description": None
-        }
-    
-    return {
-        "id": result["id"],
-        "title": result["title"],
-        "description": result["description"],
-        "price": float(result["price"]) if result["price"] is not None else None,
-        "is_active": bool(result["is_active"]) if result["is_active"] is not None else True,
-        "created_at": result["created_at"],
-        "image_url": result["image_url"],
-        "vendor": {
-            "id": result["vendor_id_sel"],
-            "name": result["vendor_name"],
-            "email": result["vendor_email"],
-            "phone": result["vendor_phone"],
-            "role": result["vendor_role"],
-            "profile_picture_url": result["vendor_profile_picture_url"],
-            "created_at": result["vendor_created_at"],
-            "updated_at": result["vendor_updated_at"],
-        },
-        "skill": skill_data,
-    }
+    return service_rows.dump_service(result)
 
 
 @router.put("/{service_id}", response_model=schemas.ServiceOut)
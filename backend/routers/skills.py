@@ -1,11 +1,18 @@
 # backend/routers/skills.py
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from .. import crud, schemas
-from ..database import get_db
+from fastapi import APIRouter, Depends, Request
+from .. import schemas, cache, pagination
+from ..skill_registry import registry
+from ..pagination import PageParams, page_params
+from ..instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/skills", tags=["skills"])
+router = APIRouter(prefix="/skills", tags=["skills"], route_class=InstrumentedRoute)
+
+SKILL_LIST_CACHE = cache.CachedView("skills", list[schemas.SkillOut])
 
 @router.get("/", response_model=list[schemas.SkillOut])
-def get_all_skills(db: Session = Depends(get_db)):
-    return crud.get_skills(db)
+def get_all_skills(request: Request, page: PageParams = Depends(page_params)):
+    # Servido desde el catálogo en memoria, sin tocar la base
+    return SKILL_LIST_CACHE.serve(
+        request,
+        lambda: pagination.paginate_sequence(registry.all(), page, key=lambda s: (s.id,), tag="skills").as_result(),
+    )
@@ -1,23 +1,54 @@
 # routers/users.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from .. import crud, schemas
+from .. import auth, crud, dashboard, geo, schemas, ratings, pagination, ratelimit
+from ..pagination import PageParams, page_params
+from fastapi.concurrency import run_in_threadpool
 from ..database import get_db
-from ..crud import verify_password
+from .. import hashing
+from ..instrumentation import InstrumentedRoute
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=InstrumentedRoute)
+
+def _hashing_overloaded():
+    return HTTPException(
+        status_code=503,
+        detail="Servicio saturado, intenta de nuevo en unos segundos",
+        headers={"Retry-After": "1"},
+    )
 
 # Registro
+# async: el hash corre en el executor de hashing.py y la BD en el threadpool,
+# así ningún thread del pool queda bloqueado esperando a argon2
 @router.post("/", response_model=schemas.UserOut)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    return crud.create_user(db, user)
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    try:
+        password_hash = await hashing.hash_password_async(user.password)
+    except hashing.HashingOverloaded:
+        raise _hashing_overloaded()
+    return await run_in_threadpool(crud.create_user, db, user, password_hash)
 
 # Obtener todos los usuarios
 @router.get("/", response_model=list[schemas.UserOut])
-def get_users(db: Session = Depends(get_db)):
-    return crud.get_users(db)
+def get_users(response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)):
+    return pagination.apply_to_response(response, crud.get_users(db, page))
+
+# Vendedores cerca de un punto (ver geo.py)
+@router.get("/vendors/near", response_model=list[schemas.NearbyVendorOut])
+def get_nearby_vendors(
+    response: Response,
+    area: geo.GeoParams = Depends(geo.geo_params),
+    skill_id: Optional[int] = Query(None, description="Solo vendedores con esta skill"),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_db),
+):
+    """Vendedores dentro del radio de lat/lon (o de `near`), del más cercano al más lejano"""
+    resolved = geo.resolve(db, area)
+    if resolved is None or resolved.center is None:
+        raise HTTPException(status_code=422, detail="Indica lat/lon o near")
+    return pagination.apply_to_response(response, crud.get_nearby_vendors(db, resolved, page, skill_id))
 
 # Obtener un usuario por ID
 @router.get("/{user_id}", response_model=schemas.UserOut)
@@ -38,12 +69,27 @@ def update_user(user_id: int, user_update: schemas.UserUpdate, db: Session = Dep
 
 # Login
 @router.post("/login")
-def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(crud.models.User).filter(crud.models.User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.password_hash):
+async def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
+    # Por IP lo limita el middleware; por email aquí, contra intentos desde muchas IPs.
+    # Solo cuentan los fallidos: si no hubo contraseña incorrecta se devuelve el token
+    email = user.email.strip().lower()
+    await ratelimit.check("login", email, ratelimit.LOGIN_EMAIL_LIMIT)
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, user.email)
+    if not db_user:
+        raise HTTPException(status_code=400, detail="Email o contraseña incorrectos")
+    try:
+        valid, new_hash = await hashing.verify_and_update_async(user.password, db_user.password_hash)
+    except hashing.HashingOverloaded:
+        await ratelimit.refund("login", email, ratelimit.LOGIN_EMAIL_LIMIT)
+        raise _hashing_overloaded()
+    if not valid:
         raise HTTPException(status_code=400, detail="Email o contraseña incorrectos")
+    await ratelimit.refund("login", email, ratelimit.LOGIN_EMAIL_LIMIT)
+    if new_hash:
+        # Parámetros de argon2 cambiaron: se guarda el hash actualizado
+        await run_in_threadpool(crud.update_password_hash, db, db_user, new_hash)
     return {
-        "access_token": "fake-jwt-token",
+        **auth.issue_token(db_user.id, db_user.role),
         "user": {
             "id": db_user.id,
             "name": db_user.name,
@@ -57,6 +103,12 @@ def login(user: schemas.UserLogin, db: Session = Depends(get_db)):
         }
     }
 
+# Logout: revoca el token con que se llama
+@router.post("/logout")
+def logout(principal: auth.Principal = Depends(auth.current_principal), db: Session = Depends(get_db)):
+    auth.revoke(db, principal)
+    return {"message": "Sesión cerrada"}
+
 class SkillAssignment(BaseModel):
     skill_ids: List[int]
 
@@ -76,7 +128,23 @@ def assign_skills_to_user(user_id: int, skills: SkillAssignment, db: Session = D
     user = crud.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return crud.assign_skills(db, user_id, skills.skill_ids)
+    return _skills_result(crud.assign_skills(db, user_id, skills.skill_ids))
+
+# Replace user's skill set
+@router.put("/{user_id}/skills")
+def replace_user_skills(user_id: int, skills: SkillAssignment, db: Session = Depends(get_db)):
+    """Reemplazar el conjunto de skills de un usuario (agrega las nuevas y quita las demás)"""
+    user = crud.get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return _skills_result(crud.assign_skills(db, user_id, skills.skill_ids, replace=True))
+
+def _skills_result(result):
+    if result["unknown"]:
+        raise HTTPException(
+            status_code=404, detail=f"Skills no encontradas: {', '.join(map(str, result['unknown']))}"
+        )
+    return result
 
 # Remove skill from user
 @router.delete("/{user_id}/skills/{skill_id}")
@@ -94,31 +162,58 @@ def add_skill_to_user(user_id: int, skill_id: int, db: Session = Depends(get_db)
     user = crud.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return crud.assign_skills(db, user_id, [skill_id])
+    return _skills_result(crud.assign_skills(db, user_id, [skill_id]))
 
 # Get user's services (for vendors)
 @router.get("/{user_id}/services", response_model=List[schemas.ServiceOut])
-def get_user_services(user_id: int, db: Session = Depends(get_db)):
+def get_user_services(
+    user_id: int, response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
+):
     """Obtener todos los servicios de un vendedor"""
     user = crud.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return crud.get_services_by_vendor(db, user_id)
+    return pagination.apply_to_response(response, crud.get_services_by_vendor(db, user_id, page))
 
 # Get jobs as vendor
 @router.get("/{user_id}/jobs-as-vendor", response_model=List[schemas.JobOut])
-def get_user_jobs_as_vendor(user_id: int, db: Session = Depends(get_db)):
+def get_user_jobs_as_vendor(
+    user_id: int, response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
+):
     """Obtener todos los trabajos donde el usuario es el vendedor"""
     user = crud.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return crud.get_jobs_by_vendor(db, user_id)
+    return pagination.apply_to_response(response, crud.get_jobs_by_vendor(db, user_id, page))
 
 # Get jobs as contractor
 @router.get("/{user_id}/jobs-as-contractor", response_model=List[schemas.JobOut])
-def get_user_jobs_as_contractor(user_id: int, db: Session = Depends(get_db)):
+def get_user_jobs_as_contractor(
+    user_id: int, response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_db)
+):
     """Obtener todos los trabajos donde el usuario es el contratador"""
     user = crud.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return crud.get_jobs_by_contractor(db, user_id)
\ No newline at end of file
+    return pagination.apply_to_response(response, crud.get_jobs_by_contractor(db, user_id, page))
+
+# Get vendor rating summary
+@router.get("/{user_id}/rating", response_model=schemas.RatingSummaryOut)
+def get_user_rating(user_id: int, db: Session = Depends(get_db)):
+    """Obtener el resumen de calificaciones de un vendedor (precalculado)"""
+    user = crud.get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    summary = ratings.get_vendor_rating(db, user_id)
+    if not summary:
+        return schemas.RatingSummaryOut()
+    return summary
+
+# Get vendor dashboard summary
+@router.get("/{user_id}/dashboard", response_model=schemas.VendorDashboardOut)
+def get_user_dashboard(user_id: int, db: Session = Depends(get_db)):
+    """Resumen del panel del vendedor: trabajos por estado, ingresos, calificación y actividad reciente"""
+    user = crud.get_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return dashboard.get_summary(db, user_id)
@@ -1,6 +1,13 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Optional
 from datetime import date, datetime
+from sqlalchemy.orm import joinedload
+from . import models
+
+# Cada schema que anida relaciones declara al lado sus opciones de carga
+# (`*_LOAD`). Las consultas que devuelven ese schema las aplican con
+# `.options(*schemas.X_LOAD)` para traer todo en un solo SELECT en vez de
+# disparar un lazy load por fila y relación al serializar.
 
 # ==========================
 # 1️⃣ Usuario
@@ -21,10 +28,16 @@ class UserOut(UserBase):
     id: int
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
+    # Geocodificadas desde `location` (ver geo.py); None si el lugar no está en el nomenclátor
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
     class Config:
         orm_mode = True
 
+class NearbyVendorOut(UserOut):
+    distance_km: float
+
 
 class UserLogin(BaseModel):
     email: str
@@ -65,6 +78,8 @@ class UserSkillOut(BaseModel):
     class Config:
         orm_mode = True
 
+USER_SKILL_OUT_LOAD = (joinedload(models.UserSkill.skill),)
+
 
 # ==========================
 # 4️⃣ Servicio
@@ -93,9 +108,90 @@ class ServiceOut(ServiceBase):
     created_at: Optional[datetime]
     vendor: UserOut
     skill: Optional[SkillOut]  # <- antes era sin Optional
+    avg_rating: Optional[float] = None  # desde service_ratings
+    review_count: Optional[int] = None
+    distance_km: Optional[float] = None  # solo en /services/search con lat/lon o near
     class Config:
         orm_mode = True
 
+SERVICE_OUT_LOAD = (
+    joinedload(models.Service.vendor),
+    joinedload(models.Service.skill),
+    joinedload(models.Service.rating_summary),
+)
+
+
+
+# Resumen de calificaciones (service_ratings / vendor_ratings)
+class RatingSummaryOut(BaseModel):
+    review_count: int = 0
+    rating_sum: int = 0
+    avg_rating: Optional[float] = None
+
+
+# Autocompletado de /services/suggest (ver suggest.py)
+class SuggestionOut(BaseModel):
+    text: str
+    kind: str  # "service" o "skill"
+    id: int
+
+# Facetas de /services/search?facets=true (ver search.py)
+class SkillFacetOut(BaseModel):
+    skill_id: int
+    name: Optional[str] = None
+    count: int
+
+class RatingFacetOut(BaseModel):
+    stars: int  # estrellas completas del promedio (0 = sin reseñas o menos de 1)
+    count: int
+
+class PriceBucketOut(BaseModel):
+    from_: float = Field(alias="from")
+    to: float
+    count: int
+
+class PriceFacetOut(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    buckets: List[PriceBucketOut] = []
+
+class SearchFacetsOut(BaseModel):
+    total: int = 0
+    skills: List[SkillFacetOut] = []
+    ratings: List[RatingFacetOut] = []
+    price: PriceFacetOut = PriceFacetOut()
+
+class SearchPageOut(BaseModel):
+    items: List[ServiceOut]
+    facets: SearchFacetsOut
+
+# Panel del vendedor (ver dashboard.py)
+class DashboardRevenueOut(BaseModel):
+    completed: float = 0.0
+    in_progress: float = 0.0
+    pending: float = 0.0
+
+class DashboardJobOut(BaseModel):
+    id: int
+    status: Optional[str]
+    total_amount: Optional[float]
+    created_at: Optional[datetime]
+    service_id: Optional[int]
+    service_title: Optional[str]
+    contractor_id: Optional[int]
+    contractor_name: Optional[str]
+
+class VendorDashboardOut(BaseModel):
+    vendor_id: int
+    jobs_by_status: Dict[str, int]
+    total_jobs: int
+    revenue: DashboardRevenueOut
+    review_count: int = 0
+    avg_rating: Optional[float] = None
+    service_count: int = 0
+    active_service_count: int = 0
+    recent_jobs: List[DashboardJobOut] = []
+
 
 
 # ==========================
@@ -123,6 +219,14 @@ class JobOut(JobBase):
     class Config:
         orm_mode = True
 
+JOB_OUT_LOAD = (
+    joinedload(models.Job.contractor_user),
+    joinedload(models.Job.vendor_user),
+    joinedload(models.Job.service).joinedload(models.Service.vendor),
+    joinedload(models.Job.service).joinedload(models.Service.skill),
+    joinedload(models.Job.service).joinedload(models.Service.rating_summary),
+)
+
 
 # ==========================
 # 6️⃣ Reseña
@@ -0,0 +1,384 @@
+"""
+Motor de búsqueda de servicios.
+
+Construye la consulta de `/services/search` sobre la columna `services.search_vector`,
+que mantiene el trigger `tsvectorupdate` y que está indexada con GIN
+(`idx_services_search_vector`). Así el filtro `@@` usa el índice en lugar de
+recalcular `to_tsvector` fila por fila.
+
+Modos (`mode`):
+
+- "fts": solo full text search (`plainto_tsquery`).
+- "fuzzy": similitud por trigramas (`%>`, word_similarity) entre el texto normalizado
+  con `normalize_search_text` (lower + unaccent) y `services.title_normalized` o
+  `skills.name_normalized`, con sus índices GIN de trigramas. Tolera acentos y
+  errores de tipeo ("plomeria", "electrisista").
+- "auto" (por defecto): full text search y, si la primera página sale vacía, la misma
+  búsqueda en modo difuso. El cursor recuerda el modo con que se armó.
+
+Con lat/lon, `near` o `bbox` se filtra además por zona y se puede ordenar por
+distancia (ver geo.py).
+
+Con `facets=true` se calculan además, sobre el conjunto filtrado, los conteos por skill,
+por estrellas y un histograma de precios (`build_facets_sql`), en la misma sentencia
+que la página (`build_search_with_facets_sql`).
+"""
+import json
+import os
+from typing import Dict, Optional, List, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+from . import pagination
+from .geo import Area
+from .pagination import Key, Keyset, Page, PageParams, created_desc_sql
+from .service_rows import select_services
+from .skill_registry import registry
+
+load_dotenv()
+
+SEARCH_LANGUAGE = "spanish"
+# Modo que terminó usando la búsqueda (útil con "auto")
+SEARCH_MODE_HEADER = "X-Search-Mode"
+# Umbral de word_similarity para el modo difuso (el de pg_trgm por defecto es 0.6)
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD") or 0.4)
+# Barras del histograma de precios de las facetas
+SEARCH_PRICE_BUCKETS = int(os.getenv("SEARCH_PRICE_BUCKETS") or 10)
+
+_FUZZY_FILTER = """(
+            s.title_normalized %> normalize_search_text(:query)
+            OR s.skill_id = ANY(ARRAY(
+                SELECT sk.id FROM skills sk WHERE sk.name_normalized %> normalize_search_text(:query)
+            ))
+        )"""
+
+_FUZZY_RANK = """GREATEST(
+            word_similarity(normalize_search_text(:query), s.title_normalized),
+            COALESCE((
+                SELECT word_similarity(normalize_search_text(:query), sk.name_normalized)
+                FROM skills sk WHERE sk.id = s.skill_id
+            ), 0)
+        )::float8"""
+
+# Va en su propia sentencia, antes de la búsqueda: el índice de trigramas lee el umbral al
+# empezar el scan y Postgres no garantiza que una CTE con set_config se evalúe antes
+_THRESHOLD_SQL = "SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"
+
+
+def _filters(params, query, skill_ids, min_price, max_price, min_rating, fuzzy, area) -> Dict[str, str]:
+    """Condiciones del WHERE por filtro (texto, zona, skills, precio, rating); agrega sus parámetros."""
+    filters = {}
+    if query:
+        filters["text"] = _FUZZY_FILTER if fuzzy else "s.search_vector @@ plainto_tsquery(CAST(:lang AS regconfig), :query)"
+        params["query"] = query
+    if area is not None:
+        filters["area"] = area.where(params)
+    if skill_ids:
+        filters["skill"] = "s.skill_id = ANY(:skill_ids)"
+        params["skill_ids"] = skill_ids
+    price = []
+    if min_price is not None:
+        price.append("s.price >= :min_price")
+        params["min_price"] = min_price
+    if max_price is not None:
+        price.append("s.price <= :max_price")
+        params["max_price"] = max_price
+    if price:
+        filters["price"] = " AND ".join(price)
+    if min_rating is not None:
+        filters["rating"] = "COALESCE(rps.avg_rating, 0) >= :min_rating"
+        params["min_rating"] = min_rating
+    return filters
+
+
+def build_search_sql(
+    query: str = "",
+    skill_ids: Optional[List[int]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    sort_by: str = "relevance",
+    page: Optional[PageParams] = None,
+    fuzzy: bool = False,
+    area: Optional[Area] = None,
+):
+    """
+    Devuelve (sql, params, keyset) para la búsqueda de servicios.
+
+    - Con texto: filtra con `search_vector @@ plainto_tsquery(...)` y calcula el rank
+      sobre el vector guardado; con `fuzzy`, filtra y ordena por similitud de trigramas
+      (el umbral lo fija `_THRESHOLD_SQL` en la misma transacción).
+    - Sin texto: no hay filtro de texto ni ranking; el rank es 0 constante.
+    - Con `area` (ver geo.py): filtra por la caja / el radio y, si tiene centro, agrega
+      `distance_km` y permite `sort_by="distance"`.
+
+    El orden siempre termina en `s.id` para que el cursor de paginación sea estable.
+    """
+    query = (query or "").strip()
+    params = {"lang": SEARCH_LANGUAGE}
+    filters = ["TRUE", *_filters(params, query, skill_ids, min_price, max_price, min_rating, fuzzy, area).values()]
+    distance_expr = area.distance_sql(params) if area is not None and area.center else None
+
+    if query and fuzzy:
+        rank_expr = _FUZZY_RANK
+    elif query:
+        # float8 para que el valor del cursor haga round-trip exacto
+        rank_expr = "ts_rank_cd(s.search_vector, plainto_tsquery(CAST(:lang AS regconfig), :query))::float8"
+    else:
+        rank_expr = "0"
+
+    if sort_by == "price_asc":
+        keys = [Key("s.price"), Key("s.id")]
+    elif sort_by == "price_desc":
+        keys = [Key("s.price", desc=True), Key("s.id", desc=True)]
+    elif sort_by == "rating_desc":
+        keys = [Key("COALESCE(rps.avg_rating, 0)", desc=True, attr="avg_rating_calc"), Key("s.id", desc=True)]
+    elif sort_by == "distance" and distance_expr:
+        keys = [Key(distance_expr, attr="distance_km"), Key("s.id")]
+    elif query:
+        keys = [Key(rank_expr, desc=True, attr="rank"), Key("s.id", desc=True)]
+        sort_by = "relevance"
+    else:
+        # Sin texto no hay relevancia que ordenar: los más recientes primero
+        keys = created_desc_sql("s")
+        sort_by = "recent"
+
+    tag = f"search:{'fuzzy:' if query and fuzzy else ''}{sort_by}"
+    if sort_by == "distance":
+        # Las distancias del cursor solo valen para el mismo centro
+        tag = area.cursor_tag(tag)
+    keyset = Keyset(keys, page or PageParams(), tag=tag)
+    keyset_sql, keyset_params = keyset.where()
+    filters.append(keyset_sql)
+    params.update(keyset_params)
+
+    where_clause = " AND ".join(filters)
+
+    extra_columns = f"\n            {rank_expr} AS rank"
+    if distance_expr:
+        extra_columns += f",\n            {distance_expr} AS distance_km"
+    sql = select_services(
+        where=where_clause,
+        order_by=keyset.order_by(),
+        limit=keyset.fetch_limit,
+        extra_columns=extra_columns,
+    )
+    return sql, params, keyset
+
+
+def _modes(mode: str, query: str, page: Optional[PageParams]) -> Tuple[str, ...]:
+    """Modos a probar en orden; con cursor, solo el modo con que se armó."""
+    if not (query or "").strip() or mode == "fts":
+        return ("fts",)
+    if mode == "fuzzy":
+        return ("fuzzy",)
+    if page is not None and page.cursor:
+        tag = pagination.peek_cursor_tag(page.cursor) or ""
+        return ("fuzzy",) if tag.startswith("search:fuzzy:") else ("fts",)
+    return ("fts", "fuzzy")
+
+
+def search_services(db: Session, mode: str = "fts", **filters) -> Page:
+    """Ejecuta la búsqueda y devuelve la página de filas (mappings) resultante."""
+    return run_search(db, mode, **filters)[0]
+
+
+async def search_services_async(db: AsyncSession, mode: str = "fts", **filters) -> Page:
+    """Igual que `search_services`, sobre una sesión asíncrona."""
+    return (await run_search_async(db, mode, **filters))[0]
+
+
+def run_search(db: Session, mode: str = "auto", **filters) -> Tuple[Page, str]:
+    """Búsqueda con el modo pedido; devuelve (página, modo usado)."""
+    for used in _modes(mode, filters.get("query"), filters.get("page")):
+        sql, params, keyset = build_search_sql(fuzzy=used == "fuzzy", **filters)
+        if used == "fuzzy":
+            db.execute(text(_THRESHOLD_SQL), {"threshold": str(SEARCH_FUZZY_THRESHOLD)})
+        result = keyset.page(db.execute(text(sql), params).mappings().all())
+        if result.items:
+            break
+    return result, used
+
+
+async def run_search_async(db: AsyncSession, mode: str = "auto", **filters) -> Tuple[Page, str]:
+    """Igual que `run_search`, sobre una sesión asíncrona."""
+    for used in _modes(mode, filters.get("query"), filters.get("page")):
+        sql, params, keyset = build_search_sql(fuzzy=used == "fuzzy", **filters)
+        if used == "fuzzy":
+            await db.execute(text(_THRESHOLD_SQL), {"threshold": str(SEARCH_FUZZY_THRESHOLD)})
+        result = keyset.page((await db.execute(text(sql), params)).mappings().all())
+        if result.items:
+            break
+    return result, used
+
+
+# ==========================
+# Facetas
+# ==========================
+# Una sola pasada sobre los servicios que cumplen el texto (y la zona): cada fila marca si cumple
+# los filtros de skill (k), precio (p) y rating (r), y GROUPING SETS cuenta por skill,
+# por estrellas y por barra de precio a la vez. Cada faceta cuenta con los demás
+# filtros pero no con el suyo (así el cliente ve cuántos habría al cambiarlo); el
+# rango del histograma sale de una ventana sobre las filas que cumplen k y r.
+_FACETS_SQL = """
+        WITH base AS (
+            SELECT s.skill_id, s.price,
+                   FLOOR(COALESCE(rps.avg_rating, 0))::int AS stars,
+                   {skill} AS k, {price} AS p, {rating} AS r
+            FROM services s
+            LEFT JOIN service_ratings rps ON rps.service_id = s.id
+            WHERE {text} AND {area}
+        ), ranged AS (
+            SELECT *,
+                   MIN(price) FILTER (WHERE k AND r) OVER () AS lo,
+                   MAX(price) FILTER (WHERE k AND r) OVER () AS hi
+            FROM base
+        ), bucketed AS (
+            SELECT *,
+                   CASE
+                       WHEN price IS NULL OR NOT (k AND r) THEN NULL
+                       WHEN hi > lo THEN LEAST(width_bucket(price, lo, hi, :buckets), :buckets)
+                       ELSE 1
+                   END AS price_bucket
+            FROM ranged
+        )
+        SELECT GROUPING(skill_id) = 0 AS by_skill,
+               GROUPING(stars) = 0 AS by_stars,
+               GROUPING(price_bucket) = 0 AS by_price,
+               skill_id, stars, price_bucket,
+               COUNT(*) FILTER (WHERE p AND r) AS skill_count,
+               COUNT(*) FILTER (WHERE k AND p) AS stars_count,
+               COUNT(*) FILTER (WHERE k AND r) AS price_count,
+               COUNT(*) FILTER (WHERE k AND p AND r) AS total,
+               MIN(lo) AS lo, MAX(hi) AS hi
+        FROM bucketed
+        GROUP BY GROUPING SETS ((skill_id), (stars), (price_bucket), ())
+"""
+
+
+def build_facets_sql(
+    query: str = "",
+    skill_ids: Optional[List[int]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[float] = None,
+    fuzzy: bool = False,
+    area: Optional[Area] = None,
+    buckets: int = SEARCH_PRICE_BUCKETS,
+    **ignored,  # sort_by / page: no cambian las facetas
+):
+    """Devuelve (sql, params) de las facetas para los mismos filtros que `build_search_sql`."""
+    params = {"lang": SEARCH_LANGUAGE, "buckets": buckets}
+    filters = _filters(params, (query or "").strip(), skill_ids, min_price, max_price, min_rating, fuzzy, area)
+    sql = _FACETS_SQL.format(
+        text=filters.get("text", "TRUE"),
+        area=filters.get("area", "TRUE"),
+        skill=filters.get("skill", "TRUE"),
+        price=filters.get("price", "TRUE"),
+        rating=filters.get("rating", "TRUE"),
+    )
+    return sql, params
+
+
+def facets_from_rows(rows, buckets: int = SEARCH_PRICE_BUCKETS) -> dict:
+    """Filas de `_FACETS_SQL` -> dict de `schemas.SearchFacetsOut`."""
+    result = {"total": 0, "skills": [], "ratings": [], "price": {"min": None, "max": None, "buckets": []}}
+    price_counts, lo, hi = {}, None, None
+    for row in rows:
+        if row["by_skill"]:
+            if row["skill_id"] is not None and row["skill_count"]:
+                skill = registry.resolve(row["skill_id"])
+                result["skills"].append({
+                    "skill_id": row["skill_id"],
+                    "name": skill.name if skill is not None else None,
+                    "count": row["skill_count"],
+                })
+        elif row["by_stars"]:
+            if row["stars_count"]:
+                result["ratings"].append({"stars": row["stars"], "count": row["stars_count"]})
+        elif row["by_price"]:
+            if row["price_bucket"] is not None:
+                price_counts[row["price_bucket"]] = row["price_count"]
+        else:
+            result["total"] = row["total"]
+            lo, hi = row["lo"], row["hi"]
+
+    result["skills"].sort(key=lambda f: (-f["count"], f["skill_id"]))
+    result["ratings"].sort(key=lambda f: f["stars"])
+    if lo is not None:
+        lo, hi = float(lo), float(hi)
+        n = buckets if hi > lo else 1
+        width = (hi - lo) / n
+        result["price"] = {
+            "min": lo,
+            "max": hi,
+            "buckets": [
+                {
+                    "from": round(lo + i * width, 2),
+                    "to": round(lo + (i + 1) * width, 2) if i + 1 < n else hi,
+                    "count": price_counts.get(i + 1, 0),
+                }
+                for i in range(n)
+            ],
+        }
+    return result
+
+
+# La página va a la derecha de un LEFT JOIN contra la única fila de facetas: si la página
+# está vacía queda igual una fila (con las columnas de la página en NULL) que trae las
+# facetas. El join no garantiza el orden de la página, así que se vuelve a ordenar afuera
+# con las mismas claves, sobre las columnas proyectadas (`keyset.order_by("page")`).
+_WITH_FACETS_SQL = """
+        WITH facet_rows AS ({facets})
+        SELECT page.*, facets.rows AS _facets
+        FROM (SELECT json_agg(facet_rows) AS rows FROM facet_rows) facets
+        LEFT JOIN LATERAL ({page}) page ON TRUE
+        ORDER BY {order_by}
+"""
+
+
+def build_search_with_facets_sql(fuzzy: bool = False, **filters):
+    """Devuelve (sql, params, keyset): la página de `build_search_sql` y sus facetas en una sentencia."""
+    page_sql, params, keyset = build_search_sql(fuzzy=fuzzy, **filters)
+    facets_sql, facet_params = build_facets_sql(fuzzy=fuzzy, **filters)
+    sql = _WITH_FACETS_SQL.format(facets=facets_sql, page=page_sql, order_by=keyset.order_by("page"))
+    return sql, {**facet_params, **params}, keyset
+
+
+def _split_facets(rows) -> Tuple[list, dict]:
+    """Filas de `_WITH_FACETS_SQL` -> (filas de la página, facetas)."""
+    facet_rows = rows[0]["_facets"] if rows else None
+    if isinstance(facet_rows, str):
+        # asyncpg devuelve json como texto
+        facet_rows = json.loads(facet_rows)
+    items = [row for row in rows if row["id"] is not None]
+    return items, facets_from_rows(facet_rows or [])
+
+
+def run_search_with_facets(db: Session, mode: str = "auto", **filters) -> Tuple[Page, str, dict]:
+    """Como `run_search`, con las facetas del modo usado; devuelve (página, modo usado, facetas)."""
+    for used in _modes(mode, filters.get("query"), filters.get("page")):
+        sql, params, keyset = build_search_with_facets_sql(fuzzy=used == "fuzzy", **filters)
+        if used == "fuzzy":
+            db.execute(text(_THRESHOLD_SQL), {"threshold": str(SEARCH_FUZZY_THRESHOLD)})
+        items, facets = _split_facets(db.execute(text(sql), params).mappings().all())
+        result = keyset.page(items)
+        if result.items:
+            break
+    return result, used, facets
+
+
+async def run_search_with_facets_async(db: AsyncSession, mode: str = "auto", **filters) -> Tuple[Page, str, dict]:
+    """Igual que `run_search_with_facets`, sobre una sesión asíncrona."""
+    for used in _modes(mode, filters.get("query"), filters.get("page")):
+        sql, params, keyset = build_search_with_facets_sql(fuzzy=used == "fuzzy", **filters)
+        if used == "fuzzy":
+            await db.execute(text(_THRESHOLD_SQL), {"threshold": str(SEARCH_FUZZY_THRESHOLD)})
+        items, facets = _split_facets((await db.execute(text(sql), params)).mappings().all())
+        result = keyset.page(items)
+        if result.items:
+            break
+    return result, used, facets
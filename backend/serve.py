@@ -0,0 +1,115 @@
+"""
+Servidor de producción: gunicorn con workers de uvicorn y la app precargada.
+
+    python -m backend.serve
+
+El maestro importa `backend.main` una sola vez y corre `warmup.prepare` (mappers,
+schemas, OpenAPI) antes de hacer fork, así los workers arrancan con todo eso armado
+y compartido por copy-on-write. En cada worker, `post_fork` descarta (sin cerrarlas)
+las conexiones del pool que pudiera haber heredado del maestro, y el lifespan abre
+las suyas en `warmup.warm_up` antes de responder 200 en `/health/ready`.
+
+Variables de entorno:
+- PORT (por defecto 8000) y HOST (0.0.0.0).
+- WEB_CONCURRENCY: número de workers; por defecto los núcleos de CPU. Cada worker
+  tiene sus propios pools (síncrono + asyncpg), así que el máximo de conexiones a
+  Postgres es workers * 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW). Con más de uno, la
+  cache de respuestas debe ser compartida (CACHE_BACKEND=redis, o "none"): con
+  "memory" las invalidaciones no llegan a los otros workers y no se arranca.
+- WORKER_TIMEOUT (60 s), GRACEFUL_TIMEOUT (30 s), KEEPALIVE (5 s).
+- MAX_REQUESTS / MAX_REQUESTS_JITTER: reciclar workers cada N requests (0 = nunca).
+- FORWARDED_ALLOW_IPS: proxies de confianza, separados por coma, cuyos X-Forwarded-*
+  se creen (por defecto solo 127.0.0.1). Desde cualquier otra IP esas cabeceras se
+  ignoran y el cliente es la IP de la conexión, así nadie elige su IP para los límites
+  de ratelimit.py. Detrás de un balanceador, agregar aquí sus direcciones.
+
+gunicorn no corre en Windows; en desarrollo usar `uvicorn backend.main:app --reload`.
+"""
+import os
+
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+load_dotenv()
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def options() -> dict:
+    return {
+        "bind": f"{os.getenv('HOST', '0.0.0.0')}:{_env_int('PORT', 8000)}",
+        "workers": _env_int("WEB_CONCURRENCY", os.cpu_count() or 1),
+        "worker_class": "uvicorn_worker.UvicornWorker",
+        "preload_app": True,
+        "timeout": _env_int("WORKER_TIMEOUT", 60),
+        "graceful_timeout": _env_int("GRACEFUL_TIMEOUT", 30),
+        "keepalive": _env_int("KEEPALIVE", 5),
+        "max_requests": _env_int("MAX_REQUESTS", 0),
+        "max_requests_jitter": _env_int("MAX_REQUESTS_JITTER", 0),
+        "forwarded_allow_ips": os.getenv("FORWARDED_ALLOW_IPS") or "127.0.0.1",
+        "accesslog": "-",
+        "post_fork": post_fork,
+        "when_ready": when_ready,
+    }
+
+
+def post_fork(server, worker):
+    # El worker no debe usar sockets del maestro: close=False los suelta sin cerrarlos
+    # (cerrarlos aquí cortaría la conexión del maestro en el servidor)
+    from .database import engine, async_engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+def when_ready(server):
+    from . import database
+
+    workers = server.cfg.workers
+    per_pool = 0 if database.DB_PGBOUNCER else database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
+    server.log.info(
+        "%s workers; hasta %s conexiones a Postgres (2 pools x %s por worker)",
+        workers, workers * 2 * per_pool, per_pool,
+    )
+
+
+class Server(BaseApplication):
+    def __init__(self, config: dict):
+        self.config = config
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.config.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Con preload_app corre en el maestro, antes del fork
+        from .main import app
+        from . import warmup
+
+        warmup.prepare(app)
+        return app
+
+
+def _check_cache_backend(workers: int):
+    from . import cache
+
+    if workers > 1 and not cache.is_shared():
+        raise SystemExit(
+            f"CACHE_BACKEND={cache.CACHE_BACKEND} es por proceso y no sirve con {workers} workers: "
+            "las invalidaciones solo se verían en un worker. Usar CACHE_BACKEND=redis "
+            "(o CACHE_BACKEND=none), o WEB_CONCURRENCY=1."
+        )
+
+
+def main():
+    config = options()
+    _check_cache_backend(config["workers"])
+    Server(config).run()
+
+
+if __name__ == "__main__":
+    main()
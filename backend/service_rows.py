@@ -0,0 +1,139 @@
+"""
+Proyección única de servicios para el SQL crudo y serializador directo a bytes.
+
+Todas las consultas de `routers/services.py` y `search.py` seleccionan las mismas
+columnas (servicio + rating precalculado + vendedor); aquí se definen una sola vez.
+`dump_services`/`dump_service` convierten las filas directamente en el JSON de
+`schemas.ServiceOut` (mismo orden de campos y formatos que Pydantic), sin armar dicts
+intermedios que FastAPI vuelva a validar.
+"""
+from decimal import Decimal
+
+from fastapi import Response
+
+from .fastjson import dumps
+from .instrumentation import serializing
+from .skill_registry import registry
+
+# Columnas de ServiceOut; `rank` y demás extras se agregan por consulta
+SERVICE_COLUMNS = """
+            s.id,
+            s.vendor_id,
+            s.skill_id,
+            s.title,
+            s.description,
+            s.price,
+            s.is_active,
+            s.created_at,
+            s.image_url,
+            COALESCE(rps.avg_rating, 0) AS avg_rating_calc,
+            COALESCE(rps.review_count, 0) AS review_count,
+            u.id AS vendor_id_sel,
+            u.name AS vendor_name,
+            u.email AS vendor_email,
+            u.phone AS vendor_phone,
+            u.role AS vendor_role,
+            u.profile_picture_url AS vendor_profile_picture_url,
+            u.location AS vendor_location,
+            u.bio AS vendor_bio,
+            u.created_at AS vendor_created_at,
+            u.updated_at AS vendor_updated_at,
+            u.latitude AS vendor_latitude,
+            u.longitude AS vendor_longitude"""
+
+SERVICE_FROM = """
+        FROM services s
+        LEFT JOIN service_ratings rps ON rps.service_id = s.id
+        LEFT JOIN users u ON u.id = s.vendor_id"""
+
+
+def select_services(where: str = "TRUE", order_by: str = None, limit: int = None, extra_columns: str = "") -> str:
+    """Arma el SELECT de servicios con la proyección compartida."""
+    sql = f"SELECT{SERVICE_COLUMNS}{',' if extra_columns else ''}{extra_columns}{SERVICE_FROM}\n        WHERE {where}"
+    if order_by:
+        sql += f"\n        ORDER BY {order_by}"
+    if limit is not None:
+        sql += f"\n        LIMIT {int(limit)}"
+    return sql
+
+
+def _float(value):
+    if value is None:
+        return None
+    return float(value) if isinstance(value, (Decimal, int)) else value
+
+
+# Cache de SkillOut -> dict por versión del catálogo
+_skill_dicts = {"version": None, "by_id": {}}
+
+
+def _skill_dict(skill_id):
+    snapshot = registry.snapshot()
+    if _skill_dicts["version"] != snapshot.version:
+        _skill_dicts["by_id"] = {sid: skill.model_dump() for sid, skill in snapshot.by_id.items()}
+        _skill_dicts["version"] = snapshot.version
+    if skill_id is None:
+        return None
+    skill = _skill_dicts["by_id"].get(skill_id)
+    if skill is None:
+        # Skill creada después de la foto: sale como null hasta la recarga (ver skill_registry.py)
+        resolved = registry.resolve(skill_id)
+        skill = resolved.model_dump() if resolved is not None else None
+    return skill
+
+
+def row_to_dict(row) -> dict:
+    """Fila de la proyección -> dict con la forma y el orden de campos de ServiceOut."""
+    is_active = row["is_active"]
+    avg_rating = row["avg_rating_calc"]
+    return {
+        "title": row["title"],
+        "description": row["description"],
+        "price": _float(row["price"]),
+        "is_active": bool(is_active) if is_active is not None else True,
+        "image_url": row["image_url"],
+        "id": row["id"],
+        "created_at": row["created_at"],
+        "vendor": {
+            "name": row["vendor_name"],
+            "email": row["vendor_email"],
+            "phone": row["vendor_phone"],
+            "role": row["vendor_role"],
+            "profile_picture_url": row["vendor_profile_picture_url"],
+            "location": row["vendor_location"],
+            "bio": row["vendor_bio"],
+            "id": row["vendor_id_sel"],
+            "created_at": row["vendor_created_at"],
+            "updated_at": row["vendor_updated_at"],
+            "latitude": row["vendor_latitude"],
+            "longitude": row["vendor_longitude"],
+        },
+        "skill": _skill_dict(row["skill_id"]),
+        "avg_rating": float(avg_rating) if avg_rating is not None else 0.0,
+        "review_count": row["review_count"],
+        "distance_km": row.get("distance_km"),
+    }
+
+
+def dump_services(rows) -> bytes:
+    """Lista de filas -> JSON de list[ServiceOut]."""
+    with serializing():
+        return dumps([row_to_dict(row) for row in rows])
+
+
+def dump_services_page(rows, **extra) -> bytes:
+    """Filas + campos extra -> JSON de {"items": list[ServiceOut], **extra}."""
+    with serializing():
+        return dumps({"items": [row_to_dict(row) for row in rows], **extra})
+
+
+def dump_service(row) -> bytes:
+    """Una fila -> JSON de ServiceOut."""
+    with serializing():
+        return dumps(row_to_dict(row))
+
+
+def json_response(body: bytes, headers: dict = None) -> Response:
+    """Respuesta JSON con el cuerpo ya serializado (FastAPI no lo vuelve a validar)."""
+    headers = {k: v for k, v in (headers or {}).items() if v}
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,148 @@
+"""
+Catálogo de skills en memoria.
+
+Las skills casi nunca cambian, así que el proceso guarda una foto inmutable
+(tupla ordenada por id + dict id -> SkillOut) cargada al arrancar. Con ella se sirve
+`/skills/` y se resuelve `skill_id -> SkillOut` al serializar servicios, sin
+`JOIN skills` en las consultas.
+
+La foto se renueva:
+- cada SKILL_REGISTRY_REFRESH_SECONDS (por defecto 300), o
+- cuando alguien llama a `registry.bump()` (p.ej. tras crear skills), o
+- cuando se pide un id que no está en la foto.
+
+La recarga corre en un thread aparte; mientras tanto se sigue sirviendo la foto
+anterior, así que ningún request (ni el event loop de los endpoints async) espera a la
+base por las skills. Si la carga al arrancar falló, hasta que termine la primera se
+sirve un catálogo vacío. `resolve()` de un id que no está en la foto devuelve None (y
+lo registra en el log): el servicio sale con `skill: null` hasta la recarga, que además
+invalida las respuestas cacheadas.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from . import models, schemas
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SKILL_REGISTRY_REFRESH_SECONDS = int(os.getenv("SKILL_REGISTRY_REFRESH_SECONDS") or 300)
+
+
+@dataclass(frozen=True)
+class SkillSnapshot:
+    skills: Tuple[schemas.SkillOut, ...] = ()
+    by_id: Dict[int, schemas.SkillOut] = field(default_factory=dict)
+    version: int = 0
+    loaded_at: float = 0.0
+
+
+# Lo que se sirve mientras no hay ninguna foto cargada
+_EMPTY = SkillSnapshot()
+
+
+class SkillRegistry:
+    def __init__(self, refresh_seconds: int = SKILL_REGISTRY_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[SkillSnapshot] = None
+        self._stale = False
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # Se respondió con _EMPTY: la primera foto debe invalidar lo cacheado con ella
+        self._served_empty = False
+        # Ids desconocidos ya registrados en el log para la foto actual
+        self._missing_logged = set()
+
+    # --- carga ---
+    def load(self, db=None) -> SkillSnapshot:
+        """Carga la foto de forma síncrona (al arrancar, en el thread de recarga o desde código síncrono)."""
+        from .database import SessionLocal
+
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            rows = db.query(models.Skill).order_by(models.Skill.id).all()
+            skills = tuple(schemas.SkillOut.model_validate(row, from_attributes=True) for row in rows)
+        finally:
+            if own_session:
+                db.close()
+
+        previous = self._snapshot
+        snapshot = SkillSnapshot(
+            skills=skills,
+            by_id={skill.id: skill for skill in skills},
+            version=(previous.version + 1) if previous else 1,
+            loaded_at=time.monotonic(),
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._stale = False
+            self._missing_logged = set()
+            served_empty, self._served_empty = self._served_empty, False
+        if (previous is not None and previous.skills != skills) or (served_empty and skills):
+            # Las respuestas de servicios embeben la skill
+            from . import cache
+            cache.invalidate("skills", "services")
+        return snapshot
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.load()
+            except Exception:
+                logger.exception("No se pudo recargar el catálogo de skills")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="skill-registry-refresh", daemon=True).start()
+
+    def bump(self):
+        """Marca la foto como vieja; se recarga en el próximo acceso."""
+        self._stale = True
+
+    # --- lectura ---
+    def snapshot(self) -> SkillSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            self._served_empty = True
+            self._refresh_in_background()
+            return _EMPTY
+        expired = time.monotonic() - snapshot.loaded_at > self.refresh_seconds
+        if self._stale or expired:
+            self._refresh_in_background()
+        return snapshot
+
+    def all(self) -> Tuple[schemas.SkillOut, ...]:
+        return self.snapshot().skills
+
+    def resolve(self, skill_id: Optional[int]) -> Optional[schemas.SkillOut]:
+        """SkillOut de `skill_id`; None si `skill_id` es None o no está en la foto.
+
+        Un id desconocido (skill creada después de la foto) pide una recarga en segundo
+        plano; quien llama decide qué hacer con el None.
+        """
+        if skill_id is None:
+            return None
+        skill = self.snapshot().by_id.get(skill_id)
+        if skill is None:
+            if skill_id not in self._missing_logged:
+                self._missing_logged.add(skill_id)
+                logger.warning("Skill %s fuera del catálogo en memoria; se recarga en segundo plano", skill_id)
+            self.bump()
+            self._refresh_in_background()
+        return skill
+
+
+registry = SkillRegistry()
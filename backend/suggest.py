@@ -0,0 +1,227 @@
+"""
+Índice de prefijos en memoria para `/services/suggest` (autocompletado).
+
+Guarda una lista ordenada de claves normalizadas (minúsculas, sin acentos) de los
+títulos de servicios activos y de los nombres de skills; cada título aporta una clave
+por palabra desde la que puede empezar a escribirse ("reparacion de tuberias",
+"tuberias"). Una consulta es un `bisect` al prefijo y un recorrido corto, sin tocar
+la base.
+
+Se mantiene así:
+- carga completa al arrancar (main.py) o en la primera consulta;
+- `crud.create_service` / `update_service` / `delete_service` actualizan solo ese
+  servicio en el índice del worker que hizo el cambio (si hay una recarga en curso,
+  el cambio también se anota y se repite sobre el índice recargado antes de
+  publicarlo, así no se pierde);
+- las skills salen de la foto de `skill_registry` y se rearman cuando cambia su versión;
+- cada SUGGEST_REFRESH_SECONDS (o tras `bump()`, p.ej. una carga masiva) se recarga
+  todo en un thread aparte, así los demás workers ven los cambios; mientras tanto se
+  sigue sirviendo el índice anterior.
+"""
+import logging
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy.sql import text
+
+from .skill_registry import registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_REFRESH_SECONDS = int(os.getenv("SUGGEST_REFRESH_SECONDS") or 300)
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+# Entradas que se miran por consulta antes de ordenar (prefijos de 1 letra)
+SCAN_LIMIT = 400
+# Palabras más cortas no abren una clave propia ("de", "y", "a")
+MIN_WORD_LENGTH = 3
+
+SKILL, SERVICE = 0, 1
+_KIND_NAMES = {SKILL: "skill", SERVICE: "service"}
+
+# (clave, tipo, empieza a mitad del texto, id)
+Entry = Tuple[str, int, bool, int]
+
+
+def normalize(value: Optional[str]) -> str:
+    """Minúsculas, sin acentos y con espacios simples (como normalize_search_text en SQL)."""
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.lower().split())
+
+
+def _keys(value: str) -> List[Tuple[str, bool]]:
+    words = normalize(value).split()
+    keys = []
+    for i, word in enumerate(words):
+        if i == 0 or len(word) >= MIN_WORD_LENGTH:
+            keys.append((" ".join(words[i:]), i > 0))
+    return keys
+
+
+class SuggestIndex:
+    def __init__(self, refresh_seconds: int = SUGGEST_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._entries: List[Entry] = []
+        self._texts: Dict[Tuple[int, int], str] = {}  # (tipo, id) -> texto original
+        self._loaded_at: Optional[float] = None
+        self._skills_version: Optional[int] = None
+        self._stale = False
+        self._refreshing = False
+        # Cambios incrementales anotados durante una recarga (None si no hay ninguna)
+        self._journal: Optional[List[tuple]] = None
+        self._loading = 0
+
+    # --- carga ---
+    def load(self, db=None):
+        """Arma el índice completo desde la base (al arrancar o en la primera consulta)."""
+        from .database import SessionLocal
+
+        # Los cambios que lleguen mientras se lee la base se anotan y se repiten
+        # sobre el índice nuevo antes de publicarlo
+        with self._lock:
+            if self._journal is None:
+                self._journal = []
+            self._loading += 1
+        try:
+            own_session = db is None
+            db = db or SessionLocal()
+            try:
+                services = db.execute(text("SELECT id, title FROM services WHERE is_active IS NOT FALSE")).all()
+            finally:
+                if own_session:
+                    db.close()
+
+            entries, texts = [], {}
+            for service_id, title in services:
+                texts[(SERVICE, service_id)] = title
+                entries += [(key, SERVICE, mid, service_id) for key, mid in _keys(title)]
+            snapshot = registry.snapshot()
+            for skill in snapshot.skills:
+                texts[(SKILL, skill.id)] = skill.name
+                entries += [(key, SKILL, mid, skill.id) for key, mid in _keys(skill.name)]
+            entries.sort()
+
+            with self._lock:
+                self._entries, self._texts = entries, texts
+                # Repetir un cambio que la lectura ya incluía no altera el resultado
+                for change in self._journal:
+                    self._apply(change)
+                self._skills_version = snapshot.version
+                self._loaded_at = time.monotonic()
+                self._stale = False
+        finally:
+            with self._lock:
+                self._loading -= 1
+                if not self._loading:
+                    self._journal = None
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.load()
+            except Exception:
+                logger.exception("No se pudo recargar el índice de autocompletado")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="suggest-index-refresh", daemon=True).start()
+
+    def bump(self):
+        """Marca el índice como viejo; se recarga en la próxima consulta."""
+        self._stale = True
+
+    # --- cambios incrementales ---
+    def _remove(self, kind: int, ref_id: int):
+        old = self._texts.pop((kind, ref_id), None)
+        if old is None:
+            return
+        for key, mid in _keys(old):
+            i = bisect_left(self._entries, (key, kind, mid, ref_id))
+            if i < len(self._entries) and self._entries[i] == (key, kind, mid, ref_id):
+                del self._entries[i]
+
+    def _add(self, kind: int, ref_id: int, value: str):
+        self._texts[(kind, ref_id)] = value
+        for key, mid in _keys(value):
+            insort(self._entries, (key, kind, mid, ref_id))
+
+    def _apply(self, change: tuple):
+        op, service_id, title, is_active = change
+        self._remove(SERVICE, service_id)
+        if op == "upsert" and is_active is not False:
+            self._add(SERVICE, service_id, title)
+
+    def _change(self, change: tuple):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(change)
+            if self._loaded_at is not None:
+                self._apply(change)
+            # Sin índice ni recarga en curso: se arma completo en la primera consulta
+
+    def upsert_service(self, service_id: int, title: str, is_active: Optional[bool] = True):
+        self._change(("upsert", service_id, title, is_active))
+
+    def remove_service(self, service_id: int):
+        self._change(("remove", service_id, None, None))
+
+    def _sync_skills(self):
+        snapshot = registry.snapshot()
+        if snapshot.version == self._skills_version:
+            return
+        with self._lock:
+            for kind, ref_id in [k for k in self._texts if k[0] == SKILL]:
+                self._remove(kind, ref_id)
+            for skill in snapshot.skills:
+                self._add(SKILL, skill.id, skill.name)
+            self._skills_version = snapshot.version
+
+    # --- lectura ---
+    def suggest(self, prefix: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        """Hasta `limit` sugerencias: skills primero, luego títulos que empiezan con el prefijo."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if self._loaded_at is None:
+            self.load()
+        elif self._stale or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._refresh_in_background()
+        self._sync_skills()
+
+        with self._lock:
+            start = bisect_left(self._entries, (prefix,))
+            candidates = []
+            for entry in self._entries[start:start + SCAN_LIMIT]:
+                if not entry[0].startswith(prefix):
+                    break
+                candidates.append((entry[1], entry[2], entry[0], entry[3]))
+            texts = self._texts
+
+            candidates.sort()
+            results, seen = [], set()
+            for kind, _, _, ref_id in candidates:
+                value = texts.get((kind, ref_id))
+                if value is None or normalize(value) in seen:
+                    continue  # títulos repetidos entre vendedores salen una vez
+                seen.add(normalize(value))
+                results.append({"text": value, "kind": _KIND_NAMES[kind], "id": ref_id})
+                if len(results) >= limit:
+                    break
+        return results
+
+
+index = SuggestIndex()
@@ -0,0 +1,83 @@
+"""
+Contención de la máquina de estados de trabajos (`job_states.py`) contra Postgres.
+
+Muchos threads, cada uno con su sesión y liberados juntos por una barrera, atacan el
+mismo trabajo: exactamente un `accept` gana, y con confirmaciones simultáneas de ambas
+partes el trabajo termina `completado` con las dos banderas puestas.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+THREADS = 16
+ROUNDS = 5
+
+
+def _new_job(engine, vendor_id, contractor_id, service_id):
+    from sqlalchemy.sql import text
+
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            INSERT INTO jobs (contractor_id, vendor_id, service_id, status, total_amount)
+            VALUES (:contractor_id, :vendor_id, :service_id, 'pendiente', 10)
+            RETURNING id
+        """), {"contractor_id": contractor_id, "vendor_id": vendor_id, "service_id": service_id}).scalar_one()
+
+
+def _job_state(engine, job_id):
+    from sqlalchemy.sql import text
+
+    with engine.connect() as conn:
+        return tuple(conn.execute(text("""
+            SELECT status, client_confirmed, vendor_confirmed FROM jobs WHERE id = :id
+        """), {"id": job_id}).one())
+
+
+def _hammer(name, job_id, attempts):
+    """Aplica `name` desde un thread por (user_id, rol) a la vez; devuelve (aplicados, errores)."""
+    from backend import job_states
+    from backend.database import SessionLocal
+
+    barrier = threading.Barrier(len(attempts))
+
+    def attempt(actor):
+        user_id, role = actor
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            try:
+                job_states.apply(db, name, job_id, user_id, role)
+                return None
+            except job_states.JobTransitionError as exc:
+                return exc
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=len(attempts)) as pool:
+        results = list(pool.map(attempt, attempts))
+    return sum(1 for r in results if r is None), [r for r in results if r is not None]
+
+
+@pytest.mark.parametrize("round_no", range(ROUNDS))
+def test_exactly_one_concurrent_accept_wins(pg_engine, job_parties, round_no):
+    vendor_id, contractor_id, service_id = job_parties
+    job_id = _new_job(pg_engine, vendor_id, contractor_id, service_id)
+
+    applied, errors = _hammer("accept", job_id, [(vendor_id, "vendedor")] * THREADS)
+
+    assert applied == 1
+    assert [e.status_code for e in errors] == [400] * (THREADS - 1)
+    assert _job_state(pg_engine, job_id) == ("en_progreso", False, False)
+
+
+@pytest.mark.parametrize("round_no", range(ROUNDS))
+def test_concurrent_confirmations_complete_the_job(pg_engine, job_parties, round_no):
+    vendor_id, contractor_id, service_id = job_parties
+    job_id = _new_job(pg_engine, vendor_id, contractor_id, service_id)
+    assert _hammer("accept", job_id, [(vendor_id, "vendedor")])[0] == 1
+
+    actors = [(contractor_id, "contratador"), (vendor_id, "vendedor")] * (THREADS // 2)
+    _hammer("complete", job_id, actors)
+
+    assert _job_state(pg_engine, job_id) == ("completado", True, True)
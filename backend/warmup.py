@@ -0,0 +1,144 @@
+"""
+Calentamiento de cada proceso y estado de readiness.
+
+Sin calentar, el primer request de cada worker paga la configuración de los mappers de
+SQLAlchemy, el armado de los schemas de Pydantic / OpenAPI y la primera conexión del
+pool. Aquí se hace antes de declararse listo, en dos partes:
+
+- `prepare(app)`: no toca la base. Con `serve.py` corre en el proceso maestro antes
+  del fork, así los workers heredan todo ya armado (copy-on-write).
+- `warm_up(app)`: en cada worker, desde el lifespan de main.py. Repite `prepare` si
+  hace falta (no-op si ya corrió) y abre WARMUP_POOL_CONNECTIONS conexiones en los
+  pools síncrono y asyncpg. Si la base no responde, reintenta cada
+  WARMUP_RETRY_SECONDS en segundo plano.
+
+`GET /health/ready` devuelve 200 solo cuando terminó; mientras tanto 503, para que el
+balanceador no mande tráfico a un worker frío.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.sql import text
+
+from . import database, schemas
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Con DB_PGBOUNCER no hay pool propio que calentar; nunca más de lo que el pool admite
+WARMUP_POOL_CONNECTIONS = 0 if database.DB_PGBOUNCER else min(
+    int(os.getenv("WARMUP_POOL_CONNECTIONS") or database.DB_POOL_SIZE),
+    database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW,
+)
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS") or 5)
+
+
+class Readiness:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prepared = False
+        self.ready = False
+        self.error = None
+        self.phases = {}  # fase -> segundos
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = round(seconds, 4)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"ready": self.ready, "pid": os.getpid(), "phases": dict(self.phases), "error": self.error}
+
+
+state = Readiness()
+
+
+def prepare(app):
+    """Mappers, validadores de schemas y OpenAPI. Idempotente y sin base."""
+    if state.prepared:
+        return
+    start = time.perf_counter()
+    configure_mappers()
+    state.record("mappers", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for value in vars(schemas).values():
+        if isinstance(value, type) and issubclass(value, BaseModel) and value is not BaseModel:
+            value.model_rebuild()
+    # Genera y cachea app.openapi_schema (lo piden /docs y /openapi.json)
+    app.openapi()
+    state.record("schemas", time.perf_counter() - start)
+    state.prepared = True
+
+
+def _open_sync(count: int):
+    connections = []
+    try:
+        for _ in range(count):
+            conn = database.engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()  # vuelven al pool abiertas
+
+
+async def _open_async(count: int):
+    connections = []
+    try:
+        for _ in range(count):
+            conn = await database.async_engine.connect()
+            connections.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            await conn.close()
+
+
+async def _warm_connections():
+    start = time.perf_counter()
+    await run_in_threadpool(_open_sync, WARMUP_POOL_CONNECTIONS)
+    state.record("sync_pool", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await _open_async(WARMUP_POOL_CONNECTIONS)
+    state.record("async_pool", time.perf_counter() - start)
+
+
+async def warm_up(app):
+    """Calienta el worker y lo marca listo; si la base falla, sigue intentando en segundo plano."""
+    prepare(app)
+    try:
+        await _warm_connections()
+    except Exception as exc:
+        logger.warning("Calentamiento de conexiones falló (%s); se reintenta cada %ss", exc, WARMUP_RETRY_SECONDS)
+        state.error = str(exc)
+        return asyncio.create_task(_retry())
+    _mark_ready()
+    return None
+
+
+async def _retry():
+    while True:
+        await asyncio.sleep(WARMUP_RETRY_SECONDS)
+        try:
+            await _warm_connections()
+        except Exception as exc:
+            state.error = str(exc)
+            continue
+        _mark_ready()
+        return
+
+
+def _mark_ready():
+    state.error = None
+    state.ready = True
+    logger.info("Worker %s listo: %s", os.getpid(), state.phases)
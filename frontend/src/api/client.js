@@ -1,12 +1,42 @@
 // src/api/client.js
 export const API_URL = process.env.REACT_APP_API_URL || "http://localhost:8000";
 
-export async function getUsers() {
-  const res = await fetch(`${API_URL}/users`);
-  if (!res.ok) {
-    throw new Error("Error al obtener usuarios");
+// Cabeceras JSON + token de acceso guardado al iniciar sesión (AuthContext)
+export function authHeaders() {
+  const token = localStorage.getItem("token");
+  const headers = { "Content-Type": "application/json" };
+  if (token) headers.Authorization = `Bearer ${token}`;
+  return headers;
+}
+
+// Los listados vienen paginados: el cursor de la página siguiente llega en la
+// cabecera X-Next-Cursor (ausente en la última). Junta todas las páginas, hasta
+// maxPages; lanza si alguna respuesta no es ok.
+export const PAGE_LIMIT = 200;
+
+export async function fetchAllPages(url, { maxPages = Infinity, ...options } = {}) {
+  const items = [];
+  let cursor = null;
+  for (let page = 0; page < maxPages; page++) {
+    const pageUrl = new URL(url);
+    pageUrl.searchParams.set("limit", PAGE_LIMIT);
+    if (cursor) pageUrl.searchParams.set("cursor", cursor);
+    const res = await fetch(pageUrl, options);
+    if (!res.ok) {
+      const error = new Error(`Error ${res.status} al cargar ${url}`);
+      error.status = res.status;
+      throw error;
+    }
+    const data = await res.json();
+    items.push(...(Array.isArray(data) ? data : []));
+    cursor = res.headers.get("X-Next-Cursor");
+    if (!cursor) break;
   }
-  return await res.json();
+  return items;
+}
+
+export async function getUsers() {
+  return await fetchAllPages(`${API_URL}/users/`);
 }
 
 export async function createUser(userData) {
@@ -24,9 +54,5 @@ export async function createUser(userData) {
 }
 
 export async function getServices() {
-  const res = await fetch(`${API_URL}/services`);
-  if (!res.ok) {
-    throw new Error("Error al obtener servicios");
-  }
-  return await res.json();
+  return await fetchAllPages(`${API_URL}/services/`);
 }
@@ -1,5 +1,6 @@
 // src/context/AuthContext.jsx
 import React, { createContext, useState, useContext, useEffect } from 'react';
+import { API_URL, authHeaders } from '../api/client';
 
 const AuthContext = createContext(null);
 
@@ -31,6 +32,11 @@ export const AuthProvider = ({ children }) => {
     };
 
     const logout = () => {
+        // Revoca el token en el backend; la sesión local se cierra aunque falle
+        if (localStorage.getItem('token')) {
+            fetch(`${API_URL}/users/logout`, { method: 'POST', headers: authHeaders() })
+                .catch((err) => console.error('Error al cerrar sesión:', err));
+        }
         localStorage.removeItem('token');
         localStorage.removeItem('user');
         setUser(null);
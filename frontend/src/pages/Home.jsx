@@ -14,7 +14,10 @@ import {
   FaTimes,
   FaUser
 } from "react-icons/fa";
-import { API_URL } from "../api/client";
+import { API_URL, fetchAllPages } from "../api/client";
+
+// Resultados de búsqueda que se traen como máximo (5 x PAGE_LIMIT)
+const SEARCH_MAX_PAGES = 5;
 
 export default function Home() {
   const navigate = useNavigate();
@@ -36,10 +39,7 @@ export default function Home() {
   // Fetch all skills/categories
   const fetchSkills = async () => {
     try {
-      const res = await fetch(`${API_URL}/skills/`);
-      if (!res.ok) throw new Error("Error al cargar categorías");
-      const data = await res.json();
-      setSkills(Array.isArray(data) ? data : []);
+      setSkills(await fetchAllPages(`${API_URL}/skills/`));
     } catch (err) {
       console.error("Error al cargar categorías:", err);
       setSkills([]);
@@ -58,10 +58,8 @@ export default function Home() {
         ...(minRating && { min_rating: minRating }),
       });
 
-      const res = await fetch(`${API_URL}/services/search?${params}`);
-      if (!res.ok) throw new Error("Error en la solicitud al backend");
-      let data = await res.json();
-      data = Array.isArray(data) ? data : [];
+      // La grilla pagina en el cliente: hasta SEARCH_MAX_PAGES páginas del backend
+      let data = await fetchAllPages(`${API_URL}/services/search?${params}`, { maxPages: SEARCH_MAX_PAGES });
 
       // Filter by selected categories (client-side)
       if (selectedCategories.length > 0) {
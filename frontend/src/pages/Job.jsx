@@ -19,7 +19,7 @@ import {
     FaSave,
     FaTimes
 } from "react-icons/fa";
-import { API_URL } from "../api/client";
+import { API_URL, authHeaders, fetchAllPages } from "../api/client";
 
 export default function Job() {
     const { serviceId } = useParams();
@@ -63,11 +63,7 @@ export default function Job() {
 
     const fetchReviews = async () => {
         try {
-            const res = await fetch(`${API_URL}/reviews/service/${serviceId}`);
-            if (res.ok) {
-                const data = await res.json();
-                setReviews(data);
-            }
+            setReviews(await fetchAllPages(`${API_URL}/reviews/service/${serviceId}`));
         } catch (err) {
             console.error("Error fetching reviews:", err);
         }
@@ -81,15 +77,12 @@ export default function Job() {
                 url = `${API_URL}/jobs/vendor/${authUser.id}`;
             }
 
-            const res = await fetch(url);
-            if (res.ok) {
-                const jobs = await res.json();
-                const job = jobs
-                    .filter(j => j.service.id === parseInt(serviceId))
-                    .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))[0];
+            const jobs = await fetchAllPages(url);
+            const job = jobs
+                .filter(j => j.service.id === parseInt(serviceId))
+                .sort((a, b) => new Date(b.created_at) - new Date(a.created_at))[0];
 
-                if (job) setUserJob(job);
-            }
+            if (job) setUserJob(job);
         } catch (err) {
             console.error("Error checking user job:", err);
         }
@@ -159,7 +152,7 @@ export default function Job() {
         try {
             const res = await fetch(`${API_URL}/jobs/`, {
                 method: "POST",
-                headers: { "Content-Type": "application/json" },
+                headers: authHeaders(),
                 body: JSON.stringify({
                     contractor_id: authUser.id,
                     vendor_id: service.vendor.id,
@@ -188,7 +181,7 @@ export default function Job() {
         try {
             const res = await fetch(`${API_URL}/jobs/${userJob.id}/accept`, {
                 method: "PUT",
-                headers: { "Content-Type": "application/json" },
+                headers: authHeaders(),
                 body: JSON.stringify({ user_id: authUser.id })
             });
             if (!res.ok) throw new Error("Error al aceptar");
@@ -206,7 +199,7 @@ export default function Job() {
         try {
             const res = await fetch(`${API_URL}/jobs/${userJob.id}/complete`, {
                 method: "PUT",
-                headers: { "Content-Type": "application/json" },
+                headers: authHeaders(),
                 body: JSON.stringify({ user_id: authUser.id })
             });
             if (!res.ok) throw new Error("Error al completar");
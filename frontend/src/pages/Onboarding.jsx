@@ -1,7 +1,7 @@
 // src/pages/Onboarding.jsx
 import React, { useState, useEffect } from "react";
 import { useAuth } from "../context/AuthContext";
-import { API_URL } from "../api/client";
+import { API_URL, fetchAllPages } from "../api/client";
 
 export default function Onboarding({ userId, onComplete }) {
   const [skills, setSkills] = useState([]);
@@ -13,8 +13,7 @@ export default function Onboarding({ userId, onComplete }) {
 
   // Traer skills desde backend
   useEffect(() => {
-    fetch(`${API_URL}/skills/`)
-      .then(res => res.json())
+    fetchAllPages(`${API_URL}/skills/`)
       .then(data => setSkills(data))
       .catch(() => setError("No se pudieron cargar las skills"));
   }, []);
@@ -80,7 +79,7 @@ export default function Onboarding({ userId, onComplete }) {
       const userRes = await fetch(`${API_URL}/users/${userId}`);
       if (userRes.ok) {
         const userData = await userRes.json();
-        login("fake-jwt-token", userData);
+        login(localStorage.getItem("token"), userData);
       }
 
       // 4️⃣ Finalizar onboarding
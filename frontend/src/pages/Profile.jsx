@@ -3,7 +3,7 @@ import { useNavigate } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
 import Navbar from "../components/Navbar";
 import { FaUser, FaBriefcase, FaEdit, FaTrash, FaPlus, FaStar, FaMoneyBillWave, FaSave, FaTimes, FaChartLine, FaEnvelope, FaPhone, FaMapMarkerAlt, FaCalendar, FaCheckCircle, FaTimesCircle, FaCamera } from "react-icons/fa";
-import { API_URL } from "../api/client";
+import { API_URL, authHeaders, fetchAllPages } from "../api/client";
 
 export default function Profile() {
     const navigate = useNavigate();
@@ -52,11 +52,9 @@ export default function Profile() {
     const fetchUserServices = async () => {
         setLoading(true);
         try {
-            const res = await fetch(`${API_URL}/users/${authUser?.id}/services`);
-            if (!res.ok) throw new Error("Error al cargar servicios");
-            const data = await res.json();
+            const data = await fetchAllPages(`${API_URL}/users/${authUser?.id}/services`);
             console.log("Services loaded:", data);
-            setServices(Array.isArray(data) ? data : []);
+            setServices(data);
         } catch (err) {
             console.error("Error fetching services:", err);
             setServices([]);
@@ -69,10 +67,7 @@ export default function Profile() {
         setLoading(true);
         try {
             const endpoint = isVendor ? `${API_URL}/users/${authUser?.id}/jobs-as-vendor` : `${API_URL}/users/${authUser?.id}/jobs-as-contractor`;
-            const res = await fetch(endpoint);
-            if (!res.ok) throw new Error("Error al cargar trabajos");
-            const data = await res.json();
-            setJobs(Array.isArray(data) ? data : []);
+            setJobs(await fetchAllPages(endpoint));
         } catch (err) {
             console.error("Error:", err);
             setJobs([]);
@@ -83,10 +78,7 @@ export default function Profile() {
 
     const fetchSkills = async () => {
         try {
-            const res = await fetch(`${API_URL}/skills/`);
-            if (!res.ok) throw new Error("Error al cargar skills");
-            const data = await res.json();
-            setSkills(Array.isArray(data) ? data : []);
+            setSkills(await fetchAllPages(`${API_URL}/skills/`));
         } catch (err) {
             console.error("Error:", err);
         }
@@ -290,24 +282,16 @@ export default function Profile() {
 
     const handleUpdateJobStatus = async (jobId, newStatus) => {
         try {
-            let url = `${API_URL}/jobs/${jobId}/status?status=${newStatus}`;
-            let body = null;
-
-            if (newStatus === 'en_progreso') {
-                url = `${API_URL}/jobs/${jobId}/accept`;
-                body = JSON.stringify({ user_id: authUser.id });
-            } else if (newStatus === 'completado') {
-                url = `${API_URL}/jobs/${jobId}/complete`;
-                body = JSON.stringify({ user_id: authUser.id });
-            }
+            // Cada estado tiene su transición; quién actúa sale del token
+            const actions = { en_progreso: "accept", completado: "complete", cancelado: "cancel" };
+            const action = actions[newStatus];
+            if (!action) throw new Error(`Estado no soportado: ${newStatus}`);
 
-            const options = {
+            const res = await fetch(`${API_URL}/jobs/${jobId}/${action}`, {
                 method: "PUT",
-                headers: { "Content-Type": "application/json" },
-            };
-            if (body) options.body = body;
-
-            const res = await fetch(url, options);
+                headers: authHeaders(),
+                body: JSON.stringify({ user_id: authUser.id }),
+            });
             if (!res.ok) throw new Error("Error al actualizar estado");
 
             const data = await res.json();
@@ -1,10 +1,12 @@
 // src/pages/Register.jsx
 import React, { useState } from "react";
 import { useNavigate } from "react-router-dom";
+import { useAuth } from "../context/AuthContext";
 import { API_URL } from "../api/client";
 
 export default function Register() {
   const navigate = useNavigate();
+  const { login } = useAuth();
 
   const [form, setForm] = useState({
     name: "",
@@ -38,6 +40,17 @@ export default function Register() {
         return;
       }
 
+      // Iniciar sesión con la cuenta nueva para obtener el token de acceso
+      const loginRes = await fetch(`${API_URL}/users/login`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ email: form.email, password: form.password }),
+      });
+      if (loginRes.ok) {
+        const session = await loginRes.json();
+        login(session.access_token, session.user);
+      }
+
       // Redirección según rol
       if (form.role === "vendedor") {
         navigate(`/onboarding/${data.id}`);